@@ -1,9 +1,38 @@
 from flask import Flask, render_template, jsonify, request
 import os
+import numpy as np
 
 app = Flask(__name__)
 
 
+def configure_dividend_engine():
+    """Register the shared dividend engine with the catalog modes to precompute.
+
+    Called at import so every entry point (`python flask_app.py`, gunicorn and
+    other WSGI servers) gets the same catalog, built on a background thread
+    from startup so no request pays for it. DIVIDEND_PRECOMPUTE_MODES is a
+    comma-separated mode list (default: all modes); 'none' disables it.
+    """
+    from us_market.dividend.engine import OPTIMIZE_MODES, configure_engine
+    raw = os.environ.get('DIVIDEND_PRECOMPUTE_MODES')
+    if raw is None:
+        modes = list(OPTIMIZE_MODES)
+    elif raw.strip().lower() in ('', 'none'):
+        modes = None
+    else:
+        modes = [m.strip() for m in raw.split(',') if m.strip()]
+        unknown = [m for m in modes if m not in OPTIMIZE_MODES]
+        if unknown:
+            raise ValueError(f"Unknown DIVIDEND_PRECOMPUTE_MODES: {unknown}")
+    shared = configure_engine(precompute_modes=modes)
+    if modes:
+        shared.prime()
+    return shared
+
+
+dividend_engine = configure_dividend_engine()
+
+
 # ============================================
 # 페이지 라우트
 # ============================================
@@ -32,8 +61,8 @@ def dividend_page():
 def get_dividend_themes():
     """Get available themes for UI"""
     try:
-        from us_market.dividend.engine import DividendEngine
-        engine = DividendEngine()
+        from us_market.dividend.engine import get_engine
+        engine = get_engine()
         return jsonify(engine.get_themes())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -50,20 +79,16 @@ def get_all_tier_portfolios():
         tax_rate = float(data.get('tax_rate', 15.4)) / 100.0
         optimize_mode = data.get('optimize_mode', 'greedy')
         
-        from us_market.dividend.engine import DividendEngine
-        engine = DividendEngine()
-        
-        results = {}
-        for tier in ['defensive', 'balanced', 'aggressive']:
-            result = engine.generate_portfolio(
-                theme_id=theme_id,
-                tier_id=tier,
-                target_monthly_krw=target_monthly_krw,
-                fx_rate=fx_rate,
-                tax_rate=tax_rate,
-                optimize_mode=optimize_mode
-            )
-            results[tier] = result
+        from us_market.dividend.engine import get_engine
+        engine = get_engine()
+        
+        results = engine.generate_all_tiers(
+            theme_id,
+            target_monthly_krw=target_monthly_krw,
+            fx_rate=fx_rate,
+            tax_rate=tax_rate,
+            optimize_mode=optimize_mode
+        )
         return jsonify(results)
         
     except Exception as e:
@@ -72,41 +97,179 @@ def get_all_tier_portfolios():
         return jsonify({'error': str(e)}), 500
 
 
+# Upper bound on tickers per bulk risk-metrics request
+MAX_BULK_TICKERS = 200
+MAX_ROLLING_WINDOW = 2520
+
+
+def _add_risk_grade(metrics):
+    """A/B/C grade from annual volatility and max drawdown"""
+    vol = metrics.get('volatility_annual')
+    dd = metrics.get('max_drawdown')
+    if vol is not None and dd is not None:
+        if vol < 0.15 and abs(dd) < 0.20:
+            metrics['risk_grade'] = 'A'
+        elif vol < 0.25 and abs(dd) < 0.35:
+            metrics['risk_grade'] = 'B'
+        else:
+            metrics['risk_grade'] = 'C'
+    else:
+        metrics['risk_grade'] = 'N/A'
+    return metrics
+
+
+@app.route('/api/dividend/risk-metrics', methods=['GET', 'POST'])
+def get_dividend_risk_metrics_bulk():
+    """Risk metrics for many tickers in one call
+
+    GET ?tickers=SCHD,JEPI&period=1y&benchmark=SPY or POST {"tickers": [...], "period": "1y"}.
+    Precomputed metrics are used where available; the rest are computed
+    together in one vectorized pass.
+    """
+    try:
+        from us_market.dividend.analysis.risk_analytics import DEFAULT_BENCHMARK
+        
+        if request.method == 'POST':
+            data = request.json or {}
+            tickers = data.get('tickers') or []
+            period = data.get('period', '1y')
+            benchmark = data.get('benchmark') or DEFAULT_BENCHMARK
+        else:
+            tickers = request.args.get('tickers', '').split(',')
+            period = request.args.get('period', '1y')
+            benchmark = request.args.get('benchmark') or DEFAULT_BENCHMARK
+        benchmark = str(benchmark).strip().upper()
+        if not isinstance(tickers, list):
+            return jsonify({'error': 'tickers must be a list'}), 400
+        tickers = list(dict.fromkeys(str(t).strip().upper() for t in tickers if str(t).strip()))
+        if not tickers:
+            return jsonify({'error': 'tickers is required'}), 400
+        if len(tickers) > MAX_BULK_TICKERS:
+            return jsonify({'error': f'at most {MAX_BULK_TICKERS} tickers per request'}), 400
+        
+        from us_market.dividend.engine import get_engine
+        from us_market.dividend.ticker_analytics import ANALYTICS_PERIOD
+        
+        metrics = {}
+        if period == ANALYTICS_PERIOD and benchmark == DEFAULT_BENCHMARK:
+            engine = get_engine()
+            for ticker in tickers:
+                found = engine.get_analytics(ticker, 'risk')
+                if found is not None:
+                    metrics[ticker] = found
+        missing = [t for t in tickers if t not in metrics]
+        if missing:
+            from us_market.dividend.analysis.risk_analytics import RiskAnalytics
+            metrics.update(RiskAnalytics(benchmark=benchmark).get_risk_metrics_batch(missing, period))
+        
+        return jsonify({
+            'period': period,
+            'benchmark': benchmark,
+            'metrics': {t: _add_risk_grade(metrics[t]) for t in tickers}
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/dividend/risk-metrics/<ticker>')
 def get_dividend_risk_metrics(ticker):
-    """Get risk metrics for a dividend asset"""
+    """Get risk metrics for a dividend asset (precomputed for universe tickers)"""
     try:
-        from us_market.dividend.risk_analytics import RiskAnalytics
+        from us_market.dividend.analysis.risk_analytics import DEFAULT_BENCHMARK
+        from us_market.dividend.engine import get_engine
+        from us_market.dividend.ticker_analytics import ANALYTICS_PERIOD
         
         period = request.args.get('period', '1y')
-        ra = RiskAnalytics()
-        metrics = ra.get_all_risk_metrics(ticker, period)
-        
-        # Add risk grade
-        vol = metrics.get('volatility_annual')
-        dd = metrics.get('max_drawdown')
-        if vol is not None and dd is not None:
-            if vol < 0.15 and abs(dd) < 0.20:
-                metrics['risk_grade'] = 'A'
-            elif vol < 0.25 and abs(dd) < 0.35:
-                metrics['risk_grade'] = 'B'
-            else:
-                metrics['risk_grade'] = 'C'
-        else:
-            metrics['risk_grade'] = 'N/A'
+        benchmark = request.args.get('benchmark', DEFAULT_BENCHMARK).upper()
+        precomputed = period == ANALYTICS_PERIOD and benchmark == DEFAULT_BENCHMARK
+        metrics = get_engine().get_analytics(ticker, 'risk') if precomputed else None
+        if metrics is None:
+            from us_market.dividend.analysis.risk_analytics import RiskAnalytics
+            ra = RiskAnalytics(benchmark=benchmark)
+            metrics = ra.get_all_risk_metrics(ticker, period)
         
-        return jsonify(metrics)
+        return jsonify(_add_risk_grade(metrics))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _parse_windows(value):
+    """Rolling windows from "20,60,252", a list, or None (default windows)."""
+    from us_market.dividend.analysis.risk_analytics import ROLLING_WINDOWS
+    if value is None or value == '':
+        return ROLLING_WINDOWS
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        raise ValueError('windows must be a list of day counts')
+    windows = tuple(int(w) for w in value)
+    if any(w < 2 or w > MAX_ROLLING_WINDOW for w in windows):
+        raise ValueError(f'windows must be between 2 and {MAX_ROLLING_WINDOW} days')
+    return windows
+
+
+@app.route('/api/dividend/risk-rolling/<ticker>')
+def get_dividend_rolling_risk(ticker):
+    """Rolling volatility / Sharpe and drawdown curve for one ticker
+
+    GET ?period=1y&windows=20,60,252
+    """
+    try:
+        period = request.args.get('period', '1y')
+        try:
+            windows = _parse_windows(request.args.get('windows'))
+            from us_market.dividend.analysis.risk_analytics import RiskAnalytics
+            result = RiskAnalytics().get_rolling_risk(ticker.upper(), period, windows)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/dividend/risk-rolling', methods=['POST'])
+def get_dividend_portfolio_rolling_risk():
+    """Rolling volatility / Sharpe and drawdown curve for a portfolio
+
+    POST {"portfolio": [{"ticker": "SCHD", "weight": 0.6}, ...], "period": "1y", "windows": [20, 60]}
+    """
+    try:
+        data = request.json or {}
+        portfolio = data.get('portfolio', [])
+        if not portfolio:
+            return jsonify({'error': 'Portfolio is required'}), 400
+        try:
+            holdings = [(str(p['ticker']).upper(), float(p['weight'])) for p in portfolio]
+            windows = _parse_windows(data.get('windows'))
+            from us_market.dividend.analysis.risk_analytics import RiskAnalytics
+            result = RiskAnalytics().get_portfolio_rolling_risk(holdings, data.get('period', '1y'), windows)
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid portfolio request: {e}'}), 400
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/dividend/cache-stats')
+def get_dividend_cache_stats():
+    """Hit / miss / eviction / memory stats of the shared analysis caches"""
+    try:
+        from us_market.dividend.cache import cache_stats
+        return jsonify(cache_stats())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/dividend/sustainability/<ticker>')
 def get_dividend_sustainability(ticker):
-    """Get dividend sustainability analysis"""
+    """Get dividend sustainability analysis (precomputed for universe tickers)"""
     try:
-        from us_market.dividend.dividend_analyzer import DividendAnalyzer
-        da = DividendAnalyzer()
-        metrics = da.get_all_metrics(ticker)
+        from us_market.dividend.engine import get_engine
+        metrics = get_engine().get_analytics(ticker, 'sustainability')
+        if metrics is None:
+            from us_market.dividend.analysis.dividend_analyzer import DividendAnalyzer
+            da = DividendAnalyzer()
+            metrics = da.get_all_metrics(ticker)
         return jsonify(metrics)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -124,8 +287,8 @@ def optimize_dividend_advanced():
         tax_rate = float(data.get('tax_rate', 15.4)) / 100.0
         optimize_mode = data.get('optimize_mode', 'risk_parity')
         
-        from us_market.dividend.engine import DividendEngine
-        engine = DividendEngine()
+        from us_market.dividend.engine import get_engine
+        engine = get_engine()
         
         result = engine.generate_portfolio(
             theme_id=theme_id,
@@ -143,6 +306,87 @@ def optimize_dividend_advanced():
         return jsonify({'error': str(e)}), 500
 
 
+def _parse_sweep_axis(name, value, default, valid, rule, scale=1.0):
+    """Sweep axis from a number, a list, or {start, stop, num}.
+
+    Raises ValueError if the axis has more than MAX_SWEEP_CELLS points (checked
+    before anything is allocated) or a value is non-finite or fails valid.
+    """
+    from us_market.dividend.engine import MAX_SWEEP_CELLS
+    if value is None:
+        value = default
+    if isinstance(value, dict):
+        num = int(value.get('num', 10))
+        if not 1 <= num <= MAX_SWEEP_CELLS:
+            raise ValueError(f'{name}.num must be between 1 and {MAX_SWEEP_CELLS}')
+        values = np.linspace(float(value['start']), float(value['stop']), num)
+    elif isinstance(value, (list, tuple)):
+        if len(value) > MAX_SWEEP_CELLS:
+            raise ValueError(f'{name} has more than {MAX_SWEEP_CELLS} values')
+        values = np.array([float(v) for v in value])
+    else:
+        values = np.array([float(value)])
+    if not (np.isfinite(values).all() and valid(values).all()):
+        raise ValueError(f'{name} must be {rule}')
+    return values * scale
+
+
+@app.route('/api/dividend/sweep', methods=['POST'])
+def sweep_dividend_scenarios():
+    """Required capital / monthly flow grid over target, FX and tax ranges"""
+    try:
+        from us_market.dividend.engine import MAX_SWEEP_CELLS
+        data = request.json or {}
+        try:
+            targets = _parse_sweep_axis(
+                'target_monthly_krw', data.get('target_monthly_krw'), 1000000,
+                lambda v: v >= 0, '>= 0'
+            )
+            fx_rates = _parse_sweep_axis(
+                'fx_rate', data.get('fx_rate'), 1420, lambda v: v > 0, '> 0'
+            )
+            tax_rates = _parse_sweep_axis(
+                'tax_rate', data.get('tax_rate'), 15.4,
+                lambda v: (v >= 0) & (v < 100), 'a percentage in [0, 100)', scale=0.01
+            )
+            cells = len(targets) * len(fx_rates) * len(tax_rates)
+            if cells > MAX_SWEEP_CELLS:
+                raise ValueError(f'grid too large ({cells} > {MAX_SWEEP_CELLS} cells)')
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid sweep range: {e}'}), 400
+        
+        from us_market.dividend.engine import get_engine
+        engine = get_engine()
+        
+        result = engine.sweep(
+            theme_id=data.get('theme_id', 'max_monthly_income'),
+            tier_id=data.get('tier_id', 'balanced'),
+            target_monthly_krw=targets,
+            fx_rate=fx_rates,
+            tax_rate=tax_rates,
+            optimize_mode=data.get('optimize_mode', 'greedy')
+        )
+        return jsonify(result)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/dividend/catalog')
+def get_dividend_catalog_report():
+    """Generation report of the precomputed theme × tier × mode catalog"""
+    try:
+        from us_market.dividend.engine import get_engine
+        engine = get_engine()
+        report = engine.catalog_report
+        if report is None:
+            return jsonify({'status': 'not_built'})
+        return jsonify(report)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/dividend/backtest', methods=['POST'])
 def run_dividend_backtest():
     """Run backtest on a dividend portfolio"""
@@ -180,5 +424,7 @@ def run_dividend_backtest():
 # ============================================
 
 if __name__ == '__main__':
+    print('📦 Precomputing dividend portfolio catalog...')
+    dividend_engine.get()
     print('🚀 Flask Server Starting on port 5001...')
     app.run(port=5001, debug=True, use_reloader=False)
@@ -0,0 +1,161 @@
+"""
+Loader Benchmark: per-ticker vs bulk download
+- Serves the recorded dividend_universe.json through a MarketDataProvider
+- Each provider call counts as one request and sleeps a fixed latency
+- Reports requests and wall time for per-ticker, bulk (cold), bulk (warm
+  metadata from the previous universe) and bulk with a share of each batch
+  silently dropped, as yf.download does for throttled tickers
+- --analytics adds the per-ticker analytics stage (price history is served as
+  flat bars at the recorded price)
+
+Run: python -m us_market.benchmarks.bench_loader [--latency 0.05] [--batch-size 50] [--drop-rate 0.1]
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from us_market.dividend.cache import clear_caches
+from us_market.dividend.loader import DividendDataLoader, DOWNLOAD_BATCH_SIZE
+from us_market.dividend.market_store import MarketStore, set_market_store
+from us_market.dividend.providers import MarketDataProvider
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'dividend', 'data')
+
+
+class RecordedUniverseProvider(MarketDataProvider):
+    """Provider over recorded universe records; every call counts as one request.
+
+    Payment dates are shifted so the latest recorded payment lands a month
+    ago, keeping the recording inside the loader's trailing window. With
+    drop_rate, download leaves that share of tickers out of its frame.
+    """
+
+    def __init__(self, records: Dict, latency: float = 0.05, drop_rate: float = 0.0):
+        self.records = {t: r for t, r in records.items() if not t.startswith('_')}
+        self.latency = latency
+        rng = np.random.default_rng(0)
+        self.dropped = {t for t in self.records if rng.random() < drop_rate}
+        self.requests = 0
+        self._lock = threading.Lock()
+        dates = [p['date'] for r in self.records.values() for p in r.get('payments') or []]
+        latest = pd.Timestamp(max(dates)) if dates else pd.Timestamp.now()
+        self.shift = (pd.Timestamp.now().normalize() - pd.Timedelta(days=30)) - latest
+
+    def _request(self):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+    def _dividends(self, ticker: str) -> pd.Series:
+        payments = self.records.get(ticker, {}).get('payments') or []
+        index = pd.DatetimeIndex([pd.Timestamp(p['date']) + self.shift for p in payments])
+        return pd.Series([float(p['amount']) for p in payments], index=index, dtype=np.float64)
+
+    def info(self, ticker: str) -> Dict:
+        self._request()
+        r = self.records.get(ticker, {})
+        return {
+            'shortName': r.get('name', ticker),
+            'sector': r.get('sector', 'ETF'),
+            'currency': r.get('currency', 'USD'),
+            'currentPrice': r.get('price', 0),
+        }
+
+    def dividends(self, ticker: str) -> pd.Series:
+        self._request()
+        return self._dividends(ticker)
+
+    def history(self, ticker: str, start: str = None, end: str = None, period: str = None) -> pd.DataFrame:
+        """Business-day bars at the recorded price over [start, end) (analytics stage)."""
+        self._request()
+        price = float(self.records.get(ticker, {}).get('price', 0) or 0)
+        if not price:
+            return pd.DataFrame()
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+        start = pd.Timestamp(start) if start is not None else end - pd.DateOffset(years=1)
+        days = pd.bdate_range(start=start, end=end, inclusive='left')
+        close = np.full(len(days), price)
+        return pd.DataFrame(
+            {'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': np.zeros(len(days))},
+            index=days
+        )
+
+    def download(self, tickers: List[str], start: str) -> pd.DataFrame:
+        self._request()
+        start = pd.Timestamp(start)
+        known = [t for t in tickers if t in self.records and t not in self.dropped]
+        # Trading days plus recorded ex-dates (some of which fall on weekends)
+        days = pd.bdate_range(start=start, end=pd.Timestamp.now().normalize())
+        for ticker in known:
+            ex_dates = self._dividends(ticker).index
+            days = days.union(ex_dates[ex_dates >= start])
+        frames = {}
+        for ticker in known:
+            divs = self._dividends(ticker).reindex(days, fill_value=0.0)
+            close = np.full(len(days), float(self.records[ticker].get('price', 0) or 0))
+            frames[ticker] = pd.DataFrame({'Close': close, 'Dividends': divs.values}, index=days)
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+
+def run(mode: str, records: Dict, latency: float, batch_size: int, warm: bool, rate: float = None,
+        drop_rate: float = 0.0, analytics: bool = False) -> Dict:
+    provider = RecordedUniverseProvider(records, latency, drop_rate)
+    work_dir = tempfile.mkdtemp(prefix='bench_loader_')
+    try:
+        shutil.copy(os.path.join(DATA_DIR, 'universe_seed.json'), work_dir)
+        if warm:
+            shutil.copy(os.path.join(DATA_DIR, 'dividend_universe.json'), work_dir)
+        # Cold price store and caches, so each run's analytics fetches its own history
+        set_market_store(MarketStore(os.path.join(work_dir, 'market')))
+        clear_caches()
+        loader = DividendDataLoader(data_dir=work_dir, rate_limit=rate, provider=provider, analytics=analytics)
+        t0 = time.perf_counter()
+        data = loader.fetch_data(bulk=(mode == 'bulk'), batch_size=batch_size)
+        elapsed = time.perf_counter() - t0
+    finally:
+        set_market_store(None)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        'mode': mode + (' (warm meta)' if warm else '') + (f' ({drop_rate:.0%} dropped)' if drop_rate else ''),
+        'requests': provider.requests,
+        'seconds': elapsed,
+        'tickers': len(data) - 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-ticker vs bulk loader fetches")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per simulated request")
+    parser.add_argument('--batch-size', type=int, default=DOWNLOAD_BATCH_SIZE)
+    parser.add_argument('--rate', type=float, default=None, help="loader rate limit (requests/s); default unlimited")
+    parser.add_argument('--analytics', action='store_true',
+                        help="include the per-ticker analytics stage in every run")
+    parser.add_argument('--drop-rate', type=float, default=0.1,
+                        help="share of tickers a bulk download leaves out (refetched one by one)")
+    args = parser.parse_args()
+
+    with open(os.path.join(DATA_DIR, 'dividend_universe.json'), 'r', encoding='utf-8') as f:
+        records = json.load(f)
+
+    rows = [
+        run('per-ticker', records, args.latency, args.batch_size, warm=False, rate=args.rate, analytics=args.analytics),
+        run('bulk', records, args.latency, args.batch_size, warm=False, rate=args.rate, analytics=args.analytics),
+        run('bulk', records, args.latency, args.batch_size, warm=True, rate=args.rate, analytics=args.analytics),
+        run('bulk', records, args.latency, args.batch_size, warm=True, rate=args.rate, drop_rate=args.drop_rate,
+            analytics=args.analytics),
+    ]
+    print(f"{'mode':<32}{'tickers':>8}{'requests':>10}{'seconds':>10}")
+    for row in rows:
+        print(f"{row['mode']:<32}{row['tickers']:>8}{row['requests']:>10}{row['seconds']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,24 @@
 Backtest Engine for Dividend Portfolios
 Historical simulation with dividend reinvestment
 """
-import yfinance as yf
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
+from ..market_store import MarketStore, get_market_store
+from ..providers import MarketDataProvider, get_provider
+
 logger = logging.getLogger(__name__)
 
 
 class BacktestEngine:
-    def __init__(self, benchmark: str = 'SPY'):
+    def __init__(self, benchmark: str = 'SPY', store: Optional[MarketStore] = None,
+                 provider: Optional[MarketDataProvider] = None):
         self.benchmark = benchmark
+        self.store = store if store is not None else get_market_store()
+        self.provider = provider if provider is not None else get_provider()
     
     def run_backtest(
         self,
@@ -38,21 +43,22 @@ class BacktestEngine:
         price_data = {}
         dividend_data = {}
         
+        # Local store first; the provider only for ranges not stored yet
+        last_day = pd.Timestamp(end_date) - pd.Timedelta(days=1)  # history end is exclusive
         for ticker in tickers:
             try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(start=start_date, end=end_date)
+                hist = self.store.get_history(
+                    ticker, start_date, last_day,
+                    fetch=lambda start, end: self.provider.history(ticker, start=start, end=end)
+                )
                 if not hist.empty:
                     price_data[ticker] = hist['Close']
-                    divs = stock.dividends
-                    if divs is not None and len(divs) > 0:
-                        # Ensure timezone naive
-                        divs.index = divs.index.tz_localize(None)
-                        # Filter range
-                        start_dt = pd.Timestamp(start_date)
-                        end_dt = pd.Timestamp(end_date)
-                        mask = (divs.index >= start_dt) & (divs.index <= end_dt)
-                        dividend_data[ticker] = divs[mask]
+                    divs = self.store.get_dividends(
+                        ticker, start_date, end_date,
+                        fetch=lambda: self.provider.dividends(ticker)
+                    )
+                    if len(divs) > 0:
+                        dividend_data[ticker] = divs
             except Exception as e:
                 logger.error(f"Error fetching {ticker}: {e}")
         
@@ -1,37 +1,45 @@
 """
 Dividend Sustainability Analyzer
 Payout Ratio, Growth Rate, Streak, Safety Score
+Each metric accepts prefetched info / dividends; get_all_metrics fetches both
+once per ticker (concurrently) and shares them across every metric.
 """
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
+from ..cache import get_cache
+from ..market_store import MarketStore, get_market_store
+from ..providers import MarketDataProvider, get_provider
+
 logger = logging.getLogger(__name__)
 
 
 class DividendAnalyzer:
-    _info_cache: Dict[str, Dict] = {}
+    # ticker -> provider .info, shared by all instances
+    _info_cache = get_cache('analyzer_info', max_entries=2048, max_bytes=64 * 2**20, ttl=3600)
     
-    def __init__(self):
-        pass
+    def __init__(self, store: Optional[MarketStore] = None, provider: Optional[MarketDataProvider] = None):
+        self.store = store if store is not None else get_market_store()
+        self.provider = provider if provider is not None else get_provider()
     
-    def _get_stock_info(self, ticker: str) -> Optional[Dict]:
-        if ticker in self._info_cache:
-            return self._info_cache[ticker]
-        try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            self._info_cache[ticker] = info
-            return info
-        except:
-            return None
+    def _get_stock_info(self, ticker: str, raise_errors: bool = False) -> Optional[Dict]:
+        def load() -> Optional[Dict]:
+            try:
+                return self.provider.info(ticker)
+            except Exception:
+                if raise_errors:
+                    raise
+                return None
+        return self._info_cache.get_or_load(ticker, load)
     
-    def calculate_payout_ratio(self, ticker: str) -> Optional[float]:
+    def calculate_payout_ratio(self, ticker: str, info: Optional[Dict] = None) -> Optional[float]:
         """Dividend Payout Ratio = Dividends / EPS"""
-        info = self._get_stock_info(ticker)
+        if info is None:
+            info = self._get_stock_info(ticker)
         if not info:
             return None
         
@@ -43,15 +51,40 @@ class DividendAnalyzer:
         
         return round(ttm_dividend / eps, 3)
     
-    def calculate_dividend_growth_rate(self, ticker: str, years: int = 5) -> Optional[float]:
+    def _get_dividends(self, ticker: str) -> pd.Series:
+        """Full dividend history (timezone-naive) from the local store."""
+        return self.store.get_dividends(ticker, fetch=lambda: self.provider.dividends(ticker))
+    
+    def _prefetch(self, ticker: str, raise_errors: bool = False) -> Tuple[Dict, pd.Series]:
+        """info and dividend history for one evaluation, fetched side by side.
+
+        Failures come back as {} / an empty series so metrics treat them as
+        missing data instead of fetching again; with raise_errors they
+        propagate instead (e.g. to a fetch controller that retries them).
+        """
+        def dividends() -> pd.Series:
+            try:
+                return self._get_dividends(ticker)
+            except Exception as e:
+                if raise_errors:
+                    raise
+                logger.error(f"Error fetching dividends for {ticker}: {e}")
+                return pd.Series(dtype=float)
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            info = executor.submit(self._get_stock_info, ticker, raise_errors)
+            divs = executor.submit(dividends)
+            return info.result() or {}, divs.result()
+    
+    def calculate_dividend_growth_rate(self, ticker: str, years: int = 5,
+                                       dividends: Optional[pd.Series] = None) -> Optional[float]:
         """CAGR of dividends over N years"""
         try:
-            stock = yf.Ticker(ticker)
-            dividends = stock.dividends
+            if dividends is None:
+                dividends = self._get_dividends(ticker)
             if dividends.empty or len(dividends) < 4:
                 return None
             
-            dividends.index = dividends.index.tz_localize(None)
             now = pd.Timestamp.now()
             start = now - pd.Timedelta(days=years * 365)
             
@@ -70,15 +103,14 @@ class DividendAnalyzer:
         except:
             return None
     
-    def get_dividend_streak(self, ticker: str) -> int:
+    def get_dividend_streak(self, ticker: str, dividends: Optional[pd.Series] = None) -> int:
         """Consecutive years of dividend payments"""
         try:
-            stock = yf.Ticker(ticker)
-            dividends = stock.dividends
+            if dividends is None:
+                dividends = self._get_dividends(ticker)
             if dividends.empty:
                 return 0
             
-            dividends.index = dividends.index.tz_localize(None)
             # Use set to identify unique years
             years = sorted(set(dividends.index.year), reverse=True)
             
@@ -100,11 +132,14 @@ class DividendAnalyzer:
         except:
             return 0
     
-    def get_dividend_safety_score(self, ticker: str) -> Dict:
+    def get_dividend_safety_score(self, ticker: str, info: Optional[Dict] = None,
+                                  dividends: Optional[pd.Series] = None) -> Dict:
         """Calculate overall dividend safety score (0-100)"""
-        payout = self.calculate_payout_ratio(ticker)
-        growth = self.calculate_dividend_growth_rate(ticker)
-        streak = self.get_dividend_streak(ticker)
+        if info is None and dividends is None:
+            info, dividends = self._prefetch(ticker)
+        payout = self.calculate_payout_ratio(ticker, info=info)
+        growth = self.calculate_dividend_growth_rate(ticker, dividends=dividends)
+        streak = self.get_dividend_streak(ticker, dividends=dividends)
         
         score = 0
         breakdown = {}
@@ -167,11 +202,16 @@ class DividendAnalyzer:
             'breakdown': breakdown
         }
     
-    def get_all_metrics(self, ticker: str) -> Dict:
-        """Get all dividend metrics"""
+    def get_all_metrics(self, ticker: str, raise_errors: bool = False) -> Dict:
+        """Get all dividend metrics (one info + one dividends fetch)
+
+        raise_errors=True lets fetch errors propagate instead of scoring the
+        ticker on missing data.
+        """
+        info, dividends = self._prefetch(ticker, raise_errors)
         return {
-            'payout_ratio': self.calculate_payout_ratio(ticker),
-            'dividend_growth_5y': self.calculate_dividend_growth_rate(ticker),
-            'dividend_streak': self.get_dividend_streak(ticker),
-            'safety': self.get_dividend_safety_score(ticker)
+            'payout_ratio': self.calculate_payout_ratio(ticker, info=info),
+            'dividend_growth_5y': self.calculate_dividend_growth_rate(ticker, dividends=dividends),
+            'dividend_streak': self.get_dividend_streak(ticker, dividends=dividends),
+            'safety': self.get_dividend_safety_score(ticker, info=info, dividends=dividends)
         }
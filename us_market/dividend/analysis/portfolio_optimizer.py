@@ -4,35 +4,36 @@ Risk Parity, Mean-Variance, Max Sharpe optimization
 """
 import numpy as np
 import pandas as pd
-import yfinance as yf
 from scipy.optimize import minimize
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
+from ..market_store import MarketStore, get_market_store
+from ..price_ladder import get_history, history_cache
+from ..providers import MarketDataProvider, get_provider
+
 logger = logging.getLogger(__name__)
 
 
 class PortfolioOptimizer:
-    _returns_cache: Dict[str, pd.Series] = {}
+    # ticker -> longest history loaded so far; returns are computed on a slice of it
+    _returns_cache = history_cache
     
-    def __init__(self, risk_free_rate: float = 0.05):
+    def __init__(self, risk_free_rate: float = 0.05, store: Optional[MarketStore] = None,
+                 provider: Optional[MarketDataProvider] = None):
         self.risk_free_rate = risk_free_rate
+        self.store = store if store is not None else get_market_store()
+        self.provider = provider if provider is not None else get_provider()
     
     def _get_returns(self, ticker: str, period: str = '1y') -> Optional[pd.Series]:
-        cache_key = f"{ticker}_{period}"
-        if cache_key in self._returns_cache:
-            return self._returns_cache[cache_key]
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
-            if hist.empty or len(hist) < 30:
-                return None
-            returns = hist['Close'].pct_change().dropna()
-            self._returns_cache[cache_key] = returns
-            return returns
-        except:
+            hist = get_history(ticker, period, self.store, self.provider)
+        except Exception:
+            return None
+        if hist.empty or len(hist) < 30:
             return None
+        return hist['Close'].pct_change().dropna()
     
     def _get_returns_matrix(self, tickers: List[str], period: str = '1y') -> Optional[pd.DataFrame]:
         returns_dict = {}
@@ -45,16 +46,22 @@ class PortfolioOptimizer:
         return pd.DataFrame(returns_dict).dropna()
     
     def optimize_risk_parity(
-        self, tickers: List[str], constraints: Optional[Dict] = None
+        self,
+        tickers: List[str],
+        constraints: Optional[Dict] = None,
+        returns_df: Optional[pd.DataFrame] = None,
+        cov_matrix: Optional[pd.DataFrame] = None
     ) -> Optional[List[Tuple[str, float]]]:
         """Equal risk contribution from each asset."""
-        returns_df = self._get_returns_matrix(tickers)
+        if returns_df is None:
+            returns_df = self._get_returns_matrix(tickers)
         if returns_df is None or len(returns_df) < 30:
             return None
         
         valid_tickers = list(returns_df.columns)
         n = len(valid_tickers)
-        cov_matrix = returns_df.cov() * 252
+        if cov_matrix is None:
+            cov_matrix = returns_df.cov() * 252
         
         def risk_parity_objective(weights):
             weights = np.array(weights)
@@ -82,17 +89,23 @@ class PortfolioOptimizer:
         return None
     
     def optimize_max_sharpe(
-        self, tickers: List[str], constraints: Optional[Dict] = None
+        self,
+        tickers: List[str],
+        constraints: Optional[Dict] = None,
+        returns_df: Optional[pd.DataFrame] = None,
+        cov_matrix: Optional[pd.DataFrame] = None
     ) -> Optional[List[Tuple[str, float]]]:
         """Maximize Sharpe ratio."""
-        returns_df = self._get_returns_matrix(tickers)
+        if returns_df is None:
+            returns_df = self._get_returns_matrix(tickers)
         if returns_df is None:
             return None
         
         valid_tickers = list(returns_df.columns)
         n = len(valid_tickers)
         expected_returns = returns_df.mean() * 252
-        cov_matrix = returns_df.cov() * 252
+        if cov_matrix is None:
+            cov_matrix = returns_df.cov() * 252
         
         def neg_sharpe(weights):
             port_return = weights.T @ expected_returns
@@ -117,12 +130,21 @@ class PortfolioOptimizer:
         return None
     
     def optimize(
-        self, tickers: List[str], method: str = 'risk_parity', constraints: Optional[Dict] = None
+        self,
+        tickers: List[str],
+        method: str = 'risk_parity',
+        constraints: Optional[Dict] = None,
+        returns_df: Optional[pd.DataFrame] = None,
+        cov_matrix: Optional[pd.DataFrame] = None
     ) -> Optional[List[Tuple[str, float]]]:
-        """Unified optimization interface."""
+        """Unified optimization interface.
+
+        returns_df / cov_matrix may be passed in when the caller already holds
+        them (e.g. shared across tiers or modes); otherwise they are fetched.
+        """
         if method == 'risk_parity':
-            return self.optimize_risk_parity(tickers, constraints)
+            return self.optimize_risk_parity(tickers, constraints, returns_df, cov_matrix)
         elif method == 'max_sharpe':
-            return self.optimize_max_sharpe(tickers, constraints)
+            return self.optimize_max_sharpe(tickers, constraints, returns_df, cov_matrix)
         else:
             return None
@@ -1,66 +1,474 @@
 """
-Risk Analytics - Volatility, Drawdown, Sharpe, Beta
+Risk Analytics - Volatility, Drawdown, Sharpe, Sortino, Calmar, VaR / CVaR, Beta
+- risk_metrics_matrix: every metric for every column of a (dates × tickers)
+  price matrix in one NumPy pass
+- Tail risk: historical and parametric (normal) VaR / CVaR of daily returns
+- Beta against a configurable benchmark column (SPY by default)
+- Drawdown duration (longest stretch under a prior peak) and time to recover
+  from the deepest trough, in trading days
+- Single-ticker methods run the same kernel on a one-column matrix
+- get_risk_metrics_batch: aligned price matrix for many tickers, one pass
+- RollingRisk: rolling volatility / Sharpe updated online one day at a time,
+  cached per ticker or portfolio and appended to as new days arrive; the
+  drawdown curve is measured from the requested period's own peak
 """
-import yfinance as yf
 import numpy as np
 import pandas as pd
-from typing import Dict, Optional
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
 import logging
+import math
+import threading
+from statistics import NormalDist
+
+from ..cache import get_cache
+from ..market_store import MarketStore, get_market_store, period_start
+from ..price_ladder import get_entry, get_history, history_cache
+from ..providers import MarketDataProvider, get_provider
 
 logger = logging.getLogger(__name__)
 
+TRADING_DAYS = 252
+# Fewer prices than this and a column's metrics are None
+MIN_OBSERVATIONS = 20
+# Tail probability of VaR / CVaR is 1 - VAR_CONFIDENCE
+VAR_CONFIDENCE = 0.95
+# Market proxy for beta unless RiskAnalytics is given another
+DEFAULT_BENCHMARK = 'SPY'
+
+_NORMAL = NormalDist()
+
+
+def _forward_fill(prices: np.ndarray) -> np.ndarray:
+    """Carry each column's last valid price down over NaN gaps."""
+    rows = np.where(~np.isnan(prices), np.arange(len(prices))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(prices, rows, axis=0)
+
+
+def _log_returns(prices: np.ndarray):
+    """(valid mask, forward-filled prices, log returns between consecutive valid prices)."""
+    valid = ~np.isnan(prices)
+    filled = _forward_fill(prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.log(filled[1:] / filled[:-1])
+    returns[~(valid[1:] & ~np.isnan(filled[:-1]))] = np.nan
+    return valid, filled, returns
+
+
+def _beta(returns: np.ndarray, benchmark_returns: np.ndarray) -> np.ndarray:
+    """Per-column beta over the days both the column and the benchmark have a return."""
+    pair = ~np.isnan(returns) & ~np.isnan(benchmark_returns)[:, None]
+    n = pair.sum(axis=0)
+    x = np.where(pair, returns, 0.0)
+    y = np.where(pair, benchmark_returns[:, None], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mx = x.sum(axis=0) / n
+        my = y.sum(axis=0) / n
+        cov = (np.where(pair, (x - mx) * (y - my), 0.0)).sum(axis=0)
+        var = (np.where(pair, (y - my) ** 2, 0.0)).sum(axis=0)
+        beta = cov / var
+    beta[~((n >= 2) & (var > 0))] = np.nan
+    return beta
+
+
+def _drawdown_durations(valid: np.ndarray, filled: np.ndarray, running_max: np.ndarray,
+                        drawdowns: np.ndarray):
+    """Longest underwater stretch and recovery time from the deepest trough, in trading days.
+
+    Days are counted on each column's own prices (NaN rows don't count).
+    Recovery is NaN while the price is still below the peak before the trough.
+    """
+    if len(filled) == 0:
+        return np.full(filled.shape[1], np.nan), np.full(filled.shape[1], np.nan)
+    rows = np.arange(len(filled))[:, None]
+    cols = np.arange(filled.shape[1])
+    count = np.cumsum(valid, axis=0)
+    at_peak = valid & (filled >= running_max)
+    peak_row = np.maximum.accumulate(np.where(at_peak, rows, 0), axis=0)
+    since_peak = count - np.take_along_axis(count, peak_row, axis=0)
+    duration = np.where(valid, since_peak, 0).max(axis=0).astype(np.float64)
+
+    trough = np.where(np.isnan(drawdowns), np.inf, drawdowns).argmin(axis=0)
+    peak_value = running_max[trough, cols]
+    back = valid & (rows > trough) & (filled >= peak_value)
+    first = back.argmax(axis=0)
+    recovery = np.where(back.any(axis=0), count[first, cols] - count[trough, cols], np.nan)
+    recovery[drawdowns[trough, cols] == 0] = 0.0  # never under water
+    return duration, recovery
+
+
+def risk_metrics_matrix(
+    prices: np.ndarray,
+    risk_free_rate: float = 0.05,
+    benchmark: Optional[np.ndarray] = None,
+    confidence: float = VAR_CONFIDENCE
+) -> Dict[str, np.ndarray]:
+    """Every risk metric per column of a (dates × tickers) price matrix.
+
+    NaN marks a day without a price for that ticker (not listed yet, or a
+    calendar gap in the aligned matrix). Each column gives the same result
+    as its own dropna()'d price series; columns with fewer than
+    MIN_OBSERVATIONS prices come back NaN, as do ratios with a zero
+    denominator. VaR / CVaR are daily log returns at the (1 - confidence)
+    tail (negative = loss). benchmark is a price column on the same rows;
+    without one, beta is NaN.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[:, None]
+    n_cols = prices.shape[1]
+    valid, filled, returns = _log_returns(prices)
+    n_returns = (~np.isnan(returns)).sum(axis=0)
+    enough = (valid.sum(axis=0) >= MIN_OBSERVATIONS) & (n_returns >= 2)
+
+    def per_column(fn) -> np.ndarray:
+        out = np.full(n_cols, np.nan)
+        if enough.any():
+            out[enough] = fn(returns[:, enough])
+        return out
+
+    alpha = 1 - confidence
+    target = risk_free_rate / TRADING_DAYS
+    mean = per_column(lambda r: np.nanmean(r, axis=0))
+    std = per_column(lambda r: np.nanstd(r, axis=0, ddof=1))
+    var_historical = per_column(lambda r: np.nanquantile(r, alpha, axis=0))
+    cvar_historical = per_column(
+        lambda r: np.nanmean(np.where(r <= var_historical[enough], r, np.nan), axis=0))
+    downside = per_column(
+        lambda r: np.sqrt(np.nanmean(np.where(np.isnan(r), np.nan, np.minimum(r - target, 0.0)) ** 2, axis=0)))
+
+    z = _NORMAL.inv_cdf(alpha)
+    volatility = std * np.sqrt(TRADING_DAYS)
+    excess = mean * TRADING_DAYS - risk_free_rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = excess / volatility
+        sortino = excess / (downside * np.sqrt(TRADING_DAYS))
+    sharpe[~(volatility > 0)] = np.nan
+    sortino[~(downside > 0)] = np.nan
+
+    running_max = np.fmax.accumulate(filled, axis=0)
+    with np.errstate(invalid='ignore'):
+        drawdowns = np.where(valid, (filled - running_max) / running_max, np.nan)
+    max_drawdown = np.full(n_cols, np.nan)
+    if enough.any():
+        max_drawdown[enough] = np.nanmin(drawdowns[:, enough], axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        calmar = np.expm1(mean * TRADING_DAYS) / -max_drawdown
+    calmar[~(max_drawdown < 0)] = np.nan
+
+    duration, recovery = _drawdown_durations(valid, filled, running_max, drawdowns)
+    duration[~enough] = np.nan
+    recovery[~enough] = np.nan
+
+    beta = np.full(n_cols, np.nan)
+    if benchmark is not None:
+        _, _, benchmark_returns = _log_returns(np.asarray(benchmark, dtype=np.float64)[:, None])
+        beta = _beta(returns, benchmark_returns[:, 0])
+        beta[~enough] = np.nan
+
+    return {
+        'volatility_annual': volatility,
+        'max_drawdown': max_drawdown,
+        'sharpe_ratio': sharpe,
+        'sortino_ratio': sortino,
+        'calmar_ratio': calmar,
+        'var_historical': var_historical,
+        'cvar_historical': cvar_historical,
+        'var_parametric': mean + z * std,
+        'cvar_parametric': mean - std * _NORMAL.pdf(z) / alpha,
+        'beta': beta,
+        'max_drawdown_duration': duration,
+        'time_to_recovery': recovery,
+    }
+
+
+def _rounded(value: float, digits: Optional[int]) -> Optional[float]:
+    """NaN -> None; digits=None -> whole days as int."""
+    if np.isnan(value):
+        return None
+    return int(value) if digits is None else round(float(value), digits)
+
+
+# Output rounding per metric (as the single-ticker API has always returned);
+# None = a count of trading days
+METRIC_DIGITS = {
+    'volatility_annual': 4,
+    'max_drawdown': 4,
+    'sharpe_ratio': 2,
+    'sortino_ratio': 2,
+    'calmar_ratio': 2,
+    'var_historical': 4,
+    'cvar_historical': 4,
+    'var_parametric': 4,
+    'cvar_parametric': 4,
+    'beta': 2,
+    'max_drawdown_duration': None,
+    'time_to_recovery': None,
+}
+
+
+# Rolling window lengths (trading days) served by default
+ROLLING_WINDOWS = (20, 60, 252)
+
+
+class RollingRisk:
+    """Rolling volatility / Sharpe and the underwater curve of one price series, built online.
+
+    update() costs O(len(windows)): one sliding-window Welford step per window
+    over the daily log returns (add the newest, drop the one leaving the
+    window). Days that arrive later are appended to the same state; nothing
+    already computed is revisited. Rolling values only depend on the last w
+    returns, so they do not change with how far back the state starts. The
+    drawdown does (it is relative to a peak), so series() measures it from
+    the highest price since `start`, one vectorized pass over that slice.
+    """
+
+    def __init__(self, windows=ROLLING_WINDOWS, risk_free_rate: float = 0.05):
+        self.windows = tuple(sorted({int(w) for w in windows}))
+        if not self.windows or self.windows[0] < 2:
+            raise ValueError("rolling windows must be at least 2 days")
+        self.risk_free_rate = risk_free_rate
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        k = len(self.windows)
+        self._ring = np.empty(self.windows[-1])  # last returns, enough for the longest window
+        self._n_returns = 0
+        self._n = [0] * k
+        self._mean = [0.0] * k
+        self._m2 = [0.0] * k
+        self.first_date = None
+        self.last_date = None
+        self.last_price = None
+        self.dates: List[pd.Timestamp] = []
+        self.prices: List[float] = []
+        self.volatility: Dict[int, List[float]] = {w: [] for w in self.windows}
+        self.sharpe: Dict[int, List[float]] = {w: [] for w in self.windows}
+
+    def update(self, date, price: float):
+        """Append one day; NaN or non-positive prices are skipped."""
+        if not price > 0:
+            return
+        if self.last_price is not None:
+            r = math.log(price / self.last_price)
+            size = len(self._ring)
+            for i, w in enumerate(self.windows):
+                mean = self._mean[i]
+                if self._n[i] < w:
+                    self._n[i] += 1
+                    self._mean[i] = mean + (r - mean) / self._n[i]
+                    self._m2[i] += (r - mean) * (r - self._mean[i])
+                else:
+                    old = self._ring[(self._n_returns - w) % size]
+                    self._mean[i] = mean + (r - old) / w
+                    self._m2[i] += (r - old) * (r - self._mean[i] + old - mean)
+            self._ring[self._n_returns % size] = r
+            self._n_returns += 1
+        else:
+            self.first_date = date
+
+        self.last_date = date
+        self.last_price = price
+        self.dates.append(date)
+        self.prices.append(price)
+        for i, w in enumerate(self.windows):
+            volatility = sharpe = np.nan
+            if self._n[i] == w:
+                volatility = math.sqrt(max(self._m2[i], 0.0) / (w - 1) * TRADING_DAYS)
+                if volatility > 0:
+                    sharpe = (self._mean[i] * TRADING_DAYS - self.risk_free_rate) / volatility
+            self.volatility[w].append(volatility)
+            self.sharpe[w].append(sharpe)
+
+    def extend(self, prices: pd.Series):
+        for date, price in zip(prices.index, prices.to_numpy(dtype=np.float64)):
+            self.update(date, price)
+
+    def sync(self, prices: pd.Series) -> bool:
+        """Append the days of prices after last_date.
+
+        False (state untouched) when prices does not continue this state:
+        it starts earlier, or the last fed day is missing or was revised.
+        """
+        prices = prices[prices > 0]
+        if self.last_date is not None:
+            if prices.empty or prices.index[0] < self.first_date:
+                return False
+            pos = prices.index.searchsorted(self.last_date)
+            if pos >= len(prices) or prices.index[pos] != self.last_date or prices.iloc[pos] != self.last_price:
+                return False
+            prices = prices.iloc[pos + 1:]
+        self.extend(prices)
+        return True
+
+    def underwater(self, start=None) -> np.ndarray:
+        """Drawdown of each day from start on, relative to the highest price since start."""
+        lo = 0 if start is None else bisect_left(self.dates, pd.Timestamp(start))
+        prices = np.asarray(self.prices[lo:], dtype=np.float64)
+        return prices / np.maximum.accumulate(prices) - 1 if len(prices) else prices
+
+    def series(self, start=None) -> Dict:
+        """Columns from start on (dates as ISO strings, NaN as None)."""
+        lo = 0 if start is None else bisect_left(self.dates, pd.Timestamp(start))
+
+        def column(values, digits: int) -> List[Optional[float]]:
+            return [_rounded(v, digits) for v in values[lo:]]
+
+        return {
+            'dates': [d.strftime('%Y-%m-%d') for d in self.dates[lo:]],
+            'drawdown': [_rounded(v, METRIC_DIGITS['max_drawdown']) for v in self.underwater(start)],
+            'volatility': {str(w): column(self.volatility[w], METRIC_DIGITS['volatility_annual']) for w in self.windows},
+            'sharpe': {str(w): column(self.sharpe[w], METRIC_DIGITS['sharpe_ratio']) for w in self.windows},
+        }
+
+    def __sizeof__(self) -> int:
+        # list slot + float object per value, for dates, prices and two columns per window
+        return object.__sizeof__(self) + self._ring.nbytes + len(self.dates) * 32 * (2 + 2 * len(self.windows))
+
 
 class RiskAnalytics:
-    _price_cache: Dict[str, pd.DataFrame] = {}
+    # ticker -> longest history loaded so far; each period is a slice of it
+    _price_cache = history_cache
+    # (ticker or holdings, windows, risk_free_rate) -> RollingRisk, appended as days arrive
+    _rolling_cache = get_cache('rolling_risk', max_entries=1024, max_bytes=64 * 2**20, ttl=None)
     
-    def __init__(self, risk_free_rate: float = 0.05):
+    def __init__(self, risk_free_rate: float = 0.05, store: Optional[MarketStore] = None,
+                 provider: Optional[MarketDataProvider] = None, benchmark: str = DEFAULT_BENCHMARK):
         self.risk_free_rate = risk_free_rate
+        self.benchmark = benchmark
+        self.store = store if store is not None else get_market_store()
+        self.provider = provider if provider is not None else get_provider()
     
     def _get_price_data(self, ticker: str, period: str = '1y') -> Optional[pd.DataFrame]:
-        cache_key = f"{ticker}_{period}"
-        if cache_key in self._price_cache:
-            return self._price_cache[cache_key]
         try:
-            stock = yf.Ticker(ticker)
-            df = stock.history(period=period)
-            if df.empty:
-                return None
-            self._price_cache[cache_key] = df
-            return df
-        except:
+            df = get_history(ticker, period, self.store, self.provider)
+        except Exception:
             return None
+        return None if df.empty else df
+    
+    def _metrics(self, ticker: str, period: str, with_benchmark: bool = False) -> Dict[str, Optional[float]]:
+        """All metrics for one ticker from a single pass over its closes.
+
+        The benchmark's closes are only fetched with_benchmark; otherwise beta is None.
+        """
+        metrics = self.get_risk_metrics_batch([ticker], period, with_benchmark)[ticker]
+        del metrics['ticker']
+        return metrics
     
     def calculate_volatility(self, ticker: str, period: str = '1y') -> Optional[float]:
-        df = self._get_price_data(ticker, period)
-        if df is None or len(df) < 20:
-            return None
-        returns = np.log(df['Close'] / df['Close'].shift(1)).dropna()
-        return round(float(returns.std() * np.sqrt(252)), 4)
+        return self._metrics(ticker, period)['volatility_annual']
     
     def calculate_max_drawdown(self, ticker: str, period: str = '1y') -> Optional[float]:
-        df = self._get_price_data(ticker, period)
-        if df is None or len(df) < 20:
-            return None
-        prices = df['Close']
-        rolling_max = prices.expanding().max()
-        drawdowns = (prices - rolling_max) / rolling_max
-        return round(float(drawdowns.min()), 4)
+        return self._metrics(ticker, period)['max_drawdown']
     
     def calculate_sharpe_ratio(self, ticker: str, period: str = '1y') -> Optional[float]:
-        df = self._get_price_data(ticker, period)
-        if df is None or len(df) < 20:
-            return None
-        returns = np.log(df['Close'] / df['Close'].shift(1)).dropna()
-        annual_return = returns.mean() * 252
-        annual_vol = returns.std() * np.sqrt(252)
-        if annual_vol == 0:
-            return None
-        return round(float((annual_return - self.risk_free_rate) / annual_vol), 2)
+        return self._metrics(ticker, period)['sharpe_ratio']
     
     def get_all_risk_metrics(self, ticker: str, period: str = '1y') -> Dict:
+        return {'ticker': ticker, **self._metrics(ticker, period, with_benchmark=True)}
+    
+    def get_price_matrix(self, tickers: List[str], period: str = '1y', max_workers: int = 8) -> pd.DataFrame:
+        """Closes aligned on the union of trading dates (dates × tickers, NaN where missing)."""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(executor.map(lambda t: self._get_price_data(t, period), tickers))
+        closes = {t: df['Close'] for t, df in zip(tickers, frames) if df is not None and 'Close' in df}
+        if not closes:
+            return pd.DataFrame(columns=tickers, dtype=np.float64)
+        matrix = pd.concat(closes, axis=1).sort_index()
+        return matrix.reindex(columns=tickers)
+    
+    def get_risk_metrics_batch(self, tickers: List[str], period: str = '1y',
+                               with_benchmark: bool = True) -> Dict[str, Dict]:
+        """get_all_risk_metrics for many tickers: one price matrix, one vectorized pass.
+
+        with_benchmark=False leaves the benchmark out of the matrix (beta is None).
+        """
+        columns = list(dict.fromkeys(tickers))
+        if with_benchmark and columns:
+            columns = list(dict.fromkeys(columns + [self.benchmark]))
+        prices = self.get_price_matrix(columns, period).to_numpy(dtype=np.float64)
+        benchmark = prices[:, columns.index(self.benchmark)] if with_benchmark and columns else None
+        metrics = risk_metrics_matrix(prices, self.risk_free_rate, benchmark=benchmark)
+        wanted = set(tickers)
+        return {
+            ticker: {'ticker': ticker, **{
+                name: _rounded(metrics[name][i], digits) for name, digits in METRIC_DIGITS.items()
+            }}
+            for i, ticker in enumerate(columns) if ticker in wanted
+        }
+    
+    def _rolling(self, key, prices: pd.Series, period: str, windows) -> Dict:
+        """Serve key's rolling series from its cached state, appending only new days."""
+        cache_key = (key, tuple(sorted({int(w) for w in windows})), self.risk_free_rate)
+        state = self._rolling_cache.get_or_load(cache_key, lambda: RollingRisk(windows, self.risk_free_rate))
+        with state.lock:
+            if not state.sync(prices):
+                state.reset()
+                state.sync(prices)
+            result = state.series(period_start(period))
+        self._rolling_cache.set(cache_key, state)  # re-account its grown size
+        return {'period': period, 'windows': list(state.windows), **result}
+    
+    @staticmethod
+    def _warmup_period(period: str, windows) -> str:
+        """A period reaching the longest window's worth of trading days before period starts.
+
+        Loading that much keeps the first rolling values of the period the same
+        whatever ladder rung happens to be cached.
+        """
+        warmup = math.ceil(max(int(w) for w in windows) * 365 / TRADING_DAYS) + 7
+        start = period_start(period) - timedelta(days=warmup)
+        if start <= period_start('max'):
+            return 'max'
+        return f"{(date.today() - start).days}d"
+
+    def _ladder_closes(self, ticker: str, period: str, windows=ROLLING_WINDOWS) -> Optional[pd.Series]:
+        """Closes of the ticker's whole ladder entry (a stable series to append to)."""
+        try:
+            entry = get_entry(ticker, self._warmup_period(period, windows), self.store, self.provider)
+        except Exception:
+            return None
+        return None if entry is None else entry.history['Close']
+    
+    def get_rolling_risk(self, ticker: str, period: str = '1y', windows=ROLLING_WINDOWS) -> Dict:
+        """Rolling volatility / Sharpe per window and the drawdown curve for one ticker."""
+        period_start(period)  # ValueError for an unsupported period
+        closes = self._ladder_closes(ticker, period, windows)
+        if closes is None:
+            return {'error': f'No price data for {ticker}'}
+        return {'ticker': ticker, **self._rolling(ticker, closes, period, windows)}
+    
+    def get_portfolio_rolling_risk(self, holdings: List[Tuple[str, float]], period: str = '1y',
+                                   windows=ROLLING_WINDOWS) -> Dict:
+        """Rolling series of a daily-rebalanced portfolio of (ticker, weight) holdings."""
+        period_start(period)
+        weights = {}
+        for ticker, weight in holdings:
+            weights[ticker] = weights.get(ticker, 0.0) + float(weight)
+        total = sum(weights.values())
+        if not weights or total <= 0:
+            return {'error': 'Portfolio weights must sum to a positive number'}
+        
+        closes = {ticker: self._ladder_closes(ticker, period, windows) for ticker in weights}
+        missing = [t for t, c in closes.items() if c is None]
+        if missing:
+            return {'error': f"No price data for {', '.join(missing)}"}
+        
+        # Days every holding traded; value starts at 1.0
+        matrix = pd.concat(closes, axis=1).dropna()
+        if matrix.empty:
+            return {'error': 'Holdings have no trading days in common'}
+        w = np.array([weights[t] for t in matrix.columns]) / total
+        prices = matrix.to_numpy(dtype=np.float64)
+        returns = prices[1:] / prices[:-1] - 1
+        values = pd.Series(np.concatenate([[1.0], np.cumprod(1 + returns @ w)]), index=matrix.index)
+        
+        key = tuple(sorted((t, round(wt / total, 6)) for t, wt in weights.items()))
         return {
-            'ticker': ticker,
-            'volatility_annual': self.calculate_volatility(ticker, period),
-            'max_drawdown': self.calculate_max_drawdown(ticker, period),
-            'sharpe_ratio': self.calculate_sharpe_ratio(ticker, period)
+            'holdings': [{'ticker': t, 'weight': wt} for t, wt in key],
+            **self._rolling(key, values, period, windows)
         }
@@ -0,0 +1,252 @@
+"""
+Shared In-Memory Cache
+- Thread-safe LRU bounded by entry count and (estimated) bytes
+- Per-entry TTL; expired entries read as misses and are dropped
+- Single-flight get_or_load: concurrent misses on one key run the loader once,
+  the other callers wait for its result
+- Hit / miss / load / eviction / expiration counters and memory in use
+- Named process-wide caches (get_cache) so analysis classes share one instance
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+_MISSING = object()
+
+
+def estimate_size(value) -> int:
+    """Approximate bytes held by a cached value."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class _Flight:
+    """One in-progress load that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """LRU + TTL cache; ttl=None means entries never expire."""
+
+    def __init__(
+        self,
+        name: str = 'cache',
+        max_entries: int = 512,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = 3600.0,
+        sizeof: Callable[[Any], int] = estimate_size,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._lock = threading.Lock()
+        # key -> (value, expires_at, size); most recently used last
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # ------------------------------------------------------------------
+    # Internals (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at, size = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key, value, ttl):
+        if key in self._entries:
+            self._remove(key)
+        ttl = self.ttl if ttl is None else ttl
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        self._entries[key] = (value, None if ttl is None else time.monotonic() + ttl, size)
+        self._bytes += size
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_load(
+        self,
+        key,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        cache_none: bool = False,
+        accept: Optional[Callable[[Any], bool]] = None,
+    ):
+        """Cached value for key, else loader() (run once however many threads miss at once).
+
+        A None result is handed to every waiter but only cached with
+        cache_none=True; an exception propagates to every waiter and is not cached.
+        A cached value failing accept(value) counts as a miss and is replaced by
+        the load; waiters get the in-flight result unchecked.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING and (accept is None or accept(value)):
+                self.hits += 1
+                return value
+            self.misses += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.load_errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.loads += 1
+                if flight.error is None and (flight.value is not None or cache_none):
+                    self._store(key, flight.value, ttl)
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries[key][0]
+            self._remove(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.loads = self.load_errors = self.evictions = self.expirations = 0
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return self._lookup(key) is not _MISSING
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'loads': self.loads,
+                'load_errors': self.load_errors,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+_caches: Dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, **kwargs) -> TTLCache:
+    """Process-wide cache called name; kwargs configure it on first use only."""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(name, **kwargs)
+        return _caches[name]
+
+
+def cache_stats() -> Dict[str, Dict]:
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def clear_caches():
+    """Empty every named cache and reset its counters."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.clear()
+        cache.reset_stats()
@@ -1,17 +1,115 @@
 """
 Dividend Portfolio Engine
 - Loads themes × tiers from dividend_plans.json
-- Applies constraints: ETF min, allowed/banned tags
+- Applies constraints: ETF min, single-stock max, sector cap, tag caps, allowed/banned tags
 - Supports multiple optimization modes
+- Shares one immutable engine snapshot per process (hot-reloaded on file change)
+- Caches target-independent portfolio plans; targets/FX/tax only rescale them
+- Precomputes the full theme × tier × mode catalog per snapshot
+- Sweeps target / FX / tax grids as broadcasts over one cached plan
+- Serves precomputed per-ticker analytics built from the same snapshot
 """
+import heapq
 import json
 import os
-from typing import Dict, List, Tuple
+import threading
+import time
+import concurrent.futures
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 import logging
+import numpy as np
+
+from .ticker_analytics import ANALYTICS_FILE, load_analytics, snapshot_id_of
+from .universe import (
+    TagIndex, UniverseColumns, load_universe_snapshot, normalize_yield,
+    records_from_snapshot, snapshot_meta
+)
 
 logger = logging.getLogger(__name__)
 
 OPTIMIZE_MODES = ['greedy', 'risk_parity', 'mean_variance', 'max_sharpe', 'min_vol']
+# Modes PortfolioOptimizer.optimize solves; the others are always served by greedy
+OPTIMIZER_MODES = ['risk_parity', 'max_sharpe']
+TIERS = ['defensive', 'balanced', 'aggressive']
+
+# Greedy allocator sizing
+ETF_SLICE = 0.25     # max weight of a single ETF
+MIN_WEIGHT = 0.03    # smallest position worth holding
+WEIGHT_EPS = 1e-9
+
+MAX_SWEEP_CELLS = 10000
+# Seconds a greedy fallback plan stands in for a failed optimizer run before the watcher retries it
+FALLBACK_PLAN_TTL = 300
+
+# Files a snapshot is built from, relative to data_dir
+SOURCE_FILES = [
+    os.path.join('config', 'dividend_plans.json'),
+    os.path.join('config', 'tags.json'),
+    os.path.join('data', 'universe_seed.json'),
+    os.path.join('data', 'dividend_universe.json'),
+    os.path.join('data', 'dividend_universe.npz'),
+    os.path.join('data', ANALYTICS_FILE),
+]
+
+
+class PortfolioPlan(NamedTuple):
+    """Target-independent part of a portfolio, sized for 1 USD of capital."""
+    symbols: List[str]
+    rows: np.ndarray
+    weights: np.ndarray
+    portfolio_yield: float
+    unit_shares: np.ndarray  # shares held per 1 USD of capital
+    unit_flow: np.ndarray    # pre-tax USD paid per month per 1 USD of capital
+    method: str              # mode that produced the weights ('greedy' on fallback)
+    cash_weight: float = 0.0 # capital the constraints left unallocated (yields nothing)
+
+
+class SharedReturns:
+    """Daily returns for a union of tickers, fetched once and sliced per candidate set.
+
+    Slices (aligned returns + annualized covariance) are memoized so every
+    optimize mode run on the same candidates reuses one covariance matrix.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._slices: Dict[Tuple[str, ...], Optional[Tuple]] = {}
+
+    @classmethod
+    def fetch(cls, tickers: List[str], max_workers: int = 10) -> 'SharedReturns':
+        import pandas as pd
+        from .analysis.portfolio_optimizer import PortfolioOptimizer
+        optimizer = PortfolioOptimizer()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(optimizer._get_returns, tickers))
+        series = {t: r for t, r in zip(tickers, results) if r is not None}
+        return cls(pd.DataFrame(series) if series else None)
+
+    def slice(self, tickers: List[str]) -> Optional[Tuple]:
+        """(returns_df, cov_matrix) for tickers, or None with fewer than 2 series."""
+        key = tuple(tickers)
+        if key not in self._slices:
+            value = None
+            if self.frame is not None:
+                available = [t for t in tickers if t in self.frame.columns]
+                if len(available) >= 2:
+                    returns_df = self.frame[available].dropna()
+                    value = (returns_df, returns_df.cov() * 252)
+            self._slices[key] = value
+        return self._slices[key]
+
+
+def source_signature(data_dir: str) -> Tuple:
+    """(file, mtime_ns, size) for every source file; missing files map to None."""
+    signature = []
+    for rel_path in SOURCE_FILES:
+        try:
+            st = os.stat(os.path.join(data_dir, rel_path))
+            signature.append((rel_path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append((rel_path, None, None))
+    return tuple(signature)
 
 
 class DividendEngine:
@@ -19,6 +117,8 @@ class DividendEngine:
         self.data_dir = data_dir
         self.config_dir = os.path.join(data_dir, 'config')
         self.data_subdir = os.path.join(data_dir, 'data')
+        # Taken before loading so a file written mid-load triggers another reload
+        self.version = source_signature(data_dir)
         
         # Load configuration
         self.plans = self._load_json(os.path.join(self.config_dir, 'dividend_plans.json'))
@@ -26,8 +126,22 @@ class DividendEngine:
         
         # Load universe data
         self.universe_seed = self._load_json(os.path.join(self.data_subdir, 'universe_seed.json'))
-        self.dividend_data = self._load_dividend_data()
         self.symbol_tags = self._build_symbol_tags()
+        self._dividend_data: Optional[Dict] = None
+        self._snapshot: Optional[Dict[str, np.ndarray]] = None
+        self.universe_meta: Dict = {}
+        self.columns = self._load_universe()
+        self.tag_index = TagIndex(self.columns, self.symbol_tags, self.tags_def.keys())
+        self.analytics = load_analytics(os.path.join(self.data_subdir, ANALYTICS_FILE), snapshot_id_of(self.universe_meta))
+        # (theme_id, tier_id) -> eligible universe rows
+        self._eligible_cache: Dict[Tuple[str, str], np.ndarray] = {}
+        # (theme_id, tier_id, optimize_mode, version) -> PortfolioPlan
+        self._plan_cache: Dict[Tuple, PortfolioPlan] = {}
+        # plan key -> monotonic deadline, for plans whose optimizer fell back to greedy
+        self._fallback_expiry: Dict[Tuple, float] = {}
+        self._plan_locks: Dict[Tuple, threading.Lock] = {}
+        self._plan_locks_guard = threading.Lock()
+        self.catalog_report: Optional[Dict] = None
 
     def _load_json(self, path: str) -> Dict:
         if not os.path.exists(path):
@@ -35,6 +149,34 @@ class DividendEngine:
         with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
 
+    def _load_universe(self) -> UniverseColumns:
+        """Columns from the binary snapshot when it is current, else from JSON."""
+        json_path = os.path.join(self.data_subdir, 'dividend_universe.json')
+        snapshot_path = os.path.join(self.data_subdir, 'dividend_universe.npz')
+        if os.path.exists(snapshot_path) and (
+            not os.path.exists(json_path)
+            or os.path.getmtime(snapshot_path) >= os.path.getmtime(json_path)
+        ):
+            try:
+                arrays = load_universe_snapshot(snapshot_path)
+                if arrays is not None:
+                    self._snapshot = arrays
+                    self.universe_meta = snapshot_meta(arrays)
+                    return UniverseColumns.from_snapshot(arrays, self.symbol_tags)
+            except Exception as e:
+                logger.warning(f"Binary snapshot unreadable, falling back to JSON: {e}")
+        
+        self._dividend_data = self._load_dividend_data()
+        self.universe_meta = self._dividend_data.get('_meta', {})
+        return UniverseColumns.from_records(self._dividend_data, self.symbol_tags)
+
+    @property
+    def dividend_data(self) -> Dict:
+        """Per-ticker dicts; rebuilt lazily when the engine loaded the binary snapshot."""
+        if self._dividend_data is None:
+            self._dividend_data = records_from_snapshot(self._snapshot) if self._snapshot is not None else {}
+        return self._dividend_data
+
     def _load_dividend_data(self) -> Dict:
         path = os.path.join(self.data_subdir, 'dividend_universe.json')
         if not os.path.exists(path):
@@ -45,11 +187,16 @@ class DividendEngine:
         for ticker, stock in data.items():
             if ticker.startswith('_'):
                 continue
-            y = stock.get("yield", 0) or 0
-            if y > 1:
-                stock["yield"] = y / 100.0
+            stock["yield"] = normalize_yield(stock.get("yield"))
         return data
 
+    def get_analytics(self, ticker: str, section: str) -> Optional[Dict]:
+        """Precomputed 'risk' or 'sustainability' metrics for ticker (a copy), or None."""
+        entry = self.analytics.get(ticker.upper())
+        if not entry or ticker.startswith('_') or entry.get(section) is None:
+            return None
+        return dict(entry[section])
+
     def _build_symbol_tags(self) -> Dict[str, List[str]]:
         mapping = {}
         if isinstance(self.universe_seed, list):
@@ -65,97 +212,368 @@ class DividendEngine:
         return mapping
 
     def _filter_universe(self, allowed_tags: List[str], banned_tags: List[str]) -> List[str]:
-        eligible = []
-        for symbol, tags in self.symbol_tags.items():
-            if any(t in tags for t in banned_tags):
-                continue
-            if any(t in tags for t in allowed_tags):
-                if symbol in self.dividend_data:
-                    eligible.append(symbol)
-        return eligible
+        mask = self.tag_index.eligible(allowed_tags, banned_tags)
+        return self.columns.tickers[mask].tolist()
+
+    def _eligible_rows(self, theme_id: str, tier_id: str, tier_config: Dict) -> np.ndarray:
+        """Eligible universe rows for a tier, memoized per (theme, tier)."""
+        key = (theme_id, tier_id)
+        rows = self._eligible_cache.get(key)
+        if rows is None:
+            mask = self.tag_index.eligible(
+                tier_config.get('allowed_tags', []), tier_config.get('banned_tags', [])
+            )
+            rows = np.flatnonzero(mask)
+            rows.setflags(write=False)
+            self._eligible_cache[key] = rows
+        return rows
+
+    def _optimizer_candidates(self, eligible_rows: np.ndarray) -> List[str]:
+        """Top 50 positive-yield tickers handed to the optimizer."""
+        cols = self.columns
+        return cols.tickers[cols.by_yield(eligible_rows)[:50]].tolist()
 
     def _select_portfolio(
         self,
-        eligible_symbols: List[str],
+        eligible_rows: np.ndarray,
         constraints: Dict,
-        target_capital_usd: float,
-        optimize_mode: str = 'greedy'
-    ) -> List[Tuple[str, float]]:
-        """Select portfolio using specified optimization mode."""
+        optimize_mode: str = 'greedy',
+        shared_returns: Optional[SharedReturns] = None
+    ) -> Tuple[List[Tuple[str, float]], str]:
+        """Select portfolio using specified optimization mode.
+
+        Returns (weights, method actually used).
+        """
         
-        # Try advanced optimization if not greedy
-        if optimize_mode != 'greedy' and optimize_mode in OPTIMIZE_MODES:
+        # Try advanced optimization where the optimizer has a solver for the mode
+        if optimize_mode in OPTIMIZER_MODES:
             try:
-                from .portfolio_optimizer import PortfolioOptimizer
+                from .analysis.portfolio_optimizer import PortfolioOptimizer
                 optimizer = PortfolioOptimizer()
-                valid_symbols = [
-                    s for s in eligible_symbols 
-                    if self.dividend_data.get(s, {}).get('yield', 0) > 0
-                ]
                 # Fallback to top N liquid/high-yield for optimization to save time
-                valid_symbols = sorted(valid_symbols, key=lambda s: self.dividend_data.get(s, {}).get('yield', 0), reverse=True)[:50]
+                valid_symbols = self._optimizer_candidates(eligible_rows)
 
                 if len(valid_symbols) >= 3:
-                    optimized = optimizer.optimize(
-                        tickers=valid_symbols,
-                        method=optimize_mode,
-                        constraints=constraints
-                    )
-                    if optimized:
-                        return optimized
+                    inputs = (None, None)
+                    if shared_returns is not None:
+                        inputs = shared_returns.slice(valid_symbols)
+                    if inputs is not None:
+                        optimized = optimizer.optimize(
+                            tickers=valid_symbols,
+                            method=optimize_mode,
+                            constraints=constraints,
+                            returns_df=inputs[0],
+                            cov_matrix=inputs[1]
+                        )
+                        if optimized:
+                            return optimized, optimize_mode
             except Exception as e:
                 logger.error(f"Optimization failed: {e}")
         
         # Fallback: Greedy approach
+        rows, weights = self._greedy_allocate(eligible_rows, constraints)
+        
+        # A short fill stays short: scaling it up would break the caps it honored
+        total_weight = weights.sum()
+        if len(rows) == 0 or total_weight <= 0:
+            return [], 'greedy'
+        if total_weight < 1.0 - WEIGHT_EPS:
+            logger.warning(
+                f"Greedy fill reached {total_weight:.1%} under constraints; "
+                f"leaving {1.0 - total_weight:.1%} in cash"
+            )
+        
+        return list(zip(self.columns.tickers[rows].tolist(), weights.tolist())), 'greedy'
+
+    def _greedy_allocate(
+        self, eligible_rows: np.ndarray, constraints: Dict
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Highest-yield-first allocation honoring every declared tier constraint.
+
+        Candidates come off a heap keyed on yield. ETFs are taken first (in
+        ETF_SLICE steps) until etf_min is met, then stocks and the remaining ETFs
+        fill the rest. Each position is capped by single_stock_max (ETF_SLICE for
+        ETFs), the headroom left in its sector under sector_cap, and the headroom
+        left in every capped tag it carries under max_tag_weight. ETFs are exempt
+        from sector_cap since their 'ETF' sector is a wrapper, not an industry.
+        A remainder too small for a new position tops up held ones. Running
+        per-sector / per-tag totals keep this O(n + k log n) for k picks.
+        """
+        cols = self.columns
         etf_min = constraints.get('etf_min', 0.5)
         single_stock_max = constraints.get('single_stock_max', 0.10)
+        sector_cap = constraints.get('sector_cap', 1.0)
+        tag_caps = [
+            (self.tag_index.masks[tag], cap, tag)
+            for tag, cap in constraints.get('max_tag_weight', {}).items()
+            if tag in self.tag_index.masks
+        ]
         
-        etfs = []
-        stocks = []
-        for symbol in eligible_symbols:
-            data = self.dividend_data.get(symbol, {})
-            div_yield = data.get('yield', 0) or 0
-            if div_yield <= 0:
-                continue
-            is_etf = 'etf' in self.symbol_tags.get(symbol, [])
-            if is_etf:
-                etfs.append((symbol, div_yield))
+        sector_weight = np.zeros(len(cols.sector_names), dtype=np.float64)
+        tag_weight = {tag: 0.0 for _, _, tag in tag_caps}
+        
+        def headroom(row: int, held: float = 0.0) -> float:
+            if cols.is_etf[row]:
+                room = ETF_SLICE - held
             else:
-                stocks.append((symbol, div_yield))
+                room = min(single_stock_max - held, sector_cap - sector_weight[cols.sector[row]])
+            for mask, cap, tag in tag_caps:
+                if mask[row]:
+                    room = min(room, cap - tag_weight[tag])
+            return room
         
-        etfs.sort(key=lambda x: x[1], reverse=True)
-        stocks.sort(key=lambda x: x[1], reverse=True)
+        def take(row: int, weight: float, position: Optional[int] = None):
+            if position is None:
+                picked_rows.append(row)
+                picked_weights.append(weight)
+            else:
+                picked_weights[position] += weight
+            if not cols.is_etf[row]:
+                sector_weight[cols.sector[row]] += weight
+            for mask, _, tag in tag_caps:
+                if mask[row]:
+                    tag_weight[tag] += weight
         
-        portfolio = []
-        total_weight = 0.0
-        etf_weight = 0.0
+        candidates = eligible_rows[cols.dividend_yield[eligible_rows] > 0]
+        # (-yield, position, row): position keeps ties in universe order
+        entries = list(zip(
+            (-cols.dividend_yield[candidates]).tolist(), range(len(candidates)), candidates.tolist()
+        ))
+        is_etf = cols.is_etf[candidates].tolist()
+        etf_heap = [e for e, etf in zip(entries, is_etf) if etf]
+        rest_heap = [e for e, etf in zip(entries, is_etf) if not etf]
+        heapq.heapify(etf_heap)
         
-        # Add ETFs first
-        for symbol, div_yield in etfs:
-            if etf_weight >= etf_min:
-                break
-            weight = min(0.25, etf_min - etf_weight)
-            portfolio.append((symbol, weight))
+        picked_rows: List[int] = []
+        picked_weights: List[float] = []
+        total = 0.0
+        
+        # Add ETFs first until etf_min is reached
+        etf_weight = 0.0
+        while etf_heap and etf_weight < etf_min - WEIGHT_EPS:
+            item = heapq.heappop(etf_heap)
+            weight = min(headroom(item[2]), etf_min - etf_weight)
+            if weight <= WEIGHT_EPS:
+                rest_heap.append(item)
+                continue
+            take(item[2], weight)
             etf_weight += weight
-            total_weight += weight
+            total += weight
+        
+        # Fill the remainder with stocks and unused ETFs
+        rest_heap.extend(etf_heap)
+        heapq.heapify(rest_heap)
+        while rest_heap and 1.0 - total >= MIN_WEIGHT - WEIGHT_EPS:
+            _, _, row = heapq.heappop(rest_heap)
+            weight = min(headroom(row), 1.0 - total)
+            if weight < MIN_WEIGHT - WEIGHT_EPS:
+                continue
+            take(row, weight)
+            total += weight
         
-        # Fill with stocks
-        remaining = 1.0 - total_weight
-        for symbol, div_yield in stocks[:10]:
-            if remaining <= 0:
+        # A remainder below MIN_WEIGHT tops up held positions in pick order
+        for position, row in enumerate(picked_rows):
+            if 1.0 - total <= WEIGHT_EPS:
                 break
-            weight = min(single_stock_max, remaining)
-            if weight >= 0.03:
-                portfolio.append((symbol, weight))
-                total_weight += weight
-                remaining = 1.0 - total_weight
+            weight = min(headroom(row, picked_weights[position]), 1.0 - total)
+            if weight > WEIGHT_EPS:
+                take(row, weight, position)
+                total += weight
         
-        # Normalize
-        if portfolio and total_weight > 0:
-            factor = 1.0 / total_weight
-            portfolio = [(s, w * factor) for s, w in portfolio]
+        return np.array(picked_rows, dtype=np.intp), np.array(picked_weights, dtype=np.float64)
+
+    def _get_plan(
+        self,
+        theme_id: str,
+        tier_id: str,
+        tier_config: Dict,
+        optimize_mode: str,
+        shared_returns: Optional[SharedReturns] = None
+    ):
+        """Cached PortfolioPlan for a tier, or an error message.
+
+        Weights depend only on (theme, tier, optimize_mode, universe version), so
+        concurrent misses on the same key wait for one build instead of repeating
+        the optimizer run.
+        """
+        key = (theme_id, tier_id, optimize_mode, self.version)
+        plan = self._plan_cache.get(key)
+        if plan is not None:
+            return plan
+        with self._plan_lock(key):
+            plan = self._plan_cache.get(key)
+            if plan is None:
+                plan = self._build_plan(
+                    theme_id, tier_id, tier_config, optimize_mode, shared_returns
+                )
+                if isinstance(plan, PortfolioPlan):
+                    self._store_plan(key, plan)
+        return plan
+
+    def _plan_lock(self, key: Tuple) -> threading.Lock:
+        with self._plan_locks_guard:
+            return self._plan_locks.setdefault(key, threading.Lock())
+
+    def _store_plan(self, key: Tuple, plan: PortfolioPlan):
+        """Cache plan; an optimizer mode served by greedy is due for a retry after FALLBACK_PLAN_TTL."""
+        optimize_mode = key[2]
+        if plan.method != optimize_mode and optimize_mode in OPTIMIZER_MODES:
+            self._fallback_expiry[key] = time.monotonic() + FALLBACK_PLAN_TTL
+        else:
+            self._fallback_expiry.pop(key, None)
+        self._plan_cache[key] = plan
+
+    def refresh_fallbacks(self) -> int:
+        """Re-run the optimizer for greedy fallbacks whose FALLBACK_PLAN_TTL ran out.
+
+        A fallback usually means a transient optimizer failure (e.g. a returns
+        fetch error), so it must not stand in for the requested mode for the
+        life of the snapshot. The retry runs on the shared engine's watcher
+        thread; requests keep getting the fallback until it succeeds. Returns
+        the number of plans retried.
+        """
+        now = time.monotonic()
+        due = [key for key, expiry in list(self._fallback_expiry.items()) if expiry <= now]
+        if not due:
+            return 0
+        tier_configs = {(theme_id, tier_id): cfg for theme_id, tier_id, cfg in self._tier_configs()}
+        for key in due:
+            theme_id, tier_id, optimize_mode, _ = key
+            with self._plan_lock(key):
+                try:
+                    plan = self._build_plan(
+                        theme_id, tier_id, tier_configs[(theme_id, tier_id)], optimize_mode
+                    )
+                except Exception as e:
+                    logger.error(f"Fallback retry failed for {theme_id}/{tier_id}/{optimize_mode}: {e}")
+                    plan = None
+                if isinstance(plan, PortfolioPlan):
+                    self._store_plan(key, plan)
+                else:
+                    # Keep serving the previous fallback and retry after another TTL
+                    self._fallback_expiry[key] = time.monotonic() + FALLBACK_PLAN_TTL
+        return len(due)
+
+    def _build_plan(
+        self,
+        theme_id: str,
+        tier_id: str,
+        tier_config: Dict,
+        optimize_mode: str,
+        shared_returns: Optional[SharedReturns] = None
+    ):
+        constraints = tier_config.get('constraints', {})
         
-        return portfolio
+        # Filter universe
+        eligible = self._eligible_rows(theme_id, tier_id, tier_config)
+        if len(eligible) == 0:
+            return "No eligible tickers"
+        
+        # Select portfolio
+        portfolio_weights, method = self._select_portfolio(
+            eligible, constraints, optimize_mode, shared_returns
+        )
+        if not portfolio_weights:
+            return "Could not construct portfolio"
+        
+        # Calculate portfolio yield
+        cols = self.columns
+        symbols = [s for s, _ in portfolio_weights]
+        rows = cols.rows(symbols)
+        weights = np.array([w for _, w in portfolio_weights], dtype=np.float64)
+        # Yield is per USD of capital, so an uninvested remainder dilutes it
+        portfolio_yield = float(cols.dividend_yield[rows] @ weights)
+        cash_weight = max(0.0, 1.0 - float(weights.sum()))
+        if cash_weight < WEIGHT_EPS:
+            cash_weight = 0.0
+        
+        if portfolio_yield <= 0:
+            return "Portfolio yield is zero"
+        
+        # Allocation and cash flow for 1 USD of capital
+        prices = cols.price[rows]
+        prices = np.where(prices != 0, prices, 1.0)
+        unit_shares = weights / prices
+        unit_flow = unit_shares @ cols.monthly_dividends[rows]
+        
+        for arr in (rows, weights, unit_shares, unit_flow):
+            arr.setflags(write=False)
+        return PortfolioPlan(
+            symbols, rows, weights, portfolio_yield, unit_shares, unit_flow, method, cash_weight
+        )
+
+    def _tier_configs(self) -> List[Tuple[str, str, Dict]]:
+        return [
+            (theme['id'], tier_id, tier_config)
+            for theme in self.plans.get('themes', [])
+            for tier_id, tier_config in theme.get('tiers', {}).items()
+        ]
+
+    def build_catalog(self, modes: Optional[List[str]] = None) -> Dict:
+        """Precompute plans for every theme × tier × mode combination.
+
+        Eligibility is memoized per tier, returns for the union of all optimizer
+        candidates are fetched once, and each candidate set's covariance is shared
+        by every mode. Plans land in the plan cache, so generate_portfolio serves
+        them with a rescale only. Returns (and stores) a generation report.
+        """
+        modes = modes or OPTIMIZE_MODES
+        started = time.perf_counter()
+        tiers = self._tier_configs()
+        
+        shared_returns = None
+        fetch_seconds = 0.0
+        if any(m in OPTIMIZER_MODES for m in modes):
+            union = set()
+            for theme_id, tier_id, tier_config in tiers:
+                union.update(self._optimizer_candidates(
+                    self._eligible_rows(theme_id, tier_id, tier_config)
+                ))
+            t0 = time.perf_counter()
+            shared_returns = SharedReturns.fetch(sorted(union))
+            fetch_seconds = time.perf_counter() - t0
+        
+        combos = {}
+        failures = []
+        for theme_id, tier_id, tier_config in tiers:
+            for mode in modes:
+                name = f"{theme_id}/{tier_id}/{mode}"
+                t0 = time.perf_counter()
+                try:
+                    plan = self._get_plan(theme_id, tier_id, tier_config, mode, shared_returns)
+                    error = plan if isinstance(plan, str) else None
+                except Exception as e:
+                    logger.error(f"Catalog build failed for {name}: {e}")
+                    plan, error = None, str(e)
+                entry = {'seconds': round(time.perf_counter() - t0, 4)}
+                if error:
+                    entry.update(status='error', error=error)
+                    failures.append({'combo': name, 'error': error})
+                else:
+                    entry.update(
+                        status='ok' if plan.method == mode else 'fallback',
+                        method=plan.method
+                    )
+                combos[name] = entry
+        
+        report = {
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'modes': list(modes),
+            'total_combos': len(combos),
+            'ok': sum(1 for c in combos.values() if c['status'] == 'ok'),
+            'fallback': sum(1 for c in combos.values() if c['status'] == 'fallback'),
+            'failed': len(failures),
+            'fetch_seconds': round(fetch_seconds, 4),
+            'total_seconds': round(time.perf_counter() - started, 4),
+            'combos': combos,
+            'failures': failures,
+        }
+        self.catalog_report = report
+        logger.info(
+            f"Catalog built: {report['ok']} ok, {report['fallback']} fallback, "
+            f"{report['failed']} failed in {report['total_seconds']}s"
+        )
+        return report
 
     def generate_portfolio(
         self,
@@ -164,16 +582,12 @@ class DividendEngine:
         target_monthly_krw: float = 1000000,
         fx_rate: float = 1420,
         tax_rate: float = 0.154,
-        optimize_mode: str = 'greedy'
+        optimize_mode: str = 'greedy',
+        shared_returns: Optional[SharedReturns] = None
     ) -> Dict:
         """Generate portfolio for given theme and tier."""
         
-        # Find theme
-        theme = None
-        for t in self.plans.get('themes', []):
-            if t['id'] == theme_id:
-                theme = t
-                break
+        theme = self._find_theme(theme_id)
         if not theme:
             return {"error": f"Theme '{theme_id}' not found"}
         
@@ -182,71 +596,37 @@ class DividendEngine:
             return {"error": f"Tier '{tier_id}' not found"}
         
         card_front = tier_config.get('card_front', {})
-        constraints = tier_config.get('constraints', {})
-        allowed_tags = tier_config.get('allowed_tags', [])
-        banned_tags = tier_config.get('banned_tags', [])
+        
+        plan = self._get_plan(theme_id, tier_id, tier_config, optimize_mode, shared_returns)
+        if isinstance(plan, str):
+            return {"error": plan}
         
         # Calculate targets
         target_monthly_usd = target_monthly_krw / fx_rate
         target_annual_usd_pretax = (target_monthly_usd * 12) / (1 - tax_rate)
         
-        # Filter universe
-        eligible = self._filter_universe(allowed_tags, banned_tags)
-        if not eligible:
-            return {"error": "No eligible tickers"}
-        
-        # Select portfolio
-        portfolio_weights = self._select_portfolio(
-            eligible, constraints, target_annual_usd_pretax, optimize_mode
-        )
-        if not portfolio_weights:
-            return {"error": "Could not construct portfolio"}
-        
-        # Calculate portfolio yield
-        portfolio_yield = 0.0
-        for symbol, weight in portfolio_weights:
-            data = self.dividend_data.get(symbol, {})
-            div_yield = data.get('yield', 0) or 0
-            portfolio_yield += div_yield * weight
-        
-        if portfolio_yield <= 0:
-            return {"error": "Portfolio yield is zero"}
+        # Rescale the unit-capital plan to the required capital
+        required_capital_usd = target_annual_usd_pretax / plan.portfolio_yield
+        amounts_usd = required_capital_usd * plan.weights
+        shares_all = required_capital_usd * plan.unit_shares
+        monthly_flow = required_capital_usd * plan.unit_flow
         
-        # Calculate required capital
-        required_capital_usd = target_annual_usd_pretax / portfolio_yield
-        
-        # Build allocation
+        cols = self.columns
         allocation = []
-        monthly_flow = [0.0] * 12
-        
-        for symbol, weight in portfolio_weights:
-            data = self.dividend_data.get(symbol, {})
-            amount_usd = required_capital_usd * weight
-            price = data.get('price', 1) or 1
-            shares = amount_usd / price
-            
-            # Calculate monthly cashflow
-            payments = data.get('payments', [])
-            if payments:
-                for p in payments:
-                    try:
-                        month = int(p['date'][5:7])
-                        monthly_flow[month - 1] += p['amount'] * shares
-                    except:
-                        pass
-            
+        for i, symbol in enumerate(plan.symbols):
+            row = plan.rows[i]
             allocation.append({
                 "ticker": symbol,
-                "name": data.get('name', symbol),
-                "weight": round(weight * 100, 1),
-                "shares": round(shares, 1),
-                "price": round(price, 2),
-                "yield": f"{(data.get('yield', 0) or 0) * 100:.2f}%",
-                "amount_usd": round(amount_usd, 2)
+                "name": cols.names[row],
+                "weight": round(float(plan.weights[i]) * 100, 1),
+                "shares": round(float(shares_all[i]), 1),
+                "price": round(float(cols.price[row] or 1), 2),
+                "yield": f"{cols.dividend_yield[row] * 100:.2f}%",
+                "amount_usd": round(float(amounts_usd[i]), 2)
             })
         
         # Apply tax and convert to KRW
-        monthly_flow_krw = [round(flow * (1 - tax_rate) * fx_rate) for flow in monthly_flow]
+        monthly_flow_krw = [round(flow * (1 - tax_rate) * fx_rate) for flow in monthly_flow.tolist()]
         
         return {
             "theme_id": theme_id,
@@ -256,25 +636,249 @@ class DividendEngine:
             "risk_label": card_front.get('risk_label', '중간'),
             "required_capital_krw": round(required_capital_usd * fx_rate),
             "expected_monthly_krw": round(sum(monthly_flow_krw) / 12),
-            "portfolio_yield": f"{portfolio_yield * 100:.2f}%",
+            "portfolio_yield": f"{plan.portfolio_yield * 100:.2f}%",
             "allocation": allocation,
+            "cash": {
+                "weight": round(plan.cash_weight * 100, 1),
+                "amount_usd": round(required_capital_usd * plan.cash_weight, 2)
+            },
+            "fully_invested": plan.cash_weight == 0.0,
             "chart_data": monthly_flow_krw,
-            "optimize_mode": optimize_mode
+            "optimize_mode": plan.method,
+            "requested_optimize_mode": optimize_mode
         }
 
+    def sweep(
+        self,
+        theme_id: str,
+        tier_id: str,
+        target_monthly_krw: Sequence[float] = (1000000,),
+        fx_rate: Sequence[float] = (1420,),
+        tax_rate: Sequence[float] = (0.154,),
+        optimize_mode: str = 'greedy'
+    ) -> Dict:
+        """Required capital and monthly KRW flow over a target × FX × tax grid.
+
+        Grids are indexed [target][fx][tax] (monthly flow adds a month axis) and
+        computed as NumPy broadcasts over one cached plan.
+        """
+        theme = self._find_theme(theme_id)
+        if not theme:
+            return {"error": f"Theme '{theme_id}' not found"}
+        tier_config = theme.get('tiers', {}).get(tier_id)
+        if not tier_config:
+            return {"error": f"Tier '{tier_id}' not found"}
+        
+        targets = np.asarray(target_monthly_krw, dtype=np.float64).reshape(-1)
+        fx_rates = np.asarray(fx_rate, dtype=np.float64).reshape(-1)
+        tax_rates = np.asarray(tax_rate, dtype=np.float64).reshape(-1)
+        cells = len(targets) * len(fx_rates) * len(tax_rates)
+        if cells == 0:
+            return {"error": "Empty sweep range"}
+        if cells > MAX_SWEEP_CELLS:
+            return {"error": f"Sweep grid too large ({cells} > {MAX_SWEEP_CELLS} cells)"}
+        if not all(np.isfinite(axis).all() for axis in (targets, fx_rates, tax_rates)):
+            return {"error": "Sweep values must be finite"}
+        if (targets < 0).any() or (fx_rates <= 0).any() or ((tax_rates < 0) | (tax_rates >= 1)).any():
+            return {"error": "Sweep requires target >= 0, fx_rate > 0 and 0 <= tax_rate < 1"}
+        
+        plan = self._get_plan(theme_id, tier_id, tier_config, optimize_mode)
+        if isinstance(plan, str):
+            return {"error": plan}
+        
+        target = targets[:, None, None]
+        fx = fx_rates[None, :, None]
+        after_tax = 1 - tax_rates[None, None, :]
+        
+        target_annual_usd_pretax = (target / fx * 12) / after_tax
+        required_capital_usd = target_annual_usd_pretax / plan.portfolio_yield
+        monthly_flow_krw = np.rint(
+            (required_capital_usd * after_tax * fx)[..., None] * plan.unit_flow
+        )
+        
+        return {
+            "theme_id": theme_id,
+            "tier_id": tier_id,
+            "optimize_mode": plan.method,
+            "requested_optimize_mode": optimize_mode,
+            "portfolio_yield": f"{plan.portfolio_yield * 100:.2f}%",
+            "cash_weight": round(plan.cash_weight * 100, 1),
+            "axes": {
+                "target_monthly_krw": targets.tolist(),
+                "fx_rate": fx_rates.tolist(),
+                "tax_rate": tax_rates.tolist()
+            },
+            "required_capital_usd": np.round(required_capital_usd, 2).tolist(),
+            "required_capital_krw": np.rint(required_capital_usd * fx).astype(np.int64).tolist(),
+            "expected_monthly_krw": np.rint(monthly_flow_krw.sum(axis=-1) / 12).astype(np.int64).tolist(),
+            "monthly_flow_krw": monthly_flow_krw.astype(np.int64).tolist()
+        }
+
+    def _find_theme(self, theme_id: str) -> Optional[Dict]:
+        for t in self.plans.get('themes', []):
+            if t['id'] == theme_id:
+                return t
+        return None
+
     def generate_all_tiers(self, theme_id: str, **kwargs) -> Dict:
-        """Generate all 3 tier portfolios for a theme."""
-        results = {}
-        for tier in ['defensive', 'balanced', 'aggressive']:
-            results[tier] = self.generate_portfolio(theme_id, tier, **kwargs)
-        return results
+        """Generate all 3 tier portfolios for a theme.
+
+        When optimizer plans are missing, returns for the union of the tiers'
+        candidates are fetched once and the tiers are optimized concurrently,
+        each slicing the shared matrix.
+        """
+        optimize_mode = kwargs.get('optimize_mode', 'greedy')
+        theme = self._find_theme(theme_id)
+        pending = []
+        if theme and optimize_mode in OPTIMIZER_MODES:
+            pending = [
+                tier for tier in TIERS
+                if tier in theme.get('tiers', {})
+                and (theme_id, tier, optimize_mode, self.version) not in self._plan_cache
+            ]
+        if not pending:
+            return {tier: self.generate_portfolio(theme_id, tier, **kwargs) for tier in TIERS}
+        
+        union = set()
+        for tier in pending:
+            union.update(self._optimizer_candidates(
+                self._eligible_rows(theme_id, tier, theme['tiers'][tier])
+            ))
+        shared_returns = SharedReturns.fetch(sorted(union))
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(TIERS)) as executor:
+            futures = {
+                tier: executor.submit(
+                    self.generate_portfolio, theme_id, tier, shared_returns=shared_returns, **kwargs
+                )
+                for tier in TIERS
+            }
+        return {tier: future.result() for tier, future in futures.items()}
 
     def get_themes(self) -> Dict:
         """Get list of available themes."""
         return {
             "themes": self.plans.get('themes', []),
             "meta": {
-                "total_tickers": len(self.dividend_data),
-                "last_updated": self.dividend_data.get('_meta', {}).get('last_updated', 'N/A')
+                "total_tickers": len(self.columns),
+                "last_updated": self.universe_meta.get('last_updated', 'N/A')
             }
         }
+
+
+class SharedEngine:
+    """Process-wide DividendEngine snapshot.
+
+    Requests read the current snapshot without locking. A daemon thread polls
+    the source files' mtimes and, when they change, builds a new engine off the
+    request path and swaps the reference in one assignment: in-flight requests
+    keep the old snapshot, new requests get the new one. The same thread retries
+    the optimizer for expired greedy fallbacks, so requests never run it.
+    """
+
+    def __init__(
+        self,
+        data_dir: str = 'us_market/dividend',
+        poll_interval: float = 5.0,
+        precompute_modes: Optional[List[str]] = None
+    ):
+        self.data_dir = data_dir
+        self.poll_interval = poll_interval
+        # When set, each new snapshot builds its catalog before it is published
+        self.precompute_modes = precompute_modes
+        self._engine: Optional[DividendEngine] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def get(self) -> DividendEngine:
+        engine = self._engine
+        if engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = self._build()
+                engine = self._engine
+            self.start()
+        return engine
+
+    def reload_if_changed(self) -> bool:
+        """Rebuild the snapshot if any source file changed. Returns True on swap."""
+        current = self._engine
+        if current is not None and source_signature(self.data_dir) == current.version:
+            return False
+        with self._lock:
+            current = self._engine
+            if current is not None and source_signature(self.data_dir) == current.version:
+                return False
+            new_engine = self._build()
+            self._engine = new_engine
+        logger.info(f"Dividend engine snapshot reloaded ({len(new_engine.columns)} tickers)")
+        return True
+
+    def _build(self) -> DividendEngine:
+        engine = DividendEngine(self.data_dir)
+        if self.precompute_modes:
+            engine.build_catalog(self.precompute_modes)
+        return engine
+
+    def prime(self):
+        """Build the first snapshot (and its catalog) on a background thread.
+
+        Lets app startup return at once while the first request finds the
+        catalog already built, or waits on the build in progress.
+        """
+        threading.Thread(target=self._prime, name='dividend-engine-build', daemon=True).start()
+
+    def _prime(self):
+        try:
+            self.get()
+        except Exception as e:
+            # get() retries on the next call
+            logger.error(f"Dividend engine startup build failed: {e}")
+
+    def start(self):
+        """Start the background mtime watcher (idempotent)."""
+        if self.poll_interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name='dividend-engine-watcher', daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                # Keep serving the previous snapshot
+                logger.error(f"Dividend engine reload failed: {e}")
+            engine = self._engine
+            if engine is not None:
+                engine.refresh_fallbacks()
+
+
+_shared_engines: Dict[str, SharedEngine] = {}
+_shared_lock = threading.Lock()
+
+
+def configure_engine(data_dir: str = 'us_market/dividend', **kwargs) -> SharedEngine:
+    """Register the shared engine for data_dir with explicit options (before first use)."""
+    with _shared_lock:
+        previous = _shared_engines.get(data_dir)
+        if previous is not None:
+            previous.stop()
+        shared = _shared_engines[data_dir] = SharedEngine(data_dir, **kwargs)
+    return shared
+
+
+def get_engine(data_dir: str = 'us_market/dividend') -> DividendEngine:
+    """Current shared engine snapshot for data_dir."""
+    shared = _shared_engines.get(data_dir)
+    if shared is None:
+        with _shared_lock:
+            shared = _shared_engines.setdefault(data_dir, SharedEngine(data_dir))
+    return shared.get()
@@ -0,0 +1,204 @@
+"""
+Fetch Control for the Loader
+- Token-bucket rate limiter shared by all worker threads
+- Retries with exponential backoff and full jitter for throttling / network errors
+- AIMD concurrency: +1 slot per window of successes, halved on throttling
+- Per-run stats: requests, retries, throttles, effective rps, failures by cause
+"""
+from collections import Counter
+from typing import Callable, Dict, Optional
+import random
+import threading
+import time
+
+# Failure causes reported in stats
+RATE_LIMITED = 'rate_limited'
+NETWORK = 'network'
+ERROR = 'error'
+NO_DIVIDENDS = 'no_dividends'
+
+RETRYABLE = (RATE_LIMITED, NETWORK)
+
+
+class FetchError(Exception):
+    """A fetch that failed for good (non-retryable, or retries exhausted)."""
+
+    def __init__(self, cause: str, error: Exception):
+        super().__init__(f"{cause}: {error}")
+        self.cause = cause
+        self.error = error
+
+
+def classify_error(error: Exception) -> str:
+    """Map an exception to a failure cause (rate_limited / network / error)."""
+    name = type(error).__name__
+    message = str(error).lower()
+    if name == 'YFRateLimitError' or '429' in message or 'too many requests' in message or 'rate limit' in message:
+        return RATE_LIMITED
+    if isinstance(error, (ConnectionError, TimeoutError)) or 'Timeout' in name or 'Connection' in name:
+        return NETWORK
+    return ERROR
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """AIMD in-flight limit, used as a context manager around each request.
+
+    Every success adds 1/limit (about +1 per window of `limit` successes);
+    throttling halves the limit, at most once per `cooldown` seconds so one
+    burst of 429s counts as a single congestion signal.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 32, cooldown: float = 1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cooldown = cooldown
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.peak = int(self.limit)
+        self.in_flight = 0
+        self._last_decrease = float('-inf')
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+        return False
+
+    def on_success(self):
+        with self._cond:
+            before = int(self.limit)
+            self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            self.peak = max(self.peak, int(self.limit))
+            if int(self.limit) > before:
+                self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(float(self.minimum), self.limit / 2)
+                self._last_decrease = now
+
+
+class FetchStats:
+    """Thread-safe counters for one fetch run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.requests = 0
+        self.retries = 0
+        self.throttles = 0
+        self.failures: Dict[str, str] = {}
+
+    def add(self, field: str, n: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def record_failure(self, key: str, cause: str):
+        with self._lock:
+            self.failures[key] = cause
+
+    def as_dict(self, concurrency: Optional[AdaptiveConcurrency] = None) -> Dict:
+        elapsed = time.monotonic() - self.started
+        with self._lock:
+            report = {
+                'requests': self.requests,
+                'retries': self.retries,
+                'throttles': self.throttles,
+                'elapsed_seconds': round(elapsed, 3),
+                'effective_rps': round(self.requests / elapsed, 2) if elapsed > 0 else 0.0,
+                'failures_by_cause': dict(Counter(self.failures.values())),
+            }
+        if concurrency is not None:
+            report['concurrency'] = {'final': int(concurrency.limit), 'peak': concurrency.peak}
+        return report
+
+
+class FetchController:
+    """Rate limit + AIMD gate + retry loop around a fetch callable.
+
+    `cost` is the number of upstream requests one call makes (tokens taken
+    from the bucket). rate=None disables rate limiting.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = 10.0,
+        burst: Optional[float] = None,
+        initial_concurrency: int = 8,
+        max_concurrency: int = 32,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, maximum=max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = FetchStats()
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform(0, min(max_delay, base_delay * 2**attempt))."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, fn: Callable, *args, cost: float = 1.0):
+        """Run fn(*args); retry throttling / network errors, raise FetchError when done trying."""
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire(cost)
+            with self.concurrency:
+                self.stats.add('requests', int(cost))
+                try:
+                    result = fn(*args)
+                except Exception as e:
+                    error, cause = e, classify_error(e)
+                else:
+                    self.concurrency.on_success()
+                    return result
+
+            if cause == RATE_LIMITED:
+                self.stats.add('throttles')
+                self.concurrency.on_throttle()
+            if cause not in RETRYABLE or attempt >= self.max_retries:
+                raise FetchError(cause, error)
+            self.stats.add('retries')
+            time.sleep(self.backoff(attempt))
+            attempt += 1
+
+    def report(self) -> Dict:
+        return self.stats.as_dict(self.concurrency)
@@ -0,0 +1,152 @@
+"""
+Shared HTTP Session
+- One process-wide session for every market-data request, so keep-alive
+  connections (and their TLS sessions) are reused across request bursts
+- curl_cffi with browser impersonation (what yfinance itself prefers) when
+  installed, else requests with a bounded, blocking HTTPAdapter pool; either
+  way at most pool_size requests are in flight process-wide
+- Connection stats: requests, newly opened connections, reuse ratio,
+  TLS handshakes
+"""
+from typing import Dict, Optional
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from curl_cffi import CurlInfo, CurlOpt
+    from curl_cffi import requests as curl_requests
+except ImportError:  # plain requests backend
+    curl_requests = None
+
+# Connections per host; matches the loader's MAX_WORKERS ceiling
+POOL_SIZE = 32
+# Distinct hosts kept pooled (Yahoo spreads calls over a few query/cookie hosts)
+POOL_HOSTS = 8
+# curl_cffi keeps one handle per thread; each caches at most this many idle connections
+CURL_MAX_CONNECTS = 4
+
+
+class ConnectionStats:
+    """Thread-safe counters; every request either opened a connection or reused one."""
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    def record(self, new_connections: int, tls_handshake: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.new_connections += new_connections
+            self.tls_handshakes += int(tls_handshake)
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                'backend': self.backend,
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused': reused,
+                'reuse_ratio': round(reused / self.requests, 3) if self.requests else 0.0,
+                'tls_handshakes': self.tls_handshakes,
+            }
+
+
+if curl_requests is not None:
+    class CurlSession(curl_requests.Session):
+        """curl_cffi session that reports per-request connection reuse.
+
+        curl_cffi pools per thread handle, so a semaphore shared by every
+        thread bounds the requests in flight (and the connections in use) to
+        pool_size, like PooledSession's blocking pool. Idle connections are
+        still cached per handle, up to max_connects each.
+        """
+
+        def __init__(self, pool_size: int = POOL_SIZE, max_connects: int = CURL_MAX_CONNECTS):
+            super().__init__(
+                impersonate='chrome',
+                curl_infos=[CurlInfo.NUM_CONNECTS, CurlInfo.APPCONNECT_TIME],
+                curl_options={CurlOpt.MAXCONNECTS: min(max_connects, pool_size)},
+            )
+            self.stats = ConnectionStats('curl_cffi')
+            self._slots = threading.BoundedSemaphore(pool_size)
+
+        def request(self, *args, **kwargs):
+            with self._slots:
+                response = super().request(*args, **kwargs)
+            infos = response.infos
+            self.stats.record(int(infos.get(CurlInfo.NUM_CONNECTS) or 0),
+                              (infos.get(CurlInfo.APPCONNECT_TIME) or 0) > 0)
+            return response
+
+
+class PooledSession(requests.Session):
+    """requests session over one bounded pool per host.
+
+    pool_block=True makes extra threads wait for a free connection instead of
+    opening throwaway ones. A response hook marks each pooled connection on
+    first use, so later responses on it count as reused.
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE, hosts: int = POOL_HOSTS):
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=pool_size, pool_block=True)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self.headers['User-Agent'] = (
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+            '(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
+        )
+        self.stats = ConnectionStats('requests')
+        self.hooks['response'].append(self._count)
+
+    def _count(self, response, **kwargs):
+        conn = getattr(response.raw, 'connection', None)
+        if conn is None:
+            self.stats.record(1, response.url.startswith('https'))
+            return
+        fresh = not getattr(conn, '_pool_seen', False)
+        conn._pool_seen = True
+        self.stats.record(int(fresh), fresh and response.url.startswith('https'))
+
+
+def new_session(pool_size: int = POOL_SIZE, backend: Optional[str] = None):
+    """curl_cffi session when available (or backend='curl_cffi'), else PooledSession."""
+    if backend is None:
+        backend = 'curl_cffi' if curl_requests is not None else 'requests'
+    if backend == 'curl_cffi':
+        if curl_requests is None:
+            raise ImportError("curl_cffi is not installed")
+        return CurlSession(pool_size)
+    return PooledSession(pool_size)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide session, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
+
+
+def set_session(session):
+    """Replace the process-wide session (None creates a new one on next use)."""
+    global _session
+    with _session_lock:
+        _session = session
+
+
+def session_stats() -> Optional[Dict]:
+    """Connection stats of the process-wide session, or None before its first use."""
+    with _session_lock:
+        return _session.stats.as_dict() if _session is not None else None
@@ -1,144 +1,535 @@
 """
 Dividend Data Loader
-Fetches dividend data from yfinance and saves to JSON.
+Fetches dividend data (yfinance by default, via providers.py) and saves to JSON.
 - yield: stored as decimal (e.g., 0.055 for 5.5%)
 - payments: array of {date, amount} for accurate monthly cashflow
 - Uses threading for concurrent fetching
+- Also writes dividend_universe.npz, a binary columnar snapshot for the engine
+- Incremental mode refetches only stale tickers (age / expected next ex-date)
+- Bulk mode downloads closes + dividend actions in batches (provider.download)
+- Requests go through a rate-limited, retrying, AIMD-concurrency controller
+  (fetch_control.py); per-run stats land in _meta['fetch_stats'], with
+  HTTP connection reuse of the shared session (http_session.py) under 'connections'
+- Results stream to fetch_journal.jsonl as they finish; an interrupted run
+  resumes from it, and outputs are published with atomic renames
+- After ingestion an analytics stage precomputes risk and sustainability
+  metrics per ticker into dividend_analytics.json (ticker_analytics.py),
+  versioned by the snapshot_id in _meta
 """
-import yfinance as yf
 import pandas as pd
 import json
 import os
 import logging
+import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
 import concurrent.futures
 from tqdm import tqdm
 
+from .fetch_control import FetchController, FetchError, RATE_LIMITED, NETWORK, ERROR, NO_DIVIDENDS
+from .providers import (
+    MarketDataProvider, RecordingProvider, ReplayProvider, YFinanceProvider, get_provider
+)
+from .storage import FetchJournal, atomic_write_json
+from .ticker_analytics import ANALYTICS_FILE, build_analytics, load_analytics, snapshot_id_of, write_analytics
+from .universe import write_universe_snapshot
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Expected days between ex-dates per payment cadence
+CADENCE_DAYS = {
+    'Monthly': 30,
+    'Quarterly': 91,
+    'Semi-Annual/Annual': 182,
+    'Unknown': 365,
+}
+EX_DATE_GRACE_DAYS = 3
+
+# Trailing window of dividend history kept per ticker
+HISTORY_DAYS = 370
+# Tickers per batch download call in bulk mode
+DOWNLOAD_BATCH_SIZE = 50
+# Fields only available from the per-ticker .info endpoint
+META_FIELDS = ('name', 'sector', 'currency')
+# Upstream requests per second across all workers (None disables limiting)
+DEFAULT_RATE_LIMIT = 10.0
+# Upper bound for the adaptive in-flight limit
+MAX_WORKERS = 32
+
+
+def load_seed_tickers(data_dir: str) -> List[str]:
+    """Tickers of universe_seed.json in data_dir, in seed order."""
+    seed_file = os.path.join(data_dir, 'universe_seed.json')
+    if not os.path.exists(seed_file):
+        logger.warning("⚠️ universe_seed.json not found. Using fallback list.")
+        return ['SCHD', 'JEPI', 'JEPQ', 'DGRO', 'O', 'KO', 'PEP', 'JNJ']
+    try:
+        with open(seed_file, 'r', encoding='utf-8') as f:
+            seed_data = json.load(f)
+        if isinstance(seed_data, list):
+            tickers = [item.get('symbol') for item in seed_data if item.get('symbol')]
+        else:
+            tickers = list(seed_data.keys())
+        logger.info(f"📋 Loaded {len(tickers)} tickers from {seed_file}")
+        return tickers
+    except Exception as e:
+        logger.error(f"Failed to load universe_seed.json: {e}")
+        return []
+
+
 class DividendDataLoader:
-    def __init__(self, data_dir: str = 'us_market/dividend/data'):
+    def __init__(self, data_dir: str = 'us_market/dividend/data',
+                 rate_limit: Optional[float] = DEFAULT_RATE_LIMIT, max_workers: int = MAX_WORKERS,
+                 provider: Optional[MarketDataProvider] = None, analytics: bool = True,
+                 tickers: Optional[List[str]] = None):
         self.data_dir = data_dir
         os.makedirs(data_dir, exist_ok=True)
+        self.provider = provider if provider is not None else get_provider()
+        self.rate_limit = rate_limit
+        self.max_workers = max_workers
+        self.analytics = analytics
+        self.controller = self._new_controller()
+        self.last_run_stats: Optional[Dict] = None
         
-        # Load universe seed
-        seed_file = os.path.join(data_dir, 'universe_seed.json')
-        if os.path.exists(seed_file):
-            try:
-                with open(seed_file, 'r', encoding='utf-8') as f:
-                    seed_data = json.load(f)
-                    if isinstance(seed_data, list):
-                        self.tickers = [item.get('symbol') for item in seed_data if item.get('symbol')]
-                    else:
-                        self.tickers = list(seed_data.keys())
-                logger.info(f"📋 Loaded {len(self.tickers)} tickers from {seed_file}")
-            except Exception as e:
-                logger.error(f"Failed to load universe_seed.json: {e}")
-                self.tickers = []
-        else:
-            logger.warning("⚠️ universe_seed.json not found. Using fallback list.")
-            self.tickers = ['SCHD', 'JEPI', 'JEPQ', 'DGRO', 'O', 'KO', 'PEP', 'JNJ']
+        # Load universe seed (unless given the tickers, e.g. one shard of it)
+        self.tickers = list(tickers) if tickers is not None else load_seed_tickers(data_dir)
+
+    def _new_controller(self) -> FetchController:
+        return FetchController(rate=self.rate_limit, max_concurrency=self.max_workers)
 
     def fetch_ticker_data(self, ticker: str) -> Optional[Dict]:
-        """Fetch data for a single ticker (Thread-safe)"""
+        """Fetch data for a single ticker (Thread-safe)
+
+        Throttling and network errors are retried by the controller. Returns
+        None when the ticker pays no dividends or the fetch failed for good;
+        either way the cause is recorded in the run stats.
+        """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            record = self.controller.call(self._fetch_ticker, ticker, cost=2)
+        except FetchError as e:
+            logger.error(f"❌ Error fetching {ticker}: {e}")
+            self.controller.stats.record_failure(ticker, e.cause)
+            return None
+        if record is None:
+            self.controller.stats.record_failure(ticker, NO_DIVIDENDS)
+        return record
 
-            # Get price
-            price = info.get('currentPrice') or info.get('regularMarketPreviousClose') or 0
-            if price is None:
-                price = 0
+    def _fetch_ticker(self, ticker: str) -> Optional[Dict]:
+        """One attempt: .info + .dividends (two requests). Raises on errors."""
+        info = self.provider.info(ticker)
 
-            # Get dividend history (last 12+ months)
-            hist = stock.dividends
-            if hist.empty:
-                # logger.warning(f"⚠️ {ticker}: No dividend history")
-                return None
+        # Get price
+        price = info.get('currentPrice') or info.get('regularMarketPreviousClose') or 0
+        if price is None:
+            price = 0
 
-            # Make timezone-naive for comparison
+        return self._build_record(ticker, price, self.provider.dividends(ticker), self._meta_from_info(ticker, info))
+
+    @staticmethod
+    def _build_record(ticker: str, price: float, hist: pd.Series, meta: Dict) -> Optional[Dict]:
+        """Universe entry from a price, a dividend history and name/sector/currency."""
+        # Get dividend history (last 12+ months)
+        hist = hist[hist > 0]
+        if hist.empty:
+            # logger.warning(f"⚠️ {ticker}: No dividend history")
+            return None
+
+        # Make timezone-naive for comparison
+        if hist.index.tz is not None:
             hist.index = hist.index.tz_localize(None)
-            one_year_ago = pd.Timestamp.now() - pd.Timedelta(days=370)
-            recent_divs = hist[hist.index > one_year_ago]
-
-            # Calculate trailing 12-month yield (decimal)
-            ttm_div = float(recent_divs.sum()) if not recent_divs.empty else 0.0
-            div_yield = (ttm_div / price) if price > 0 else 0.0
-
-            # Determine frequency
-            frequency = len(recent_divs)
-            if frequency >= 10:
-                freq_str = "Monthly"
-            elif frequency >= 3:
-                freq_str = "Quarterly"
-            elif frequency >= 1:
-                freq_str = "Semi-Annual/Annual"
+        one_year_ago = pd.Timestamp.now() - pd.Timedelta(days=HISTORY_DAYS)
+        recent_divs = hist[hist.index > one_year_ago]
+
+        # Calculate trailing 12-month yield (decimal)
+        ttm_div = float(recent_divs.sum()) if not recent_divs.empty else 0.0
+        div_yield = (ttm_div / price) if price > 0 else 0.0
+
+        # Determine frequency
+        frequency = len(recent_divs)
+        if frequency >= 10:
+            freq_str = "Monthly"
+        elif frequency >= 3:
+            freq_str = "Quarterly"
+        elif frequency >= 1:
+            freq_str = "Semi-Annual/Annual"
+        else:
+            freq_str = "Unknown"
+
+        # Build payments array [{date, amount}]
+        payments = []
+        for dt, amt in recent_divs.items():
+            payments.append({
+                "date": dt.strftime("%Y-%m-%d"),
+                "amount": float(amt)
+            })
+
+        # Last Payout Amount
+        last_amount = float(recent_divs.iloc[-1]) if not recent_divs.empty else 0
+
+        return {
+            'ticker': ticker,
+            'name': meta.get('name', ticker),
+            'sector': meta.get('sector', 'ETF'),
+            'price': float(price),
+            'yield': div_yield,
+            'ttm_dividend': ttm_div,
+            'frequency': freq_str,
+            'last_div': last_amount,
+            'payments': payments,
+            'currency': meta.get('currency', 'USD')
+        }
+
+    @staticmethod
+    def _meta_from_info(ticker: str, info: Dict) -> Dict:
+        return {
+            'name': info.get('shortName', ticker),
+            'sector': info.get('sector', 'ETF'),
+            'currency': info.get('currency', 'USD'),
+        }
+
+    def _fetch_meta(self, ticker: str) -> Dict:
+        """Name/sector/currency from .info — the fields a bulk download can't carry."""
+        return self._meta_from_info(ticker, self.provider.info(ticker))
+
+    def fetch_batch(self, tickers: List[str], known: Optional[Dict] = None) -> List[Optional[Dict]]:
+        """Fetch closes and dividend actions for a batch in one download call.
+
+        Price is the last daily close. Name/sector/currency come from `known`
+        (usually the previous universe) and only fall back to a per-ticker
+        .info request when missing. If the download itself fails, the batch
+        falls back to fetch_ticker_data. So do tickers the frame has no closes
+        for: a bulk download drops throttled and failed tickers silently, so
+        only the per-ticker path can tell them apart from a lack of data.
+        """
+        known = known or {}
+        start = (pd.Timestamp.now() - pd.Timedelta(days=HISTORY_DAYS + 5)).strftime('%Y-%m-%d')
+        try:
+            frame = self.controller.call(self.provider.download, tickers, start)
+        except FetchError as e:
+            logger.error(f"❌ Batch download failed ({len(tickers)} tickers): {e}")
+            return [self.fetch_ticker_data(t) for t in tickers]
+
+        # Split the frame per ticker; keep only tickers with a close and dividend actions
+        series = {}
+        for ticker in tickers:
+            if isinstance(frame.columns, pd.MultiIndex):
+                if ticker not in frame.columns.get_level_values(0):
+                    continue
+                sub = frame[ticker]
+            else:
+                sub = frame
+            if 'Close' not in sub or 'Dividends' not in sub:
+                continue
+            closes = sub['Close'].dropna()
+            if not closes.empty:
+                series[ticker] = (float(closes.iloc[-1]), sub['Dividends'].fillna(0))
+        absent = [t for t in tickers if t not in series]
+        if absent:
+            logger.warning(f"⚠️ {len(absent)} tickers missing from batch download; fetching individually")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                refetched = dict(zip(absent, executor.map(self.fetch_ticker_data, absent)))
+
+        metas = {}
+        missing = []
+        for ticker in series:
+            entry = known.get(ticker) or {}
+            if all(entry.get(k) for k in META_FIELDS):
+                metas[ticker] = {k: entry[k] for k in META_FIELDS}
             else:
-                freq_str = "Unknown"
-
-            # Build payments array [{date, amount}]
-            payments = []
-            for dt, amt in recent_divs.items():
-                payments.append({
-                    "date": dt.strftime("%Y-%m-%d"),
-                    "amount": float(amt)
-                })
-
-            # Last Payout Amount
-            last_amount = float(recent_divs.iloc[-1]) if not recent_divs.empty else 0
-
-            return {
-                'ticker': ticker,
-                'name': info.get('shortName', ticker),
-                'sector': info.get('sector', 'ETF'),
-                'price': float(price),
-                'yield': div_yield,
-                'ttm_dividend': ttm_div,
-                'frequency': freq_str,
-                'last_div': last_amount,
-                'payments': payments,
-                'currency': info.get('currency', 'USD')
+                missing.append(ticker)
+        if missing:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self.controller.call, self._fetch_meta, t): t for t in missing}
+                for future in concurrent.futures.as_completed(futures):
+                    ticker = futures[future]
+                    try:
+                        metas[ticker] = future.result()
+                    except FetchError as e:
+                        logger.error(f"❌ Error fetching {ticker} info: {e}")
+                        self.controller.stats.record_failure(ticker, e.cause)
+
+        results = []
+        for ticker in tickers:
+            if ticker not in series:
+                results.append(refetched[ticker])
+                continue
+            if ticker not in metas:
+                results.append(None)
+                continue
+            price, dividends = series[ticker]
+            record = self._build_record(ticker, price, dividends, metas[ticker])
+            if record is None:
+                self.controller.stats.record_failure(ticker, NO_DIVIDENDS)
+            results.append(record)
+        return results
+
+    def _iter_fetch(self, tickers: List[str], bulk: bool = False, batch_size: int = DOWNLOAD_BATCH_SIZE,
+                    known: Optional[Dict] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """Yield (ticker, record) as fetches finish.
+
+        At most 2 × max_workers tickers are submitted at a time, so pending
+        results stay bounded however large the universe is.
+        """
+        if bulk:
+            batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+            for batch in tqdm(batches, unit="batch"):
+                yield from zip(batch, self.fetch_batch(batch, known))
+            return
+        # Pool sized for the AIMD ceiling; the controller gates how many run at once
+        pending = iter(tickers)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor, \
+                tqdm(total=len(tickers), unit="ticker") as progress:
+            futures = {executor.submit(self.fetch_ticker_data, t): t for t in islice(pending, 2 * self.max_workers)}
+            while futures:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in [f for f in futures if f in done]:
+                    ticker = futures.pop(future)
+                    progress.update(1)
+                    yield ticker, future.result()
+                for t in islice(pending, len(done)):
+                    futures[executor.submit(self.fetch_ticker_data, t)] = t
+
+    def _load_universe(self) -> Dict:
+        output_file = os.path.join(self.data_dir, 'dividend_universe.json')
+        if not os.path.exists(output_file):
+            return {}
+        with open(output_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load_fetch_state(self) -> Dict:
+        state_file = os.path.join(self.data_dir, 'fetch_state.json')
+        if not os.path.exists(state_file):
+            return {}
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_fetch_state(self, state: Dict):
+        state_file = os.path.join(self.data_dir, 'fetch_state.json')
+        atomic_write_json(state_file, state, ensure_ascii=False, indent=2, sort_keys=True)
+
+    def is_stale(self, ticker: str, state: Dict, now: datetime, max_age_days: float = 7) -> bool:
+        """Refetch if never fetched, older than max_age_days, or a new ex-date is due.
+
+        The next ex-date is expected one cadence interval (from the ticker's
+        payment frequency) after the last one seen, less a few days of grace.
+        """
+        entry = state.get(ticker)
+        if not entry or not entry.get('fetched_at'):
+            return True
+        fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        if now - fetched_at > timedelta(days=max_age_days):
+            return True
+        last_ex_date = entry.get('last_ex_date')
+        if last_ex_date:
+            cadence = CADENCE_DAYS.get(entry.get('frequency'), CADENCE_DAYS['Unknown'])
+            next_ex_date = datetime.fromisoformat(last_ex_date) + timedelta(days=cadence - EX_DATE_GRACE_DAYS)
+            if fetched_at < next_ex_date <= now:
+                return True
+        return False
+
+    def fetch_data(self, incremental: bool = False, max_age_days: float = 7,
+                   bulk: bool = False, batch_size: int = DOWNLOAD_BATCH_SIZE, resume: bool = True) -> Dict:
+        """Fetch dividend data concurrently and save to JSON.
+
+        With incremental=True only stale tickers (see is_stale) are fetched and
+        merged into the existing universe; a failed refetch keeps the previous
+        entry. A full refresh also keeps the previous entry when a ticker failed
+        on throttling or errors (as opposed to paying no dividends). Per-ticker
+        fetch times and ex-date watermarks live in
+        fetch_state.json.
+
+        With bulk=True tickers are downloaded batch_size at a time (see
+        fetch_batch), reusing names/sectors/currencies from the existing
+        universe. Request stats for the run are kept in last_run_stats.
+
+        Each finished ticker is appended to fetch_journal.jsonl. If a previous
+        run died before publishing and started within max_age_days, resume=True
+        skips the tickers it already settled. Memory: fetch results in flight
+        are bounded by the worker window, but the previous universe is loaded
+        whole (it is one JSON document) and the merged universe is built in
+        full for the snapshot writers; journaled records replace old entries
+        in place, so each ticker is held once. The JSON, state and snapshot are
+        replaced atomically, then the journal is removed. Unless the loader was
+        built with analytics=False, write_analytics then precomputes per-ticker
+        metrics for the new snapshot, reusing the previous snapshot's metrics
+        for tickers that were not refetched.
+        """
+        now = datetime.now()
+        self.controller = self._new_controller()
+        state = self._load_fetch_state()
+        existing = self._load_universe()
+        if incremental and existing:
+            tickers = [t for t in self.tickers if self.is_stale(t, state, now, max_age_days)]
+            logger.info(f"💰 Incremental refresh: {len(tickers)}/{len(self.tickers)} tickers stale")
+        else:
+            tickers = self.tickers
+            logger.info(f"💰 Fetching dividend data for {len(tickers)} tickers...")
+
+        journal = FetchJournal(os.path.join(self.data_dir, 'fetch_journal.jsonl'))
+        started_at = journal.started_at()
+        resume = resume and started_at is not None and now - started_at <= timedelta(days=max_age_days)
+        journal.start(now, resume)
+        if resume:
+            settled = {
+                e['ticker'] for e in journal.results()
+                if 'record' in e or e.get('cause') == NO_DIVIDENDS
             }
+            tickers = [t for t in tickers if t not in settled]
+            logger.info(f"♻️ Resuming run started {started_at}: {len(settled)} tickers already journaled")
 
-        except Exception as e:
-            logger.error(f"❌ Error fetching {ticker}: {e}")
-            return None
+        try:
+            for ticker, record in self._iter_fetch(tickers, bulk, batch_size, existing):
+                cause = None if record else self.controller.stats.failures.get(ticker)
+                journal.append(ticker, datetime.now(), record, cause)
+        finally:
+            journal.close()
 
-    def fetch_data(self) -> Dict:
-        """Fetch dividend data concurrently and save to JSON"""
-        logger.info(f"💰 Fetching dividend data for {len(self.tickers)} tickers...")
-        data_map = {}
-        
-        # ThreadPoolExecutor for concurrency
-        max_workers = 10
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Create a progress bar
-            results = list(tqdm(executor.map(self.fetch_ticker_data, self.tickers), total=len(self.tickers), unit="ticker"))
-
-        # Process results
-        success_count = 0
-        for res in results:
+        previous_snapshot = snapshot_id_of(existing.get('_meta', {}))
+
+        # Replay the journal (including any resumed part of the run) straight
+        # into the previous universe: each fresh record replaces the old entry
+        # as it streams in, so only one copy per ticker is ever held
+        refreshed = set()
+        failures = {}
+        for entry in journal.results():
+            ticker = entry['ticker']
+            res = entry.get('record')
             if res:
-                data_map[res['ticker']] = res
-                success_count += 1
+                existing[ticker] = res
+                refreshed.add(ticker)
+                failures.pop(ticker, None)
+                payments = res.get('payments') or []
+                state[ticker] = {
+                    'fetched_at': entry['fetched_at'],
+                    'last_ex_date': payments[-1]['date'] if payments else None,
+                    'frequency': res.get('frequency', 'Unknown'),
+                }
+            elif ticker not in refreshed:
+                failures[ticker] = entry.get('cause')
+        success_count = len(refreshed)
+        
+        # Keep seed order; an old entry survives an incremental run or a failed refetch
+        data_map = {}
+        for ticker in self.tickers:
+            entry = existing.pop(ticker, None)
+            if entry and (ticker in refreshed or incremental or failures.get(ticker) in (RATE_LIMITED, NETWORK, ERROR)):
+                data_map[ticker] = entry
+        existing.clear()
+        self.last_run_stats = self.controller.report()
+        connections = self.provider.connection_stats()
+        if connections is not None:
+            # Process-wide counters of the shared session
+            self.last_run_stats['connections'] = connections
         
         # Add Metadata
         data_map['_meta'] = {
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'snapshot_id': f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}",
+            'last_updated': now.strftime('%Y-%m-%d %H:%M:%S'),
             'total_tickers': len(data_map),
+            'refreshed_tickers': success_count,
+            'fetch_stats': self.last_run_stats,
         }
 
         # Save to JSON
         output_file = os.path.join(self.data_dir, 'dividend_universe.json')
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data_map, f, ensure_ascii=False, indent=2)
+        atomic_write_json(output_file, data_map, ensure_ascii=False, indent=2)
+        self._save_fetch_state({t: v for t, v in state.items() if t in data_map})
 
-        logger.info(f"💾 Saved {success_count} tickers to {output_file}")
+        logger.info(f"💾 Saved {len(data_map) - 1} tickers ({success_count} refreshed) to {output_file}")
+        logger.info(f"📊 Fetch stats: {self.last_run_stats}")
+        self.write_snapshot(data_map)
+        journal.discard()
+        if self.analytics:
+            # Entries that were not refetched keep the analytics built for them
+            previous = load_analytics(os.path.join(self.data_dir, ANALYTICS_FILE), previous_snapshot)
+            self.write_analytics(data_map, {
+                t: v for t, v in previous.items()
+                if t in data_map and not t.startswith('_') and t not in refreshed
+            })
+        return data_map
+
+    def write_snapshot(self, data_map: Dict):
+        """Write the binary columnar snapshot the engine loads first."""
+        snapshot_file = os.path.join(self.data_dir, 'dividend_universe.npz')
+        write_universe_snapshot(snapshot_file, data_map)
+        logger.info(f"💾 Saved binary snapshot to {snapshot_file}")
+
+    def write_analytics(self, data_map: Dict, precomputed: Optional[Dict] = None) -> Dict:
+        """Precompute risk / sustainability metrics for every ticker in data_map.
+
+        Runs through the fetch controller (price history, info and dividends:
+        at most three requests per ticker, fewer when the market store has them).
+        Tickers already in `precomputed` (e.g. from shard partials) are reused.
+        """
+        precomputed = precomputed or {}
+        tickers = [t for t in data_map if not t.startswith('_')]
+        missing = [t for t in tickers if t not in precomputed]
+        logger.info(f"📈 Computing analytics for {len(missing)} tickers ({len(tickers) - len(missing)} reused)...")
+        analytics = build_analytics(
+            missing, snapshot_id_of(data_map.get('_meta', {})), provider=self.provider,
+            max_workers=self.max_workers, call=lambda fn, *args: self.controller.call(fn, *args, cost=3)
+        )
+        analytics.update({t: precomputed[t] for t in tickers if t in precomputed})
+        analytics['_meta']['tickers'] = len(analytics) - 1
+        analytics['_meta']['reused'] = len(tickers) - len(missing)
+        analytics_file = os.path.join(self.data_dir, ANALYTICS_FILE)
+        write_analytics(analytics_file, analytics)
+        logger.info(f"💾 Saved analytics for {analytics['_meta']['tickers']} tickers to {analytics_file}")
+        return analytics
+
+    def rebuild_analytics(self) -> Dict:
+        """Recompute analytics for the existing universe without refetching it."""
+        return self.write_analytics(self._load_universe())
+
+    def rebuild_snapshot(self) -> Dict:
+        """Regenerate the binary snapshot from the existing JSON without fetching."""
+        output_file = os.path.join(self.data_dir, 'dividend_universe.json')
+        with open(output_file, 'r', encoding='utf-8') as f:
+            data_map = json.load(f)
+        self.write_snapshot(data_map)
         return data_map
 
 
 if __name__ == "__main__":
-    loader = DividendDataLoader()
-    loader.fetch_data()
+    # Run as a module: python -m us_market.dividend.loader
+    import argparse
+    parser = argparse.ArgumentParser(description="Fetch the dividend universe")
+    parser.add_argument('--snapshot-only', action='store_true',
+                        help="rebuild dividend_universe.npz from the existing JSON")
+    parser.add_argument('--incremental', action='store_true',
+                        help="refetch only stale tickers and merge into the existing universe")
+    parser.add_argument('--max-age-days', type=float, default=7,
+                        help="refetch tickers older than this in incremental mode")
+    parser.add_argument('--bulk', action='store_true',
+                        help="download prices and dividends in batches instead of per ticker")
+    parser.add_argument('--batch-size', type=int, default=DOWNLOAD_BATCH_SIZE,
+                        help="tickers per batch download in bulk mode")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="ignore the journal of an interrupted run and start over")
+    parser.add_argument('--skip-analytics', action='store_true',
+                        help="do not precompute per-ticker analytics after fetching")
+    parser.add_argument('--analytics-only', action='store_true',
+                        help="recompute dividend_analytics.json for the existing universe")
+    parser.add_argument('--record', metavar='DIR',
+                        help="save every provider response under DIR")
+    parser.add_argument('--replay', metavar='DIR',
+                        help="serve responses recorded under DIR instead of calling yfinance")
+    parser.add_argument('--replay-latency', type=float, default=0.0,
+                        help="seconds of latency injected per replayed call")
+    args = parser.parse_args()
+
+    provider = None
+    if args.replay:
+        provider = ReplayProvider(args.replay, latency=args.replay_latency)
+    elif args.record:
+        provider = RecordingProvider(YFinanceProvider(), args.record)
+    loader = DividendDataLoader(provider=provider, analytics=not args.skip_analytics)
+    if args.snapshot_only:
+        loader.rebuild_snapshot()
+    elif args.analytics_only:
+        loader.rebuild_analytics()
+    else:
+        loader.fetch_data(incremental=args.incremental, max_age_days=args.max_age_days,
+                          bulk=args.bulk, batch_size=args.batch_size, resume=not args.no_resume)
@@ -0,0 +1,325 @@
+"""
+Local Market Data Store
+- One directory per ticker with fixed-width binary record files:
+  prices.bin (date, open, high, low, close, volume) and dividends.bin (date, amount)
+- Records are date-sorted; range reads memory-map the file and binary-search the dates
+- Daily updates fetch only the new tail (the last stored bar may be rewritten,
+  since an intraday fetch leaves a partial bar) and merge it in by rewriting
+  the record file: O(file) per update, a few hundred KB for decades of daily
+  bars. Every write replaces the file atomically, so lock-free readers keep
+  a consistent mapping
+- coverage.json records which date range has been fetched, so a read inside
+  it never goes to the network
+- Shared by backtest, optimizer, risk and dividend analysis; the caller supplies
+  the remote fetch used on a miss
+"""
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Callable, Dict, Optional
+import json
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .storage import atomic_write, atomic_write_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = 'us_market/dividend/data/market'
+
+PRICE_DTYPE = np.dtype([
+    ('date', '<M8[D]'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+DIVIDEND_DTYPE = np.dtype([('date', '<M8[D]'), ('amount', '<f8')])
+
+# Record field -> yfinance history column
+PRICE_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+# Dividend histories are refetched whole, at most this often
+DIVIDEND_MAX_AGE_DAYS = 1
+
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+def period_start(period: str, today: Optional[date] = None) -> date:
+    """First calendar day of a yfinance-style period ('5d', '6mo', '1y', 'ytd', 'max')."""
+    today = today or date.today()
+    if period == 'ytd':
+        return date(today.year, 1, 1)
+    if period == 'max':
+        return date(1970, 1, 1)
+    match = _PERIOD_RE.match(period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    offset = {
+        'd': pd.DateOffset(days=n),
+        'wk': pd.DateOffset(weeks=n),
+        'mo': pd.DateOffset(months=n),
+        'y': pd.DateOffset(years=n),
+    }[unit]
+    return (pd.Timestamp(today) - offset).date()
+
+
+def _as_date(value) -> date:
+    return pd.Timestamp(value).date()
+
+
+def _naive_days(index: pd.Index) -> np.ndarray:
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize().values.astype('datetime64[D]')
+
+
+def _dedupe(records: np.ndarray) -> np.ndarray:
+    """Sort by date; on duplicate dates keep the last record."""
+    records = records[np.argsort(records['date'], kind='stable')]
+    if len(records) > 1:
+        keep = np.append(records['date'][1:] != records['date'][:-1], True)
+        records = records[keep]
+    return records
+
+
+def history_to_records(df: pd.DataFrame) -> np.ndarray:
+    records = np.zeros(len(df), dtype=PRICE_DTYPE)
+    records['date'] = _naive_days(df.index)
+    for field, column in PRICE_COLUMNS.items():
+        records[field] = df[column].to_numpy(dtype=np.float64) if column in df else np.nan
+    return _dedupe(records)
+
+
+def dividends_to_records(series: pd.Series) -> np.ndarray:
+    records = np.zeros(len(series), dtype=DIVIDEND_DTYPE)
+    records['date'] = _naive_days(series.index)
+    records['amount'] = series.to_numpy(dtype=np.float64)
+    return _dedupe(records)
+
+
+def records_to_history(records: np.ndarray) -> pd.DataFrame:
+    index = pd.DatetimeIndex(np.asarray(records['date']).astype('datetime64[ns]'))
+    return pd.DataFrame(
+        {column: np.array(records[field]) for field, column in PRICE_COLUMNS.items()},
+        index=index
+    )
+
+
+def records_to_dividends(records: np.ndarray) -> pd.Series:
+    index = pd.DatetimeIndex(np.asarray(records['date']).astype('datetime64[ns]'))
+    return pd.Series(np.array(records['amount']), index=index, name='Dividends')
+
+
+class MarketStore:
+    """Per-ticker OHLCV and dividend histories on disk.
+
+    get_history / get_dividends take a `fetch` callable for misses:
+    fetch(start, end) -> history DataFrame (yfinance columns, end exclusive)
+    and fetch() -> dividend Series.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = root
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, ticker: str) -> str:
+        return os.path.join(self.root, ticker.replace('/', '_').replace(os.sep, '_'))
+
+    def _path(self, ticker: str, name: str) -> str:
+        return os.path.join(self._dir(ticker), name)
+
+    @contextmanager
+    def _locked(self, ticker: str):
+        """Serialize writers of one ticker (threads, and processes where flock exists)."""
+        with self._locks_guard:
+            lock = self._locks.setdefault(ticker, threading.Lock())
+        with lock:
+            os.makedirs(self._dir(ticker), exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(self._path(ticker, '.lock'), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Raw record files
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _read(path: str, dtype: np.dtype) -> np.ndarray:
+        """Memory-mapped records (empty array if the file is missing or empty)."""
+        if not os.path.exists(path) or os.path.getsize(path) < dtype.itemsize:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(os.path.getsize(path) // dtype.itemsize,))
+
+    @classmethod
+    def _write_merged(cls, path: str, records: np.ndarray):
+        """Rewrite the file as the stored records before records' first date, then records.
+
+        The whole file is rewritten (O(file), not an append) to a new file
+        renamed over the old one, never truncated in place: readers map files
+        without the lock, and shrinking a mapped file under them would fault
+        (SIGBUS) on the cut pages.
+        """
+        if len(records) == 0:
+            return
+        stored = cls._read(path, records.dtype)
+        cut = int(np.searchsorted(stored['date'], records['date'][0], side='left'))
+        with atomic_write(path, 'wb') as f:
+            f.write(stored[:cut].tobytes())
+            f.write(records.tobytes())
+        del stored
+
+    def read_range(self, path: str, dtype: np.dtype, start=None, end=None) -> np.ndarray:
+        """Records with start <= date <= end, copied out of the map."""
+        records = self._read(path, dtype)
+        lo = 0 if start is None else int(np.searchsorted(records['date'], np.datetime64(_as_date(start), 'D'), 'left'))
+        hi = len(records) if end is None else int(np.searchsorted(records['date'], np.datetime64(_as_date(end), 'D'), 'right'))
+        return np.array(records[lo:hi])
+
+    def coverage(self, ticker: str) -> Dict:
+        path = self._path(ticker, 'coverage.json')
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_coverage(self, ticker: str, coverage: Dict):
+        atomic_write_json(self._path(ticker, 'coverage.json'), coverage, indent=2, sort_keys=True)
+
+    # ------------------------------------------------------------------
+    # Prices
+    # ------------------------------------------------------------------
+
+    def get_history(
+        self,
+        ticker: str,
+        start,
+        end=None,
+        fetch: Optional[Callable[[str, str], pd.DataFrame]] = None
+    ) -> pd.DataFrame:
+        """Daily OHLCV for [start, end] (end defaults to today).
+
+        Inside the recorded coverage this is a local range read. Past the
+        covered end only the missing tail is fetched and merged in; before
+        the covered start the whole range is refetched. A full refetch is
+        returned whole (timezone dropped, not clipped), so the first call
+        behaves like a direct download.
+        """
+        today = date.today()
+        start = _as_date(start)
+        end = min(_as_date(end), today) if end is not None else today
+        path = self._path(ticker, 'prices.bin')
+        cov = self.coverage(ticker).get('prices')
+
+        if cov and _as_date(cov['start']) <= start and end <= _as_date(cov['end']):
+            return records_to_history(self.read_range(path, PRICE_DTYPE, start, end))
+        if fetch is None:
+            return records_to_history(self.read_range(path, PRICE_DTYPE, start, end))
+
+        with self._locked(ticker):
+            cov = self.coverage(ticker).get('prices')
+            tail = cov is not None and _as_date(cov['start']) <= start
+            fetch_from = _as_date(cov['end']) if tail else start
+            fetched = fetch(fetch_from.isoformat(), (pd.Timestamp(end) + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+            if fetched is None or fetched.empty:
+                if tail:
+                    return records_to_history(self.read_range(path, PRICE_DTYPE, start, end))
+                return pd.DataFrame()
+
+            records = history_to_records(fetched)
+            if tail:
+                self._write_merged(path, records)
+            else:
+                with atomic_write(path, 'wb') as f:
+                    f.write(records.tobytes())
+            coverage = self.coverage(ticker)
+            coverage['prices'] = {
+                'start': (_as_date(cov['start']) if tail else start).isoformat(),
+                'end': max(end, _as_date(cov['end'])).isoformat() if tail else end.isoformat(),
+                'fetched_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._save_coverage(ticker, coverage)
+
+        if tail:
+            return records_to_history(self.read_range(path, PRICE_DTYPE, start, end))
+        return records_to_history(records)
+
+    # ------------------------------------------------------------------
+    # Dividends
+    # ------------------------------------------------------------------
+
+    def get_dividends(
+        self,
+        ticker: str,
+        start=None,
+        end=None,
+        fetch: Optional[Callable[[], pd.Series]] = None,
+        max_age_days: float = DIVIDEND_MAX_AGE_DAYS
+    ) -> pd.Series:
+        """Dividend history (optionally restricted to [start, end]).
+
+        The full series is refetched when the stored copy is older than
+        max_age_days; only dates from the last stored ex-date on are merged in.
+        """
+        path = self._path(ticker, 'dividends.bin')
+        cov = self.coverage(ticker).get('dividends')
+        fresh = cov and (datetime.now() - datetime.fromisoformat(cov['fetched_at'])).total_seconds() <= max_age_days * 86400
+
+        if not fresh and fetch is not None:
+            with self._locked(ticker):
+                fetched = fetch()
+                if fetched is not None:
+                    records = dividends_to_records(fetched)
+                    stored = self._read(path, DIVIDEND_DTYPE)
+                    if len(stored) and len(records) and records['date'][0] <= stored['date'][0]:
+                        last = stored['date'][-1]
+                        del stored
+                        self._write_merged(path, records[records['date'] >= last])
+                    else:
+                        del stored
+                        with atomic_write(path, 'wb') as f:
+                            f.write(records.tobytes())
+                    coverage = self.coverage(ticker)
+                    coverage['dividends'] = {'fetched_at': datetime.now().isoformat(timespec='seconds')}
+                    self._save_coverage(ticker, coverage)
+
+        return records_to_dividends(self.read_range(path, DIVIDEND_DTYPE, start, end))
+
+
+_default_store: Optional[MarketStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_market_store() -> MarketStore:
+    """Process-wide store (root from DIVIDEND_MARKET_STORE, else DEFAULT_STORE_DIR)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = MarketStore(os.environ.get('DIVIDEND_MARKET_STORE', DEFAULT_STORE_DIR))
+        return _default_store
+
+
+def set_market_store(store: Optional[MarketStore]):
+    """Replace the process-wide store (None resets to the default on next use)."""
+    global _default_store
+    with _default_store_lock:
+        _default_store = store
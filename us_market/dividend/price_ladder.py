@@ -0,0 +1,89 @@
+"""
+Period Ladder
+- One cached daily history per ticker, covering the longest period asked for
+  so far and never less than the first LADDER rung
+- Every yfinance-style period ('1mo' ... 'max') is a slice of that history,
+  so switching between '6mo', '1y' and '3y' neither refetches nor stores a
+  second copy
+- A period longer than the cached one reloads the ticker at the next rung up
+  and replaces the shorter entry; the MarketStore serves what it already holds
+- Shared by RiskAnalytics and PortfolioOptimizer
+"""
+from datetime import date
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+from .cache import get_cache
+from .market_store import MarketStore, get_market_store, period_start
+from .providers import MarketDataProvider, get_provider
+
+# Spans loaded into the cache; a request is rounded up to the first rung covering it
+LADDER = ('1y', '2y', '5y', '10y', 'max')
+
+history_cache = get_cache('price_history', max_entries=1024, max_bytes=256 * 2**20, ttl=3600)
+
+
+class LadderEntry(NamedTuple):
+    start: date              # first day requested (the listing may be later)
+    history: pd.DataFrame
+
+
+def ladder_rung(period: str) -> str:
+    """Shortest LADDER span that contains period."""
+    start = period_start(period)
+    for rung in LADDER:
+        if period_start(rung) <= start:
+            return rung
+    return LADDER[-1]
+
+
+def slice_period(history: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Rows of history inside period, as a view (no copy)."""
+    lo = history.index.searchsorted(pd.Timestamp(period_start(period)))
+    return history.iloc[lo:]
+
+
+def get_entry(
+    ticker: str,
+    period: str = '1y',
+    store: Optional[MarketStore] = None,
+    provider: Optional[MarketDataProvider] = None
+) -> Optional[LadderEntry]:
+    """The ticker's ladder entry, loading or extending it to cover period (None if no data).
+
+    Raises ValueError for an unsupported period; fetch errors propagate.
+    """
+    # The top rung covers everything, even a period reaching past its start
+    start = max(period_start(period), period_start(LADDER[-1]))
+    rung = ladder_rung(period)
+    store = store if store is not None else get_market_store()
+    provider = provider if provider is not None else get_provider()
+
+    def load() -> Optional[LadderEntry]:
+        rung_start = period_start(rung)
+        history = store.get_history(
+            ticker, rung_start,
+            fetch=lambda s, e: provider.history(ticker, start=s, end=e)
+        )
+        return None if history.empty else LadderEntry(rung_start, history)
+
+    def covers(entry: LadderEntry) -> bool:
+        return entry.start <= start
+
+    while True:
+        entry = history_cache.get_or_load(ticker, load, accept=covers)
+        if entry is None or covers(entry):
+            return entry
+        # waited on a concurrent shorter load; go again as the loader
+
+
+def get_history(
+    ticker: str,
+    period: str = '1y',
+    store: Optional[MarketStore] = None,
+    provider: Optional[MarketDataProvider] = None
+) -> pd.DataFrame:
+    """Daily OHLCV for period, sliced from the ticker's ladder entry (empty if none)."""
+    entry = get_entry(ticker, period, store, provider)
+    return pd.DataFrame() if entry is None else slice_period(entry.history, period)
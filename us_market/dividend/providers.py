@@ -0,0 +1,288 @@
+"""
+Market Data Providers
+- MarketDataProvider: the one interface the loader and analysis modules fetch through
+- YFinanceProvider: live data from yfinance over the shared pooled HTTP session
+- RecordingProvider: wraps another provider and saves every response to disk
+- ReplayProvider: serves recorded responses offline, with optional injected latency
+- get_provider / set_provider: process-wide provider (env MARKET_DATA_REPLAY_DIR
+  or MARKET_DATA_RECORD_DIR select replay / recording at startup)
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from .http_session import get_session
+from .storage import atomic_write_json
+
+
+class MarketDataProvider(ABC):
+    """Source of quotes, price history and dividend history.
+
+    history() follows yfinance: start inclusive, end exclusive, OHLCV columns.
+    download() returns daily Close and Dividends for many tickers at once,
+    columns grouped by ticker (MultiIndex ticker × field).
+    """
+
+    @abstractmethod
+    def info(self, ticker: str) -> Dict:
+        ...
+
+    @abstractmethod
+    def dividends(self, ticker: str) -> pd.Series:
+        ...
+
+    @abstractmethod
+    def history(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None,
+                period: Optional[str] = None) -> pd.DataFrame:
+        ...
+
+    @abstractmethod
+    def download(self, tickers: List[str], start: str) -> pd.DataFrame:
+        ...
+
+    def connection_stats(self) -> Optional[Dict]:
+        """HTTP connection reuse stats, for providers that go over the network."""
+        return None
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live yfinance calls, all over one session (the process-wide one by default)."""
+
+    def __init__(self, session=None):
+        self._session = session
+
+    @property
+    def session(self):
+        return self._session if self._session is not None else get_session()
+
+    def _ticker(self, ticker: str) -> yf.Ticker:
+        return yf.Ticker(ticker, session=self.session)
+
+    def info(self, ticker: str) -> Dict:
+        return self._ticker(ticker).info
+
+    def dividends(self, ticker: str) -> pd.Series:
+        return self._ticker(ticker).dividends
+
+    def history(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None,
+                period: Optional[str] = None) -> pd.DataFrame:
+        if start is None:
+            return self._ticker(ticker).history(period=period or '1mo')
+        return self._ticker(ticker).history(start=start, end=end)
+
+    def download(self, tickers: List[str], start: str) -> pd.DataFrame:
+        return yf.download(
+            tickers, start=start, actions=True, group_by='ticker',
+            auto_adjust=False, progress=False, threads=False, session=self.session
+        )
+
+    def connection_stats(self) -> Optional[Dict]:
+        return self.session.stats.as_dict()
+
+
+# ----------------------------------------------------------------------
+# Recording format: one JSON file per call, frames/series encoded as
+# {"__frame__" | "__series__": {...}}, errors as {"__error__": {type, message}}
+# ----------------------------------------------------------------------
+
+def _encode_index(index: pd.Index) -> Dict:
+    if isinstance(index, pd.DatetimeIndex):
+        tz = str(index.tz) if index.tz is not None else None
+        naive = index.tz_localize(None) if tz else index
+        return {'dates': [ts.isoformat() for ts in naive], 'tz': tz}
+    return {'values': index.tolist()}
+
+
+def _decode_index(data: Dict) -> pd.Index:
+    if 'dates' in data:
+        index = pd.DatetimeIndex(pd.to_datetime(data['dates']))
+        return index.tz_localize(data['tz']) if data.get('tz') else index
+    return pd.Index(data['values'])
+
+
+def _column_key(column):
+    return list(column) if isinstance(column, tuple) else column
+
+
+def encode_response(value):
+    if isinstance(value, pd.DataFrame):
+        return {'__frame__': {
+            'index': _encode_index(value.index),
+            'columns': [_column_key(c) for c in value.columns],
+            'values': [value.iloc[:, i].astype(float).tolist() for i in range(value.shape[1])],
+        }}
+    if isinstance(value, pd.Series):
+        return {'__series__': {
+            'index': _encode_index(value.index),
+            'name': value.name,
+            'values': value.astype(float).tolist(),
+        }}
+    return value
+
+
+def decode_response(value):
+    if isinstance(value, dict) and '__frame__' in value:
+        data = value['__frame__']
+        columns = [tuple(c) if isinstance(c, list) else c for c in data['columns']]
+        index = _decode_index(data['index'])
+        if columns and isinstance(columns[0], tuple):
+            columns = pd.MultiIndex.from_tuples(columns)
+        values = np.array(data['values'], dtype=np.float64).T if data['values'] else np.zeros((len(index), 0))
+        return pd.DataFrame(values, index=index, columns=columns)
+    if isinstance(value, dict) and '__series__' in value:
+        data = value['__series__']
+        return pd.Series(data['values'], index=_decode_index(data['index']), name=data['name'], dtype=np.float64)
+    return value
+
+
+class RecordedError(Exception):
+    """Base for replayed exceptions; subclasses carry the recorded class name."""
+
+
+_error_types: Dict[str, type] = {}
+
+
+def _replayed_error(name: str, message: str) -> Exception:
+    # Same class name as the original, so classify_error treats it the same way
+    if name not in _error_types:
+        _error_types[name] = type(name, (RecordedError,), {})
+    return _error_types[name](message)
+
+
+def _recording_path(root: str, method: str, ticker: str, params: Dict) -> str:
+    key = json.dumps(params, sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+    safe = ticker.replace('/', '_').replace(os.sep, '_')
+    return os.path.join(root, method, f"{safe}-{digest}.json")
+
+
+def _history_params(start, end, period) -> Dict:
+    return {'start': start, 'end': end, 'period': period}
+
+
+class RecordingProvider(MarketDataProvider):
+    """Pass calls to `inner` and save each response (or error) under `root`."""
+
+    def __init__(self, inner: MarketDataProvider, root: str):
+        self.inner = inner
+        self.root = root
+
+    def _record(self, method: str, ticker: str, params: Dict, call):
+        path = _recording_path(self.root, method, ticker, params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {'method': method, 'ticker': ticker, 'params': params}
+        try:
+            result = call()
+        except Exception as e:
+            entry['response'] = {'__error__': {'type': type(e).__name__, 'message': str(e)}}
+            atomic_write_json(path, entry, default=str)
+            raise
+        entry['response'] = encode_response(result)
+        atomic_write_json(path, entry, default=str)
+        return result
+
+    def info(self, ticker: str) -> Dict:
+        return self._record('info', ticker, {}, lambda: self.inner.info(ticker))
+
+    def dividends(self, ticker: str) -> pd.Series:
+        return self._record('dividends', ticker, {}, lambda: self.inner.dividends(ticker))
+
+    def history(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None,
+                period: Optional[str] = None) -> pd.DataFrame:
+        return self._record(
+            'history', ticker, _history_params(start, end, period),
+            lambda: self.inner.history(ticker, start=start, end=end, period=period)
+        )
+
+    def download(self, tickers: List[str], start: str) -> pd.DataFrame:
+        return self._record(
+            'download', 'batch', {'tickers': list(tickers), 'start': start},
+            lambda: self.inner.download(tickers, start)
+        )
+
+    def connection_stats(self) -> Optional[Dict]:
+        return self.inner.connection_stats()
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serve recordings from `root` without network access.
+
+    Each call sleeps `latency` seconds plus up to `jitter` more, drawn from a
+    seeded RNG so runs are repeatable. A call with no recording raises
+    LookupError; a recorded error is re-raised under its original class name.
+    """
+
+    def __init__(self, root: str, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.root = root
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _replay(self, method: str, ticker: str, params: Dict):
+        self._delay()
+        path = _recording_path(self.root, method, ticker, params)
+        if not os.path.exists(path):
+            raise LookupError(f"No recording for {method} {ticker} {params}")
+        with open(path, 'r', encoding='utf-8') as f:
+            response = json.load(f)['response']
+        if isinstance(response, dict) and '__error__' in response:
+            raise _replayed_error(response['__error__']['type'], response['__error__']['message'])
+        return decode_response(response)
+
+    def info(self, ticker: str) -> Dict:
+        return self._replay('info', ticker, {})
+
+    def dividends(self, ticker: str) -> pd.Series:
+        return self._replay('dividends', ticker, {})
+
+    def history(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None,
+                period: Optional[str] = None) -> pd.DataFrame:
+        return self._replay('history', ticker, _history_params(start, end, period))
+
+    def download(self, tickers: List[str], start: str) -> pd.DataFrame:
+        return self._replay('download', 'batch', {'tickers': list(tickers), 'start': start})
+
+
+_provider: Optional[MarketDataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> MarketDataProvider:
+    """Process-wide provider; built from the environment on first use."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            replay_dir = os.environ.get('MARKET_DATA_REPLAY_DIR')
+            record_dir = os.environ.get('MARKET_DATA_RECORD_DIR')
+            if replay_dir:
+                _provider = ReplayProvider(replay_dir, latency=float(os.environ.get('MARKET_DATA_REPLAY_LATENCY', 0)))
+            elif record_dir:
+                _provider = RecordingProvider(YFinanceProvider(), record_dir)
+            else:
+                _provider = YFinanceProvider()
+        return _provider
+
+
+def set_provider(provider: Optional[MarketDataProvider]):
+    """Replace the process-wide provider (None rebuilds it from the environment)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
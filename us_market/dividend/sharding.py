@@ -0,0 +1,280 @@
+"""
+Sharded Universe Refresh
+- The seed is split into N shards by a stable hash of the ticker (sha1, so
+  every process and machine agrees on the partition)
+- Each shard runs a normal DividendDataLoader over its own work directory
+  (shards/shard-IIII-of-NNNN/), writing a partial universe and, last, a
+  shard.json manifest; any shard can run in its own process or on its own node
+- merge_shards validates the partials (all shards present, same seed, every
+  ticker in its own partition, partial unchanged since its manifest) and
+  publishes one universe, fetch state, snapshot and analytics
+- run_local runs every shard in a separate process, then merges; with
+  --replay the whole flow runs offline against recorded provider responses
+
+Run:
+  python -m us_market.dividend.sharding run --shard 0 --num-shards 4   (per node)
+  python -m us_market.dividend.sharding merge --num-shards 4
+  python -m us_market.dividend.sharding local --num-shards 4 --replay DIR
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import uuid
+
+from .loader import DividendDataLoader, load_seed_tickers
+from .providers import MarketDataProvider, ReplayProvider
+from .storage import atomic_write_json
+from .ticker_analytics import ANALYTICS_FILE, load_analytics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = 'us_market/dividend/data'
+MANIFEST_FILE = 'shard.json'
+
+
+class ShardMergeError(ValueError):
+    """Partials that cannot be merged into one universe (details in .problems)."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+def shard_of(ticker: str, num_shards: int) -> int:
+    """Shard index of ticker (stable across processes, unlike hash())."""
+    digest = hashlib.sha1(ticker.encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) % num_shards
+
+
+def shard_tickers(tickers: List[str], index: int, num_shards: int) -> List[str]:
+    """Tickers of one shard, in seed order."""
+    return [t for t in tickers if shard_of(t, num_shards) == index]
+
+
+def seed_digest(tickers: List[str]) -> str:
+    """Fingerprint of the seed, so shards cut from different seeds are not merged."""
+    return hashlib.sha1('\n'.join(tickers).encode('utf-8')).hexdigest()
+
+
+def shard_dir(shards_dir: str, index: int, num_shards: int) -> str:
+    return os.path.join(shards_dir, f"shard-{index:04d}-of-{num_shards:04d}")
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_shard(
+    index: int,
+    num_shards: int,
+    data_dir: str = DEFAULT_DATA_DIR,
+    shards_dir: Optional[str] = None,
+    provider: Optional[MarketDataProvider] = None,
+    analytics: bool = True,
+    **fetch_kwargs
+) -> Dict:
+    """Fetch one shard of the seed in data_dir into its work directory.
+
+    The work directory keeps the shard's journal and fetch state between
+    runs, so resume and incremental refresh work per shard. Returns the
+    manifest, which is written only after the partial universe is complete.
+    """
+    if not 0 <= index < num_shards:
+        raise ValueError(f"Shard index {index} out of range for {num_shards} shards")
+    seed = load_seed_tickers(data_dir)
+    tickers = shard_tickers(seed, index, num_shards)
+    work_dir = shard_dir(shards_dir or os.path.join(data_dir, 'shards'), index, num_shards)
+    logger.info(f"🧩 Shard {index}/{num_shards}: {len(tickers)} of {len(seed)} tickers -> {work_dir}")
+
+    loader = DividendDataLoader(data_dir=work_dir, provider=provider, analytics=analytics, tickers=tickers)
+    data_map = loader.fetch_data(**fetch_kwargs)
+
+    manifest = {
+        'index': index,
+        'num_shards': num_shards,
+        'seed_digest': seed_digest(seed),
+        'tickers': tickers,
+        'snapshot_id': data_map['_meta']['snapshot_id'],
+        'completed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    atomic_write_json(os.path.join(work_dir, MANIFEST_FILE), manifest, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def load_partials(
+    num_shards: int,
+    data_dir: str = DEFAULT_DATA_DIR,
+    shards_dir: Optional[str] = None,
+    max_age_days: Optional[float] = None
+) -> List[Dict]:
+    """Read and validate every shard's partial; raises ShardMergeError listing all problems.
+
+    Each returned partial is {'manifest', 'universe', 'state', 'analytics'}.
+    """
+    seed = load_seed_tickers(data_dir)
+    digest = seed_digest(seed)
+    shards_dir = shards_dir or os.path.join(data_dir, 'shards')
+    now = datetime.now()
+    problems = []
+    partials = []
+
+    for index in range(num_shards):
+        work_dir = shard_dir(shards_dir, index, num_shards)
+        manifest = _read_json(os.path.join(work_dir, MANIFEST_FILE))
+        universe = _read_json(os.path.join(work_dir, 'dividend_universe.json'))
+        if manifest is None or universe is None:
+            problems.append(f"shard {index}: no completed run in {work_dir}")
+            continue
+        name = f"shard {index}"
+        if manifest.get('index') != index or manifest.get('num_shards') != num_shards:
+            problems.append(f"{name}: manifest is for shard {manifest.get('index')}/{manifest.get('num_shards')}")
+            continue
+        if manifest.get('seed_digest') != digest:
+            problems.append(f"{name}: fetched from a different universe_seed.json")
+        if manifest.get('tickers') != shard_tickers(seed, index, num_shards):
+            problems.append(f"{name}: assigned tickers do not match the partition")
+        if universe.get('_meta', {}).get('snapshot_id') != manifest.get('snapshot_id'):
+            problems.append(f"{name}: partial universe does not match its manifest (run incomplete?)")
+        strays = [t for t in universe if not t.startswith('_') and shard_of(t, num_shards) != index]
+        if strays:
+            problems.append(f"{name}: tickers outside its partition: {', '.join(strays[:5])}")
+        if max_age_days is not None:
+            completed_at = datetime.strptime(manifest['completed_at'], '%Y-%m-%d %H:%M:%S')
+            if now - completed_at > timedelta(days=max_age_days):
+                problems.append(f"{name}: completed {manifest['completed_at']}, older than {max_age_days} days")
+        partials.append({
+            'manifest': manifest,
+            'universe': universe,
+            'state': _read_json(os.path.join(work_dir, 'fetch_state.json')) or {},
+            'analytics': load_analytics(os.path.join(work_dir, ANALYTICS_FILE), manifest.get('snapshot_id')),
+        })
+
+    if problems:
+        raise ShardMergeError(problems)
+    return partials
+
+
+def merge_shards(
+    num_shards: int,
+    data_dir: str = DEFAULT_DATA_DIR,
+    shards_dir: Optional[str] = None,
+    provider: Optional[MarketDataProvider] = None,
+    analytics: bool = True,
+    max_age_days: Optional[float] = None
+) -> Dict:
+    """Validate the shard partials and publish the merged universe into data_dir.
+
+    Tickers keep seed order. Analytics computed by the shards are carried
+    over; any ticker without them is computed here (analytics=True).
+    """
+    partials = load_partials(num_shards, data_dir, shards_dir, max_age_days)
+    loader = DividendDataLoader(data_dir=data_dir, provider=provider, analytics=analytics)
+
+    records = {}
+    state = {}
+    precomputed = {}
+    for partial in partials:
+        records.update({t: v for t, v in partial['universe'].items() if not t.startswith('_')})
+        state.update(partial['state'])
+        precomputed.update({t: v for t, v in partial['analytics'].items() if not t.startswith('_')})
+
+    data_map = {t: records[t] for t in loader.tickers if t in records}
+    now = datetime.now()
+    metas = [p['universe']['_meta'] for p in partials]
+    data_map['_meta'] = {
+        'snapshot_id': f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}",
+        'last_updated': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'total_tickers': len(data_map),
+        'refreshed_tickers': sum(m.get('refreshed_tickers', 0) for m in metas),
+        'fetch_stats': {'shards': [m.get('fetch_stats') for m in metas]},
+        'shards': {
+            'num_shards': num_shards,
+            'snapshot_ids': [p['manifest']['snapshot_id'] for p in partials],
+        },
+    }
+
+    output_file = os.path.join(data_dir, 'dividend_universe.json')
+    atomic_write_json(output_file, data_map, ensure_ascii=False, indent=2)
+    loader._save_fetch_state({t: v for t, v in state.items() if t in data_map})
+    logger.info(f"💾 Merged {num_shards} shards: {len(data_map) - 1} tickers to {output_file}")
+    loader.write_snapshot(data_map)
+    if analytics:
+        loader.write_analytics(data_map, precomputed)
+    return data_map
+
+
+def _shard_worker(index: int, num_shards: int, data_dir: str, shards_dir: Optional[str],
+                  replay: Optional[str], replay_latency: float, analytics: bool, fetch_kwargs: Dict) -> Dict:
+    # Providers hold locks and sessions, so each process builds its own
+    provider = ReplayProvider(replay, latency=replay_latency) if replay else None
+    return run_shard(index, num_shards, data_dir, shards_dir, provider, analytics, **fetch_kwargs)
+
+
+def run_local(
+    num_shards: int,
+    data_dir: str = DEFAULT_DATA_DIR,
+    shards_dir: Optional[str] = None,
+    processes: Optional[int] = None,
+    replay: Optional[str] = None,
+    replay_latency: float = 0.0,
+    analytics: bool = True,
+    **fetch_kwargs
+) -> Dict:
+    """Run all shards in separate processes on this machine, then merge them."""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes or num_shards) as executor:
+        futures = [
+            executor.submit(_shard_worker, i, num_shards, data_dir, shards_dir,
+                            replay, replay_latency, analytics, fetch_kwargs)
+            for i in range(num_shards)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            manifest = future.result()
+            logger.info(f"✅ Shard {manifest['index']} done: {len(manifest['tickers'])} tickers")
+    provider = ReplayProvider(replay, latency=replay_latency) if replay else None
+    return merge_shards(num_shards, data_dir, shards_dir, provider, analytics)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Sharded dividend universe refresh")
+    parser.add_argument('command', choices=['run', 'merge', 'local'],
+                        help="run one shard, merge finished shards, or run all shards locally and merge")
+    parser.add_argument('--num-shards', type=int, required=True)
+    parser.add_argument('--shard', type=int, help="shard index for 'run'")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--shards-dir', help="shard work directories (default DATA_DIR/shards)")
+    parser.add_argument('--processes', type=int, help="worker processes for 'local' (default one per shard)")
+    parser.add_argument('--replay', metavar='DIR',
+                        help="serve responses recorded under DIR instead of calling yfinance")
+    parser.add_argument('--replay-latency', type=float, default=0.0,
+                        help="seconds of latency injected per replayed call")
+    parser.add_argument('--skip-analytics', action='store_true',
+                        help="do not precompute per-ticker analytics")
+    parser.add_argument('--max-age-days', type=float,
+                        help="'merge': reject shards completed longer ago than this")
+    parser.add_argument('--bulk', action='store_true',
+                        help="download prices and dividends in batches instead of per ticker")
+    parser.add_argument('--incremental', action='store_true',
+                        help="refetch only stale tickers of each shard")
+    args = parser.parse_args()
+
+    analytics = not args.skip_analytics
+    fetch_kwargs = {'bulk': args.bulk, 'incremental': args.incremental}
+    if args.command == 'run':
+        if args.shard is None:
+            parser.error("'run' needs --shard")
+        provider = ReplayProvider(args.replay, latency=args.replay_latency) if args.replay else None
+        run_shard(args.shard, args.num_shards, args.data_dir, args.shards_dir, provider, analytics, **fetch_kwargs)
+    elif args.command == 'merge':
+        provider = ReplayProvider(args.replay, latency=args.replay_latency) if args.replay else None
+        merge_shards(args.num_shards, args.data_dir, args.shards_dir, provider, analytics, args.max_age_days)
+    else:
+        run_local(args.num_shards, args.data_dir, args.shards_dir, args.processes,
+                  args.replay, args.replay_latency, analytics, **fetch_kwargs)
@@ -0,0 +1,118 @@
+"""
+Crash-safe File Writes
+- atomic_write: write to a temp file in the same directory, fsync, os.replace
+  (readers see either the old file or the new one, never a partial write)
+- FetchJournal: append-only JSONL of per-ticker fetch results, used by the
+  loader to checkpoint a run and resume it after a crash
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: Optional[str] = 'utf-8'):
+    """Open a temp file next to `path`; on clean exit fsync it and rename over `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600; keep the permissions of the file being replaced
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data, **dump_kwargs):
+    with atomic_write(path, 'w') as f:
+        json.dump(data, f, **dump_kwargs)
+
+
+class FetchJournal:
+    """Append-only JSONL journal of one loader run.
+
+    The first line is a run header ({"run": {"started_at": ...}}); every other
+    line is one finished ticker: {"ticker", "fetched_at", "record"} on success
+    or {"ticker", "fetched_at", "cause"} on failure. A torn last line (crash
+    mid-write) is ignored on replay.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def started_at(self) -> Optional[datetime]:
+        """Start time of the journaled run, or None if there is no usable journal."""
+        for entry in self.entries():
+            run = entry.get('run')
+            return datetime.fromisoformat(run['started_at']) if run else None
+        return None
+
+    def start(self, now: datetime, resume: bool):
+        """Open for appending; starts a fresh journal unless resuming an existing one."""
+        if resume and self.started_at() is not None:
+            self._truncate_torn_tail()
+        else:
+            with atomic_write(self.path, 'w') as f:
+                f.write(json.dumps({'run': {'started_at': now.isoformat(timespec='seconds')}}) + '\n')
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _truncate_torn_tail(self):
+        """Drop a partial last line so new entries start on a line of their own."""
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def append(self, ticker: str, fetched_at: datetime, record: Optional[Dict] = None, cause: Optional[str] = None):
+        entry = {'ticker': ticker, 'fetched_at': fetched_at.isoformat(timespec='seconds')}
+        if record is not None:
+            entry['record'] = record
+        else:
+            entry['cause'] = cause
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def entries(self) -> Iterator[Dict]:
+        """Parsed lines in order, skipping a torn or corrupt line."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping torn journal line in {self.path}")
+
+    def results(self) -> Iterator[Dict]:
+        """Ticker entries only; a later entry for the same ticker supersedes earlier ones."""
+        for entry in self.entries():
+            if 'ticker' in entry:
+                yield entry
+
+    def discard(self):
+        """Remove the journal once its results are published."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
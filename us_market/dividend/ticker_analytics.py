@@ -0,0 +1,133 @@
+"""
+Precomputed Per-Ticker Analytics
+- Risk (volatility, drawdown and its duration, Sharpe, Sortino, Calmar,
+  VaR / CVaR, beta) and sustainability (payout ratio, dividend growth, streak,
+  safety score) for every universe ticker
+- Prices are fetched per ticker under the loader's rate limit; risk is then
+  one vectorized pass over the whole universe's price matrix
+- Computed by the loader right after ingestion, written atomically to
+  dividend_analytics.json next to the universe snapshot
+- Tagged with the snapshot_id of the universe it was built from; readers
+  ignore a file whose snapshot_id does not match the loaded universe
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import concurrent.futures
+import json
+import logging
+import os
+import time
+
+from .market_store import MarketStore
+from .providers import MarketDataProvider
+from .storage import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_FILE = 'dividend_analytics.json'
+# Price window of the precomputed risk metrics (the endpoints' default period)
+ANALYTICS_PERIOD = '1y'
+# Bumped when the stored metric set changes; older files are ignored
+ANALYTICS_VERSION = 2
+
+
+def snapshot_id_of(meta: Dict) -> Optional[str]:
+    """Version of a universe; universes written before snapshot ids fall back to last_updated."""
+    return meta.get('snapshot_id') or meta.get('last_updated')
+
+
+def build_analytics(
+    tickers: List[str],
+    snapshot_id: Optional[str],
+    provider: Optional[MarketDataProvider] = None,
+    store: Optional[MarketStore] = None,
+    max_workers: int = 8,
+    period: str = ANALYTICS_PERIOD,
+    call: Optional[Callable] = None,
+) -> Dict:
+    """Analytics for every ticker, keyed by ticker, plus a _meta entry.
+
+    `call(fn, *args)` wraps each per-ticker computation (the loader passes its
+    fetch controller so the stage shares the rate limit). A ticker whose
+    computation raises is left out and looked up live instead: fetch errors
+    are raised rather than scored as missing data, so `call` can retry them
+    and a ticker that still fails is never stored with degraded metrics.
+    """
+    # Imported here so the engine can read analytics without loading the analysis stack
+    from .analysis.dividend_analyzer import DividendAnalyzer
+    from .analysis.risk_analytics import RiskAnalytics
+    from .price_ladder import get_entry
+
+    risk = RiskAnalytics(store=store, provider=provider)
+    analyzer = DividendAnalyzer(store=store, provider=provider)
+    call = call or (lambda fn, *args: fn(*args))
+    started = time.monotonic()
+
+    def warm(ticker: str):
+        # Load prices into the shared cache; the batch pass below reads them from there
+        get_entry(ticker, period, risk.store, risk.provider)
+
+    def compute(ticker: str) -> Dict:
+        warm(ticker)
+        return {'sustainability': analyzer.get_all_metrics(ticker, raise_errors=True)}
+
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(call, compute, ticker): ticker for ticker in tickers}
+        for future in concurrent.futures.as_completed(futures):
+            ticker = futures[future]
+            try:
+                results[ticker] = future.result()
+            except Exception as e:
+                logger.error(f"❌ Analytics failed for {ticker}: {e}")
+
+    try:
+        call(warm, risk.benchmark)
+    except Exception as e:
+        logger.warning(f"Benchmark {risk.benchmark} unavailable, beta left empty: {e}")
+    computed = [t for t in tickers if t in results]
+    for ticker, metrics in risk.get_risk_metrics_batch(computed, period).items():
+        results[ticker] = {'risk': metrics, **results[ticker]}
+
+    analytics = {t: results[t] for t in computed}
+    analytics['_meta'] = {
+        'snapshot_id': snapshot_id,
+        'version': ANALYTICS_VERSION,
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'period': period,
+        'risk_free_rate': risk.risk_free_rate,
+        'benchmark': risk.benchmark,
+        'tickers': len(results),
+        'elapsed_seconds': round(time.monotonic() - started, 3),
+    }
+    return analytics
+
+
+def _json_default(value):
+    # numpy scalars from the metric arithmetic
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def write_analytics(path: str, analytics: Dict):
+    atomic_write_json(path, analytics, ensure_ascii=False, indent=2, default=_json_default)
+
+
+def load_analytics(path: str, snapshot_id: Optional[str]) -> Dict:
+    """Analytics built from `snapshot_id`, or {} if the file is missing or stale."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            analytics = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Analytics file unreadable, ignoring: {e}")
+        return {}
+    meta = analytics.get('_meta', {})
+    built_from = meta.get('snapshot_id')
+    if snapshot_id is None or built_from != snapshot_id:
+        logger.info(f"Analytics built from snapshot {built_from}, universe is {snapshot_id}; ignoring")
+        return {}
+    if meta.get('version') != ANALYTICS_VERSION:
+        logger.info(f"Analytics version {meta.get('version')} is not {ANALYTICS_VERSION}; ignoring")
+        return {}
+    return analytics
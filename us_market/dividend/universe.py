@@ -0,0 +1,298 @@
+"""
+Columnar Universe Store
+- Aligned NumPy arrays over the dividend universe (one row per ticker)
+- Built once per engine snapshot from dividend_universe.json
+- Lets selection, sorting and yield math run as vectorized operations
+- Dense tickers × 12 per-share dividend calendar for cash-flow projections
+- Versioned binary snapshot (.npz of columns + packed payments table) that
+  loads by memory-mapping instead of parsing
+"""
+from typing import Dict, Iterable, List, Optional
+import json
+import logging
+import zipfile
+import numpy as np
+
+from .storage import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Loader frequency labels -> compact codes
+FREQUENCY_CODES = {
+    'Unknown': 0,
+    'Semi-Annual/Annual': 1,
+    'Quarterly': 2,
+    'Monthly': 3,
+}
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def normalize_yield(value) -> float:
+    """Decimal yield; values above 1 are treated as percent."""
+    y = float(value or 0)
+    return y / 100.0 if y > 1 else y
+
+
+class UniverseColumns:
+    """Row-aligned arrays: ticker, name, price, yield, ttm_dividend, frequency, is_etf, sector.
+
+    monthly_dividends is a (tickers × 12) matrix of per-share dividends by
+    calendar month, so a share vector maps to a monthly cash-flow vector with
+    one product: shares @ monthly_dividends[rows].
+    """
+
+    def __init__(
+        self,
+        tickers: np.ndarray,
+        names: np.ndarray,
+        price: np.ndarray,
+        dividend_yield: np.ndarray,
+        ttm_dividend: np.ndarray,
+        frequency: np.ndarray,
+        is_etf: np.ndarray,
+        sector: np.ndarray,
+        sector_names: List[str],
+        monthly_dividends: np.ndarray,
+    ):
+        self.tickers = tickers
+        self.names = names
+        self.price = price
+        self.dividend_yield = dividend_yield
+        self.ttm_dividend = ttm_dividend
+        self.frequency = frequency
+        self.is_etf = is_etf
+        self.sector = sector
+        self.sector_names = sector_names
+        self.monthly_dividends = monthly_dividends
+        self.index: Dict[str, int] = {t: i for i, t in enumerate(tickers.tolist())}
+
+    @classmethod
+    def from_records(cls, dividend_data: Dict, symbol_tags: Dict[str, List[str]]) -> 'UniverseColumns':
+        """Build columns from the per-ticker dicts (yield already normalized to decimal)."""
+        tickers = [t for t in dividend_data if not t.startswith('_')]
+        records = [dividend_data[t] for t in tickers]
+
+        def column(key: str) -> np.ndarray:
+            return np.array([float(r.get(key, 0) or 0) for r in records], dtype=np.float64)
+
+        sectors = [r.get('sector') or 'Unknown' for r in records]
+        sector_names, sector_codes = np.unique(np.array(sectors, dtype=object), return_inverse=True)
+
+        return cls(
+            tickers=np.array(tickers, dtype=object),
+            names=np.array([r.get('name', t) for t, r in zip(tickers, records)], dtype=object),
+            price=column('price'),
+            dividend_yield=column('yield'),
+            ttm_dividend=column('ttm_dividend'),
+            frequency=np.array(
+                [FREQUENCY_CODES.get(r.get('frequency'), 0) for r in records], dtype=np.int8
+            ),
+            is_etf=np.array(['etf' in symbol_tags.get(t, []) for t in tickers], dtype=bool),
+            sector=sector_codes.astype(np.int16),
+            sector_names=[str(s) for s in sector_names],
+            monthly_dividends=cls._build_calendar(tickers, records),
+        )
+
+    @staticmethod
+    def _build_calendar(tickers: List[str], records: List[Dict]) -> np.ndarray:
+        """Sum each ticker's payments into its calendar-month column."""
+        calendar = np.zeros((len(records), 12), dtype=np.float64)
+        for row, record in enumerate(records):
+            for p in record.get('payments') or []:
+                try:
+                    month = int(p['date'][5:7])
+                    amount = float(p['amount'])
+                except (KeyError, TypeError, ValueError):
+                    logger.debug(f"{tickers[row]}: skipping malformed payment {p!r}")
+                    continue
+                if 1 <= month <= 12:
+                    calendar[row, month - 1] += amount
+        return calendar
+
+    @classmethod
+    def from_snapshot(cls, arrays: Dict[str, np.ndarray], symbol_tags: Dict[str, List[str]]) -> 'UniverseColumns':
+        """Wire columns straight from binary snapshot arrays (no per-ticker work)."""
+        tickers = arrays['tickers']
+        return cls(
+            tickers=tickers,
+            names=arrays['names'],
+            price=arrays['price'],
+            dividend_yield=arrays['dividend_yield'],
+            ttm_dividend=arrays['ttm_dividend'],
+            frequency=arrays['frequency_codes'],
+            is_etf=np.array(['etf' in symbol_tags.get(t, []) for t in tickers.tolist()], dtype=bool),
+            sector=arrays['sector_codes'],
+            sector_names=arrays['sector_names'].tolist(),
+            monthly_dividends=arrays['monthly_dividends'],
+        )
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def rows(self, symbols: Iterable[str]) -> np.ndarray:
+        """Row indices for symbols present in the universe (input order kept)."""
+        index = self.index
+        return np.array([index[s] for s in symbols if s in index], dtype=np.intp)
+
+    def by_yield(self, rows: np.ndarray) -> np.ndarray:
+        """Rows with positive yield, highest yield first (stable for ties)."""
+        rows = rows[self.dividend_yield[rows] > 0]
+        return rows[np.argsort(-self.dividend_yield[rows], kind='stable')]
+
+
+class TagIndex:
+    """Inverted index: tag -> boolean mask over universe rows."""
+
+    def __init__(self, columns: UniverseColumns, symbol_tags: Dict[str, List[str]], tag_names: Iterable[str] = ()):
+        n = len(columns)
+        self.size = n
+        self.masks: Dict[str, np.ndarray] = {tag: np.zeros(n, dtype=bool) for tag in tag_names}
+        for symbol, tags in symbol_tags.items():
+            row = columns.index.get(symbol)
+            if row is None:
+                continue
+            for tag in tags:
+                mask = self.masks.get(tag)
+                if mask is None:
+                    mask = self.masks[tag] = np.zeros(n, dtype=bool)
+                mask[row] = True
+        for mask in self.masks.values():
+            mask.setflags(write=False)
+
+    def any_of(self, tags: Iterable[str]) -> np.ndarray:
+        """Rows carrying at least one of the tags."""
+        masks = [self.masks[t] for t in tags if t in self.masks]
+        if not masks:
+            return np.zeros(self.size, dtype=bool)
+        return np.logical_or.reduce(masks)
+
+    def eligible(self, allowed_tags: Iterable[str], banned_tags: Iterable[str]) -> np.ndarray:
+        """OR of allowed masks AND NOT the OR of banned masks."""
+        return self.any_of(allowed_tags) & ~self.any_of(banned_tags)
+
+
+def write_universe_snapshot(path: str, data_map: Dict) -> None:
+    """Write the loader's ticker map as a binary snapshot.
+
+    Columns are stored uncompressed so the engine can memory-map them; yields
+    are normalized to decimals here, at ingest time. Payments are packed into
+    flat date/amount arrays indexed by per-ticker offsets. The file is
+    replaced atomically, so a reader never maps a half-written snapshot.
+    """
+    tickers = [t for t in data_map if not t.startswith('_')]
+    records = []
+    for t in tickers:
+        record = dict(data_map[t])
+        record['yield'] = normalize_yield(record.get('yield'))
+        records.append(record)
+    cols = UniverseColumns.from_records(dict(zip(tickers, records)), {})
+
+    payments = [r.get('payments') or [] for r in records]
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in payments])
+    flat = [p for ticker_payments in payments for p in ticker_payments]
+
+    def text(values) -> np.ndarray:
+        return np.array([str(v) for v in values], dtype=str) if values else np.zeros(0, dtype='<U1')
+
+    with atomic_write(path, 'wb') as f:
+        np.savez(
+            f,
+            format_version=np.array(SNAPSHOT_FORMAT_VERSION, dtype=np.int32),
+            meta=np.array(json.dumps(data_map.get('_meta', {}), ensure_ascii=False)),
+            tickers=text(tickers),
+            names=text([r.get('name') or t for t, r in zip(tickers, records)]),
+            currency=text([r.get('currency') or 'USD' for r in records]),
+            frequency=text([r.get('frequency') or 'Unknown' for r in records]),
+            frequency_codes=cols.frequency,
+            sector_codes=cols.sector,
+            sector_names=text(cols.sector_names),
+            price=cols.price,
+            dividend_yield=cols.dividend_yield,
+            ttm_dividend=cols.ttm_dividend,
+            last_div=np.array([float(r.get('last_div', 0) or 0) for r in records], dtype=np.float64),
+            monthly_dividends=cols.monthly_dividends,
+            payment_offsets=offsets,
+            payment_dates=text([p.get('date', '') for p in flat]),
+            payment_amounts=np.array([float(p.get('amount', 0) or 0) for p in flat], dtype=np.float64),
+        )
+
+
+def _mmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """Load an .npz, memory-mapping every stored (uncompressed) array member.
+
+    Compressed members and 0-d arrays are read normally.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as raw:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            array = None
+            if info.compress_type == zipfile.ZIP_STORED:
+                # Local header: 30 fixed bytes, then file name and extra field
+                raw.seek(info.header_offset + 26)
+                name_len = int.from_bytes(raw.read(2), 'little')
+                extra_len = int.from_bytes(raw.read(2), 'little')
+                raw.seek(info.header_offset + 30 + name_len + extra_len)
+                version = np.lib.format.read_magic(raw)
+                if version == (1, 0):
+                    shape, fortran, dtype = np.lib.format.read_array_header_1_0(raw)
+                else:
+                    shape, fortran, dtype = np.lib.format.read_array_header_2_0(raw)
+                if shape and not dtype.hasobject and np.prod(shape) > 0:
+                    array = np.memmap(
+                        path, dtype=dtype, mode='r', shape=shape,
+                        order='F' if fortran else 'C', offset=raw.tell()
+                    )
+            if array is None:
+                with zf.open(info) as member:
+                    array = np.lib.format.read_array(member, allow_pickle=False)
+            arrays[name] = array
+    return arrays
+
+
+def load_universe_snapshot(path: str) -> Optional[Dict[str, np.ndarray]]:
+    """Snapshot arrays, or None if the file is missing or another format version."""
+    try:
+        arrays = _mmap_npz(path)
+    except FileNotFoundError:
+        return None
+    if int(arrays.get('format_version', -1)) != SNAPSHOT_FORMAT_VERSION:
+        logger.warning(f"Ignoring {path}: unsupported snapshot format")
+        return None
+    return arrays
+
+
+def snapshot_meta(arrays: Dict[str, np.ndarray]) -> Dict:
+    return json.loads(str(arrays['meta']))
+
+
+def records_from_snapshot(arrays: Dict[str, np.ndarray]) -> Dict:
+    """Rebuild the loader's per-ticker dicts (same shape as dividend_universe.json)."""
+    offsets = arrays['payment_offsets'].tolist()
+    dates = arrays['payment_dates'].tolist()
+    amounts = arrays['payment_amounts'].tolist()
+    sector_names = arrays['sector_names'].tolist()
+    columns = zip(
+        arrays['tickers'].tolist(), arrays['names'].tolist(), arrays['sector_codes'].tolist(),
+        arrays['price'].tolist(), arrays['dividend_yield'].tolist(), arrays['ttm_dividend'].tolist(),
+        arrays['frequency'].tolist(), arrays['last_div'].tolist(), arrays['currency'].tolist()
+    )
+    data = {}
+    for row, (ticker, name, sector, price, div_yield, ttm, freq, last_div, currency) in enumerate(columns):
+        start, end = offsets[row], offsets[row + 1]
+        data[ticker] = {
+            'ticker': ticker,
+            'name': name,
+            'sector': sector_names[sector],
+            'price': price,
+            'yield': div_yield,
+            'ttm_dividend': ttm,
+            'frequency': freq,
+            'last_div': last_div,
+            'payments': [{'date': d, 'amount': a} for d, a in zip(dates[start:end], amounts[start:end])],
+            'currency': currency
+        }
+    data['_meta'] = snapshot_meta(arrays)
+    return data
@@ -10,6 +10,9 @@ import os
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
 sys.path.insert(0, project_root)
 
+# flask_app 임포트 시 카탈로그 사전 계산 비활성화 (테스트 속도)
+os.environ.setdefault('DIVIDEND_PRECOMPUTE_MODES', 'none')
+
 @pytest.fixture(scope="session")
 def test_data_dir():
     """테스트 데이터 디렉토리 경로"""
@@ -19,3 +22,20 @@ def test_data_dir():
 def test_config_dir():
     """테스트 설정 디렉토리 경로"""
     return os.path.join(project_root, 'us_market', 'dividend', 'config')
+
+@pytest.fixture(autouse=True)
+def market_store(tmp_path):
+    """테스트마다 격리된 임시 시장 데이터 저장소"""
+    from us_market.dividend.market_store import MarketStore, set_market_store
+    store = MarketStore(str(tmp_path / 'market'))
+    set_market_store(store)
+    yield store
+    set_market_store(None)
+
+@pytest.fixture(autouse=True)
+def analysis_caches():
+    """테스트마다 공유 캐시(가격·수익률·info) 초기화"""
+    from us_market.dividend.cache import clear_caches
+    clear_caches()
+    yield
+    clear_caches()
@@ -0,0 +1,155 @@
+"""
+공유 캐시(TTLCache) 테스트
+- LRU 항목 수 / 바이트 한도
+- 항목별 TTL 만료
+- single-flight 로딩 (동시 미스는 한 번만 로드)
+- 통계 (hit, miss, eviction, 메모리)
+"""
+import pytest
+import sys
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.cache import TTLCache, cache_stats, estimate_size, get_cache
+from us_market.dividend.analysis.risk_analytics import RiskAnalytics
+
+
+class TestTTLCache:
+    """TTLCache 테스트"""
+
+    def test_lru_eviction_by_entries(self):
+        """항목 수 초과 시 가장 오래 사용하지 않은 항목 제거"""
+        cache = TTLCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1   # a가 최근 사용
+        cache.set('c', 3)
+
+        assert 'b' not in cache
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert cache.stats()['evictions'] == 1
+
+    def test_eviction_by_bytes(self):
+        """바이트 한도 초과 시 제거, 한도보다 큰 값은 저장하지 않음"""
+        cache = TTLCache(max_entries=100, max_bytes=2500)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, np.zeros(100))  # 800 bytes
+        cache.set('d', np.zeros(100))
+
+        assert len(cache) == 3
+        assert 'a' not in cache
+        assert cache.stats()['bytes'] == 2400
+
+        cache.set('huge', np.zeros(1000))
+        assert 'huge' not in cache
+        assert len(cache) == 3
+
+    def test_ttl_expiry(self):
+        """TTL이 지난 항목은 미스로 처리되고 제거"""
+        cache = TTLCache(ttl=10)
+        with patch('us_market.dividend.cache.time.monotonic', return_value=1000.0):
+            cache.set('a', 1)
+            cache.set('b', 2, ttl=100)
+        with patch('us_market.dividend.cache.time.monotonic', return_value=1011.0):
+            assert cache.get('a') is None
+            assert cache.get('b') == 2
+
+        stats = cache.stats()
+        assert stats['expirations'] == 1
+        assert stats['entries'] == 1
+
+    def test_single_flight(self):
+        """동시 미스는 로더를 한 번만 실행하고 모두 같은 결과"""
+        cache = TTLCache()
+        calls = []
+        started = threading.Event()
+
+        def loader():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', loader)))
+                   for _ in range(8)]
+        threads[0].start()
+        started.wait()
+        for t in threads[1:]:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == ['value'] * 8
+        assert cache.stats()['loads'] == 1
+
+    def test_load_errors_and_none_not_cached(self):
+        """예외와 None 결과는 캐시하지 않음 (cache_none=True면 None도 캐시)"""
+        cache = TTLCache()
+        with pytest.raises(ValueError):
+            cache.get_or_load('k', Mock(side_effect=ValueError("boom")))
+        assert cache.stats()['load_errors'] == 1
+
+        loader = Mock(return_value=None)
+        cache.get_or_load('k', loader)
+        cache.get_or_load('k', loader)
+        assert loader.call_count == 2
+
+        cache.get_or_load('n', loader, cache_none=True)
+        cache.get_or_load('n', loader, cache_none=True)
+        assert loader.call_count == 3
+
+    def test_stats(self):
+        """hit/miss 비율과 메모리 사용량"""
+        cache = TTLCache(name='test')
+        cache.get_or_load('a', lambda: pd.DataFrame({'x': np.arange(10.0)}))
+        cache.get_or_load('a', lambda: None)
+        cache.get('b')
+
+        stats = cache.stats()
+        assert stats['name'] == 'test'
+        assert stats['hits'] == 1
+        assert stats['misses'] == 2
+        assert stats['hit_ratio'] == pytest.approx(0.333)
+        assert stats['bytes'] >= 80
+
+    def test_estimate_size(self):
+        """자료형별 대략적인 크기"""
+        assert estimate_size(np.zeros(10)) == 80
+        assert estimate_size(pd.Series(np.zeros(10))) >= 80
+        assert estimate_size({'a': np.zeros(10)}) > 80
+
+    def test_named_caches_are_shared(self):
+        """이름이 같은 캐시는 프로세스 전역에서 공유, 통계에 노출"""
+        assert get_cache('test_shared', max_entries=3) is get_cache('test_shared')
+        assert 'test_shared' in cache_stats()
+        assert 'price_history' in cache_stats()
+
+    def test_risk_analytics_loads_once_per_key(self, market_store):
+        """동시 요청이 같은 티커 가격을 한 번만 조회"""
+        dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=260, freq='B')
+        provider = Mock()
+
+        def history(ticker, start=None, end=None):
+            time.sleep(0.05)
+            return pd.DataFrame({'Close': np.linspace(100, 110, len(dates))}, index=dates)
+
+        provider.history.side_effect = history
+        risk = RiskAnalytics(store=market_store, provider=provider)
+        threads = [threading.Thread(target=risk.get_all_risk_metrics, args=('SFLT',)) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        fetched = [c.args[0] for c in provider.history.call_args_list]
+        assert sorted(fetched) == ['SFLT', 'SPY']   # 티커와 벤치마크 각 1회
+        assert RiskAnalytics._price_cache.stats()['loads'] == 2
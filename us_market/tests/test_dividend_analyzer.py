@@ -15,7 +15,7 @@ import numpy as np
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
-from us_market.dividend.dividend_analyzer import DividendAnalyzer
+from us_market.dividend.analysis.dividend_analyzer import DividendAnalyzer
 
 
 class TestDividendAnalyzer:
@@ -23,8 +23,10 @@ class TestDividendAnalyzer:
     
     @pytest.fixture
     def analyzer(self):
-        """테스트용 분석기 인스턴스 생성"""
-        return DividendAnalyzer()
+        """테스트용 분석기 인스턴스 생성 (클래스 공유 info 캐시는 테스트마다 비움)"""
+        DividendAnalyzer._info_cache.clear()
+        yield DividendAnalyzer()
+        DividendAnalyzer._info_cache.clear()
     
     @pytest.fixture
     def mock_stock_info(self):
@@ -47,7 +49,7 @@ class TestDividendAnalyzer:
         assert analyzer is not None
         assert hasattr(analyzer, '_info_cache')
     
-    @patch('us_market.dividend.dividend_analyzer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_payout_ratio_valid(self, mock_ticker, analyzer, mock_stock_info):
         """유효한 데이터로 Payout Ratio 계산"""
         mock_stock = Mock()
@@ -60,7 +62,7 @@ class TestDividendAnalyzer:
         # dividendRate / trailingEps = 2.5 / 5.0 = 0.5
         assert abs(ratio - 0.5) < 0.001
     
-    @patch('us_market.dividend.dividend_analyzer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_payout_ratio_zero_eps(self, mock_ticker, analyzer):
         """EPS가 0인 경우"""
         mock_stock = Mock()
@@ -70,7 +72,7 @@ class TestDividendAnalyzer:
         ratio = analyzer.calculate_payout_ratio('AAPL')
         assert ratio is None
     
-    @patch('us_market.dividend.dividend_analyzer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_payout_ratio_missing_data(self, mock_ticker, analyzer):
         """데이터가 없는 경우"""
         mock_stock = Mock()
@@ -80,7 +82,7 @@ class TestDividendAnalyzer:
         ratio = analyzer.calculate_payout_ratio('INVALID')
         assert ratio is None
     
-    @patch('us_market.dividend.dividend_analyzer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_dividend_growth_rate(self, mock_ticker, analyzer, mock_dividends):
         """배당 성장률 계산"""
         mock_stock = Mock()
@@ -92,7 +94,7 @@ class TestDividendAnalyzer:
         if growth is not None:
             assert isinstance(growth, float)
     
-    @patch('us_market.dividend.dividend_analyzer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_dividend_growth_rate_insufficient_data(self, mock_ticker, analyzer):
         """데이터가 부족한 경우"""
         mock_stock = Mock()
@@ -102,7 +104,7 @@ class TestDividendAnalyzer:
         growth = analyzer.calculate_dividend_growth_rate('AAPL')
         assert growth is None
     
-    @patch('us_market.dividend.dividend_analyzer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_get_dividend_streak(self, mock_ticker, analyzer, mock_dividends):
         """배당 연속 지급 연수 계산"""
         mock_stock = Mock()
@@ -113,7 +115,7 @@ class TestDividendAnalyzer:
         assert isinstance(streak, int)
         assert streak >= 0
     
-    @patch('us_market.dividend.dividend_analyzer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_get_dividend_streak_no_dividends(self, mock_ticker, analyzer):
         """배당이 없는 경우"""
         mock_stock = Mock()
@@ -123,7 +125,7 @@ class TestDividendAnalyzer:
         streak = analyzer.get_dividend_streak('AAPL')
         assert streak == 0
     
-    @patch('us_market.dividend.dividend_analyzer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_get_dividend_safety_score(self, mock_ticker, analyzer, mock_stock_info, mock_dividends):
         """배당 안전성 점수 계산"""
         mock_stock = Mock()
@@ -167,3 +169,22 @@ class TestDividendAnalyzer:
                         assert 'dividend_growth_5y' in metrics
                         assert 'dividend_streak' in metrics
                         assert 'safety' in metrics
+    
+    def test_get_all_metrics_fetches_once(self, market_store):
+        """평가 1회당 info/배당 이력은 티커별로 한 번만 요청"""
+        DividendAnalyzer._info_cache.clear()
+        provider = Mock()
+        provider.info.return_value = {'dividendRate': 2.0, 'trailingEps': 5.0}
+        dates = pd.date_range(end=pd.Timestamp.now(), periods=24, freq='91D')
+        provider.dividends.return_value = pd.Series(np.linspace(0.5, 0.7, 24), index=dates)
+        analyzer = DividendAnalyzer(store=market_store, provider=provider)
+        
+        metrics = analyzer.get_all_metrics('KO')
+        
+        assert provider.info.call_count == 1
+        assert provider.dividends.call_count == 1
+        assert metrics['payout_ratio'] == 0.4
+        assert metrics['dividend_growth_5y'] > 0
+        assert metrics['dividend_streak'] >= 5
+        assert metrics['safety']['breakdown']['payout_ratio']['value'] == 0.4
+        assert metrics['safety']['breakdown']['dividend_streak']['value'] == metrics['dividend_streak']
@@ -7,13 +7,15 @@ DividendEngine 테스트
 import pytest
 import os
 import json
+import time
+import numpy as np
 import sys
 from unittest.mock import Mock, patch, MagicMock
 
 # 프로젝트 루트를 경로에 추가
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
-from us_market.dividend.engine import DividendEngine, OPTIMIZE_MODES
+from us_market.dividend.engine import DividendEngine, OPTIMIZE_MODES, SharedEngine, get_engine
 
 
 class TestDividendEngine:
@@ -237,3 +239,386 @@ class TestDividendEngine:
                 for value in chart_data:
                     assert isinstance(value, (int, float))
                     assert value >= 0
+
+
+class TestSharedEngine:
+    """공유 엔진 스냅샷 / mtime 기반 핫 리로드 테스트"""
+    
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        """원본 설정/데이터를 임시 디렉토리로 복사"""
+        import shutil
+        shutil.copytree('us_market/dividend/config', tmp_path / 'config')
+        shutil.copytree('us_market/dividend/data', tmp_path / 'data')
+        return str(tmp_path)
+    
+    def test_get_returns_same_snapshot(self, data_dir):
+        """변경이 없으면 같은 스냅샷을 재사용"""
+        shared = SharedEngine(data_dir, poll_interval=0)
+        first = shared.get()
+        assert shared.get() is first
+        assert shared.reload_if_changed() is False
+        assert shared.get() is first
+    
+    def test_reload_on_mtime_change(self, data_dir):
+        """파일 변경 시 새 스냅샷으로 교체, 기존 스냅샷은 그대로 유지"""
+        shared = SharedEngine(data_dir, poll_interval=0)
+        old = shared.get()
+        plans_path = os.path.join(data_dir, 'config', 'dividend_plans.json')
+        with open(plans_path, 'r', encoding='utf-8') as f:
+            plans = json.load(f)
+        plans['themes'] = plans['themes'][:1]
+        with open(plans_path, 'w', encoding='utf-8') as f:
+            json.dump(plans, f, ensure_ascii=False)
+        os.utime(plans_path, ns=(1, 1))
+        
+        assert shared.reload_if_changed() is True
+        new = shared.get()
+        assert new is not old
+        assert len(new.plans['themes']) == 1
+        assert len(old.plans['themes']) == 10
+    
+    def test_binary_snapshot_preferred(self, data_dir):
+        """최신 .npz 스냅샷이 있으면 JSON 대신 사용하고 결과는 동일"""
+        from us_market.dividend.universe import write_universe_snapshot
+        from_json = DividendEngine(data_dir)
+        write_universe_snapshot(
+            os.path.join(data_dir, 'data', 'dividend_universe.npz'), from_json.dividend_data
+        )
+        from_npz = DividendEngine(data_dir)
+        assert from_npz._snapshot is not None
+        assert from_npz._dividend_data is None
+        assert from_npz.get_themes()['meta'] == from_json.get_themes()['meta']
+        
+        theme_id = from_json.plans['themes'][0]['id']
+        assert from_npz.generate_portfolio(theme_id, 'balanced') == from_json.generate_portfolio(theme_id, 'balanced')
+        assert set(from_npz.dividend_data) == set(from_json.dividend_data)
+    
+    def test_prime_and_watcher_run_off_request_path(self, data_dir):
+        """시작 시 백그라운드 빌드, 감시 스레드가 만료된 대체 플랜 재시도"""
+        shared = SharedEngine(data_dir, poll_interval=0.01)
+        try:
+            with patch.object(DividendEngine, 'refresh_fallbacks') as mock_refresh:
+                shared.prime()
+                deadline = time.monotonic() + 30
+                while not mock_refresh.called and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            assert shared._engine is not None
+            assert shared.get() is shared._engine
+            mock_refresh.assert_called()
+        finally:
+            shared.stop()
+    
+    def test_get_engine_is_shared(self):
+        """get_engine은 프로세스 전역 스냅샷을 반환"""
+        assert get_engine() is get_engine()
+
+
+class TestEligibility:
+    """태그 역색인 기반 유니버스 필터링 테스트"""
+    
+    @pytest.fixture
+    def engine(self):
+        return DividendEngine(data_dir='us_market/dividend')
+    
+    def test_filter_matches_tag_scan(self, engine):
+        """마스크 결과가 태그 목록 스캔 결과와 동일"""
+        for theme in engine.plans['themes']:
+            for tier_config in theme['tiers'].values():
+                allowed = tier_config.get('allowed_tags', [])
+                banned = tier_config.get('banned_tags', [])
+                expected = {
+                    s for s, tags in engine.symbol_tags.items()
+                    if s in engine.dividend_data
+                    and any(t in tags for t in allowed)
+                    and not any(t in tags for t in banned)
+                }
+                assert set(engine._filter_universe(allowed, banned)) == expected
+    
+    def test_eligible_rows_memoized(self, engine):
+        """(theme, tier)별 적격 집합은 한 번만 계산"""
+        theme = engine.plans['themes'][0]
+        tier_config = theme['tiers']['balanced']
+        first = engine._eligible_rows(theme['id'], 'balanced', tier_config)
+        assert engine._eligible_rows(theme['id'], 'balanced', tier_config) is first
+        assert len(first) > 0
+
+
+class TestPlanCache:
+    """목표 금액과 무관한 포트폴리오 플랜 캐시 테스트"""
+    
+    @pytest.fixture
+    def engine(self):
+        return DividendEngine(data_dir='us_market/dividend')
+    
+    def test_target_change_rescales_cached_plan(self, engine):
+        """목표/환율이 바뀌어도 가중치는 재사용되고 자본은 선형 스케일"""
+        theme_id = engine.plans['themes'][0]['id']
+        base = engine.generate_portfolio(theme_id, 'balanced', target_monthly_krw=1000000)
+        assert len(engine._plan_cache) == 1
+        
+        doubled = engine.generate_portfolio(theme_id, 'balanced', target_monthly_krw=2000000)
+        other_fx = engine.generate_portfolio(theme_id, 'balanced', fx_rate=1300)
+        assert len(engine._plan_cache) == 1
+        
+        assert [a['weight'] for a in doubled['allocation']] == [a['weight'] for a in base['allocation']]
+        assert doubled['required_capital_krw'] == pytest.approx(2 * base['required_capital_krw'], abs=2)
+        assert other_fx['required_capital_krw'] == pytest.approx(base['required_capital_krw'], abs=2)
+    
+    def test_optimizer_runs_once_per_plan(self, engine):
+        """최적화 모드는 목표 금액이 바뀌어도 한 번만 실행"""
+        from us_market.dividend.analysis.portfolio_optimizer import PortfolioOptimizer
+        theme_id = engine.plans['themes'][0]['id']
+        with patch.object(PortfolioOptimizer, 'optimize',
+                          side_effect=lambda tickers, **kwargs: [(t, 1 / 3) for t in tickers[:3]]) as mock_optimize:
+            for target in (500000, 1000000, 3000000):
+                result = engine.generate_portfolio(
+                    theme_id, 'balanced', target_monthly_krw=target, optimize_mode='risk_parity'
+                )
+                assert 'error' not in result
+                assert result['optimize_mode'] == 'risk_parity'
+        assert mock_optimize.call_count == 1
+    
+    def test_optimizer_fallback_reported_and_retried(self, engine):
+        """최적화 실패 시 greedy 대체를 응답에 표시하고, TTL 후 요청 경로 밖에서 최적화 재시도"""
+        from us_market.dividend.analysis.portfolio_optimizer import PortfolioOptimizer
+        from us_market.dividend.engine import FALLBACK_PLAN_TTL
+        theme_id = engine.plans['themes'][0]['id']
+        with patch.object(PortfolioOptimizer, 'optimize', return_value=None) as mock_optimize, \
+                patch('us_market.dividend.engine.time.monotonic', return_value=1000.0) as mock_clock:
+            result = engine.generate_portfolio(theme_id, 'balanced', optimize_mode='risk_parity')
+            assert result['optimize_mode'] == 'greedy'
+            assert result['requested_optimize_mode'] == 'risk_parity'
+            assert engine.refresh_fallbacks() == 0
+            
+            # 만료된 대체 플랜도 요청은 그대로 받고 최적화기를 돌리지 않음
+            mock_clock.return_value = 1000.0 + FALLBACK_PLAN_TTL
+            result = engine.generate_portfolio(theme_id, 'balanced', optimize_mode='risk_parity')
+            assert result['optimize_mode'] == 'greedy'
+            assert mock_optimize.call_count == 1
+            
+            mock_optimize.side_effect = lambda tickers, **kwargs: [(t, 1 / len(tickers)) for t in tickers]
+            assert engine.refresh_fallbacks() == 1
+            assert mock_optimize.call_count == 2
+            assert engine.refresh_fallbacks() == 0
+            
+            result = engine.generate_portfolio(theme_id, 'balanced', optimize_mode='risk_parity')
+            assert result['optimize_mode'] == 'risk_parity'
+            assert mock_optimize.call_count == 2
+            assert engine._fallback_expiry == {}
+
+    def test_unsupported_modes_are_permanent_greedy(self, engine):
+        """최적화기가 풀지 못하는 모드는 수익률을 가져오지 않고 만료 없는 greedy 플랜"""
+        from us_market.dividend.analysis.portfolio_optimizer import PortfolioOptimizer
+        from us_market.dividend.engine import FALLBACK_PLAN_TTL, OPTIMIZER_MODES
+        theme_id = engine.plans['themes'][0]['id']
+        
+        unsupported = [m for m in OPTIMIZE_MODES if m != 'greedy' and m not in OPTIMIZER_MODES]
+        assert unsupported == ['mean_variance', 'min_vol']
+        for mode in unsupported:
+            assert PortfolioOptimizer().optimize(['A', 'B', 'C'], method=mode, returns_df=Mock()) is None
+        
+        with patch('us_market.dividend.engine.SharedReturns.fetch') as mock_fetch, \
+                patch.object(PortfolioOptimizer, '_get_returns') as mock_returns, \
+                patch('us_market.dividend.engine.time.monotonic', return_value=1000.0) as mock_clock:
+            results = engine.generate_all_tiers(theme_id, optimize_mode='min_vol')
+            engine.build_catalog(['greedy', 'mean_variance'])
+            plans = dict(engine._plan_cache)
+            
+            mock_clock.return_value = 1000.0 + 10 * FALLBACK_PLAN_TTL
+            engine.generate_portfolio(theme_id, 'balanced', optimize_mode='min_vol')
+        
+        mock_fetch.assert_not_called()
+        mock_returns.assert_not_called()
+        assert all(r['optimize_mode'] == 'greedy' for r in results.values())
+        assert engine._plan_cache == plans
+        assert engine._fallback_expiry == {}
+
+
+class TestCatalog:
+    """테마 × 티어 × 모드 카탈로그 사전 계산 테스트"""
+    
+    @pytest.fixture
+    def engine(self):
+        return DividendEngine(data_dir='us_market/dividend')
+    
+    def test_build_catalog_fills_plan_cache(self, engine):
+        """모든 조합을 계산하고 리포트를 남김"""
+        report = engine.build_catalog(['greedy'])
+        n_tiers = sum(len(t['tiers']) for t in engine.plans['themes'])
+        assert report['total_combos'] == n_tiers
+        assert report['ok'] + report['fallback'] + report['failed'] == n_tiers
+        assert engine.catalog_report is report
+        assert len(engine._plan_cache) == n_tiers - report['failed']
+        for entry in report['combos'].values():
+            assert entry['seconds'] >= 0
+    
+    def test_build_catalog_fetches_returns_once(self, engine):
+        """비-greedy 모드는 후보 합집합의 수익률을 한 번만 가져오고 공유"""
+        from us_market.dividend.analysis.portfolio_optimizer import PortfolioOptimizer
+        import pandas as pd
+        
+        rng = np.random.default_rng(0)
+        dates = pd.date_range('2024-01-01', periods=120, freq='B')
+        
+        def fake_returns(self, ticker, period='1y'):
+            return pd.Series(rng.normal(0.0005, 0.01, len(dates)), index=dates)
+        
+        with patch.object(PortfolioOptimizer, '_get_returns', autospec=True, side_effect=fake_returns) as mock_returns:
+            report = engine.build_catalog(['greedy', 'risk_parity'])
+        
+        fetched = [c.args[1] for c in mock_returns.call_args_list]
+        assert len(fetched) == len(set(fetched))
+        assert report['failed'] == 0
+        assert any(c['status'] == 'ok' for k, c in report['combos'].items() if k.endswith('/risk_parity'))
+        
+        # 카탈로그 이후 요청은 최적화를 다시 실행하지 않음
+        theme_id = engine.plans['themes'][0]['id']
+        with patch.object(PortfolioOptimizer, 'optimize') as mock_optimize:
+            result = engine.generate_portfolio(theme_id, 'balanced', optimize_mode='risk_parity')
+        assert 'error' not in result
+        mock_optimize.assert_not_called()
+
+
+class TestAllTiers:
+    """전 티어 동시 생성 및 수익률 공유 테스트"""
+    
+    @pytest.fixture
+    def engine(self):
+        return DividendEngine(data_dir='us_market/dividend')
+    
+    def test_all_tiers_share_one_fetch(self, engine):
+        """세 티어 후보의 합집합을 한 번만 가져오고 각 티어가 슬라이스"""
+        from us_market.dividend.analysis.portfolio_optimizer import PortfolioOptimizer
+        import pandas as pd
+        
+        dates = pd.date_range('2024-01-01', periods=120, freq='B')
+        
+        def fake_returns(self, ticker, period='1y'):
+            rng = np.random.default_rng(abs(hash(ticker)) % (2 ** 32))
+            return pd.Series(rng.normal(0.0005, 0.01, len(dates)), index=dates)
+        
+        theme_id = engine.plans['themes'][0]['id']
+        with patch.object(PortfolioOptimizer, '_get_returns', autospec=True, side_effect=fake_returns) as mock_returns:
+            results = engine.generate_all_tiers(theme_id, optimize_mode='max_sharpe')
+        
+        fetched = [c.args[1] for c in mock_returns.call_args_list]
+        assert len(fetched) == len(set(fetched))
+        assert set(results) == {'defensive', 'balanced', 'aggressive'}
+        for result in results.values():
+            assert 'error' not in result
+            assert result['optimize_mode'] == 'max_sharpe'
+        
+        # 플랜이 캐시된 후에는 다시 가져오지 않음
+        with patch.object(PortfolioOptimizer, '_get_returns') as mock_returns:
+            engine.generate_all_tiers(theme_id, optimize_mode='max_sharpe', target_monthly_krw=2000000)
+        mock_returns.assert_not_called()
+
+
+class TestGreedyAllocator:
+    """제약 조건을 지키는 greedy 할당기 테스트"""
+    
+    @pytest.fixture
+    def engine(self):
+        return DividendEngine(data_dir='us_market/dividend')
+    
+    def test_all_tiers_respect_constraints(self, engine):
+        """모든 테마/티어에서 ETF 최소, 단일 종목, 섹터, 태그 상한을 준수"""
+        cols = engine.columns
+        tol = 1e-6
+        for theme in engine.plans['themes']:
+            for tier_id, tier_config in theme['tiers'].items():
+                c = tier_config['constraints']
+                eligible = engine._eligible_rows(theme['id'], tier_id, tier_config)
+                rows, weights = engine._greedy_allocate(eligible, c)
+                assert weights.sum() == pytest.approx(1.0)
+                assert len(set(rows.tolist())) == len(rows)
+                
+                etf = cols.is_etf[rows]
+                assert weights[etf].sum() >= min(c['etf_min'], 0.25 * etf.sum()) - tol
+                assert (weights[etf] <= 0.25 + tol).all()
+                assert (weights[~etf] <= c['single_stock_max'] + tol).all()
+                
+                sectors = np.bincount(cols.sector[rows[~etf]], weights=weights[~etf])
+                assert (sectors <= c['sector_cap'] + tol).all()
+                for tag, cap in c['max_tag_weight'].items():
+                    mask = engine.tag_index.masks.get(tag)
+                    if mask is not None:
+                        assert weights[mask[rows]].sum() <= cap + tol
+    
+    def test_tag_cap_limits_selection(self, engine):
+        """태그 상한이 낮으면 해당 태그 비중이 상한에 묶임"""
+        theme = engine.plans['themes'][0]
+        tier_config = theme['tiers']['aggressive']
+        eligible = engine._eligible_rows(theme['id'], 'aggressive', tier_config)
+        constraints = dict(tier_config['constraints'], max_tag_weight={'covered_call': 0.1})
+        rows, weights = engine._greedy_allocate(eligible, constraints)
+        mask = engine.tag_index.masks['covered_call']
+        assert weights[mask[rows]].sum() <= 0.1 + 1e-9
+
+    def test_short_fill_leaves_cash(self, engine):
+        """유니버스가 작아 100%를 채우지 못하면 비중을 키우지 않고 현금으로 남김"""
+        theme = engine.plans['themes'][0]
+        tier_config = theme['tiers']['balanced']
+        cols = engine.columns
+        eligible = engine._eligible_rows(theme['id'], 'balanced', tier_config)
+        stocks = eligible[~cols.is_etf[eligible]][:3]
+        max_weight = tier_config['constraints']['single_stock_max']
+        
+        with patch.object(engine, '_eligible_rows', return_value=stocks):
+            result = engine.generate_portfolio(theme['id'], 'balanced')
+        
+        assert 'error' not in result
+        weights = [item['weight'] for item in result['allocation']]
+        assert max(weights) <= round(max_weight * 100, 1)
+        assert result['fully_invested'] is False
+        assert result['cash']['weight'] == pytest.approx(100 - sum(weights), abs=0.2)
+        
+        plan = engine._plan_cache[(theme['id'], 'balanced', 'greedy', engine.version)]
+        assert plan.cash_weight == pytest.approx(1 - plan.weights.sum())
+        capital_usd = result['required_capital_krw'] / 1420
+        invested = sum(item['amount_usd'] for item in result['allocation'])
+        assert invested + result['cash']['amount_usd'] == pytest.approx(capital_usd, rel=1e-3)
+
+
+class TestSweep:
+    """목표 금액 × 환율 × 세율 시나리오 스윕 테스트"""
+    
+    @pytest.fixture
+    def engine(self):
+        return DividendEngine(data_dir='us_market/dividend')
+    
+    def test_sweep_matches_generate_portfolio(self, engine):
+        """그리드의 각 셀이 개별 generate_portfolio 결과와 일치"""
+        theme_id = engine.plans['themes'][0]['id']
+        targets, fx_rates, tax_rates = [500000, 1000000], [1300, 1420, 1500], [0.0, 0.154]
+        result = engine.sweep(theme_id, 'balanced', targets, fx_rates, tax_rates)
+        assert 'error' not in result
+        assert np.array(result['required_capital_krw']).shape == (2, 3, 2)
+        assert np.array(result['monthly_flow_krw']).shape == (2, 3, 2, 12)
+        
+        for i, target in enumerate(targets):
+            for j, fx in enumerate(fx_rates):
+                for k, tax in enumerate(tax_rates):
+                    single = engine.generate_portfolio(
+                        theme_id, 'balanced', target_monthly_krw=target, fx_rate=fx, tax_rate=tax
+                    )
+                    assert result['required_capital_krw'][i][j][k] == pytest.approx(single['required_capital_krw'], abs=1)
+                    assert result['expected_monthly_krw'][i][j][k] == pytest.approx(single['expected_monthly_krw'], abs=1)
+                    assert result['monthly_flow_krw'][i][j][k] == pytest.approx(single['chart_data'], abs=1)
+        assert len(engine._plan_cache) == 1
+    
+    def test_sweep_rejects_oversized_grid(self, engine):
+        """셀 수 상한 초과 시 에러"""
+        theme_id = engine.plans['themes'][0]['id']
+        result = engine.sweep(theme_id, 'balanced', np.arange(100), np.arange(1, 11), np.linspace(0, 0.5, 11))
+        assert 'error' in result
+
+    def test_sweep_rejects_out_of_range(self, engine):
+        """환율 <= 0, 세율 [0, 1) 밖, 음수 목표는 에러"""
+        theme_id = engine.plans['themes'][0]['id']
+        for kwargs in ({'fx_rate': [0]}, {'fx_rate': [-1, 1420]}, {'tax_rate': [1.0]},
+                       {'tax_rate': [-0.1]}, {'target_monthly_krw': [-1]},
+                       {'target_monthly_krw': [np.nan]}):
+            assert 'error' in engine.sweep(theme_id, 'balanced', **kwargs)
+        assert engine._plan_cache == {}
@@ -0,0 +1,110 @@
+"""
+FetchController 테스트
+- 토큰 버킷 속도 제한
+- 지수 백오프 재시도 및 오류 분류
+- AIMD 동시성 조절
+- 실행 통계
+"""
+import pytest
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.fetch_control import (
+    AdaptiveConcurrency, FetchController, FetchError, TokenBucket, classify_error,
+    RATE_LIMITED, NETWORK, ERROR
+)
+
+
+class YFRateLimitError(Exception):
+    """yfinance 속도 제한 예외와 같은 이름의 모의 예외"""
+
+
+class TestFetchControl:
+    """fetch_control 모듈 테스트"""
+    
+    def test_classify_error(self):
+        """예외를 rate_limited / network / error 원인으로 분류"""
+        assert classify_error(YFRateLimitError("Too Many Requests. Rate limited.")) == RATE_LIMITED
+        assert classify_error(Exception("HTTP Error 429")) == RATE_LIMITED
+        assert classify_error(ConnectionError("reset by peer")) == NETWORK
+        assert classify_error(TimeoutError()) == NETWORK
+        assert classify_error(KeyError('currentPrice')) == ERROR
+    
+    def test_token_bucket_limits_rate(self):
+        """버스트 이후에는 초당 rate 개로 제한"""
+        bucket = TokenBucket(rate=50, capacity=5)
+        start = time.monotonic()
+        for _ in range(15):
+            bucket.acquire()
+        # 5개는 버스트, 나머지 10개는 50/s → 약 0.2초
+        assert time.monotonic() - start >= 0.18
+    
+    def test_retries_throttling_then_succeeds(self):
+        """속도 제한은 재시도하고 동시성은 절반으로 감소"""
+        controller = FetchController(rate=None, initial_concurrency=8, base_delay=0)
+        calls = []
+        
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise YFRateLimitError("Too Many Requests")
+            return 'ok'
+        
+        assert controller.call(flaky) == 'ok'
+        report = controller.report()
+        assert report['requests'] == 3
+        assert report['retries'] == 2
+        assert report['throttles'] == 2
+        # 쿨다운 동안 연속된 429는 한 번만 감소
+        assert report['concurrency']['final'] == 4
+    
+    def test_non_retryable_error_raises_immediately(self):
+        """일반 오류는 재시도 없이 FetchError"""
+        controller = FetchController(rate=None, base_delay=0)
+        
+        def broken():
+            raise KeyError('currentPrice')
+        
+        with pytest.raises(FetchError) as exc_info:
+            controller.call(broken)
+        assert exc_info.value.cause == ERROR
+        assert controller.report()['retries'] == 0
+    
+    def test_retries_exhausted(self):
+        """재시도 한도 초과 시 마지막 원인으로 FetchError"""
+        controller = FetchController(rate=None, max_retries=2, base_delay=0)
+        
+        def down():
+            raise ConnectionError("refused")
+        
+        with pytest.raises(FetchError) as exc_info:
+            controller.call(down)
+        assert exc_info.value.cause == NETWORK
+        assert controller.report()['requests'] == 3
+    
+    def test_aimd_grows_on_success(self):
+        """성공이 쌓이면 동시성 한도가 1씩 증가 (최대값 제한)"""
+        concurrency = AdaptiveConcurrency(initial=2, maximum=4)
+        # 2 → 2.5 → 2.9 → 3.24: 한도만큼의 성공마다 약 +1
+        for _ in range(3):
+            concurrency.on_success()
+        assert int(concurrency.limit) == 3
+        for _ in range(50):
+            concurrency.on_success()
+        assert int(concurrency.limit) == 4
+        assert concurrency.peak == 4
+        concurrency.on_throttle()
+        assert int(concurrency.limit) == 2
+    
+    def test_report_failures_by_cause(self):
+        """실패 원인별 집계와 유효 처리량"""
+        controller = FetchController(rate=None)
+        controller.stats.record_failure('AAA', RATE_LIMITED)
+        controller.stats.record_failure('BBB', 'no_dividends')
+        controller.stats.record_failure('CCC', 'no_dividends')
+        report = controller.report()
+        assert report['failures_by_cause'] == {RATE_LIMITED: 1, 'no_dividends': 2}
+        assert report['effective_rps'] == 0.0
@@ -9,6 +9,7 @@ import sys
 import os
 from unittest.mock import Mock, patch, MagicMock
 import json
+import numpy as np
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
@@ -43,12 +44,12 @@ class TestFlaskAPI:
     
     def test_get_dividend_themes(self, client):
         """배당 테마 목록 조회 API 테스트"""
-        with patch('us_market.dividend.engine.DividendEngine') as mock_engine_class:
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine:
             mock_engine = Mock()
             mock_engine.get_themes.return_value = [
                 {'id': 'test_theme', 'title': 'Test Theme', 'subtitle': 'Test'}
             ]
-            mock_engine_class.return_value = mock_engine
+            mock_get_engine.return_value = mock_engine
             
             response = client.get('/api/dividend/themes')
             assert response.status_code == 200
@@ -57,8 +58,8 @@ class TestFlaskAPI:
     
     def test_get_dividend_themes_error(self, client):
         """배당 테마 목록 조회 에러 핸들링"""
-        with patch('us_market.dividend.engine.DividendEngine') as mock_engine_class:
-            mock_engine_class.side_effect = Exception('Test error')
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine:
+            mock_get_engine.side_effect = Exception('Test error')
             
             response = client.get('/api/dividend/themes')
             assert response.status_code == 500
@@ -67,15 +68,18 @@ class TestFlaskAPI:
     
     def test_get_all_tier_portfolios(self, client):
         """모든 티어 포트폴리오 생성 API 테스트"""
-        with patch('us_market.dividend.engine.DividendEngine') as mock_engine_class:
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine:
             mock_engine = Mock()
-            mock_engine.generate_portfolio.return_value = {
-                'theme_id': 'test',
-                'tier_id': 'balanced',
-                'required_capital_krw': 10000000,
-                'allocation': []
+            mock_engine.generate_all_tiers.return_value = {
+                tier: {
+                    'theme_id': 'test',
+                    'tier_id': tier,
+                    'required_capital_krw': 10000000,
+                    'allocation': []
+                }
+                for tier in ['defensive', 'balanced', 'aggressive']
             }
-            mock_engine_class.return_value = mock_engine
+            mock_get_engine.return_value = mock_engine
             
             response = client.post(
                 '/api/dividend/all-tiers',
@@ -94,18 +98,23 @@ class TestFlaskAPI:
             assert 'defensive' in data
             assert 'balanced' in data
             assert 'aggressive' in data
+            mock_engine.generate_all_tiers.assert_called_once_with(
+                'max_monthly_income',
+                target_monthly_krw=1000000.0,
+                fx_rate=1420.0,
+                tax_rate=pytest.approx(0.154),
+                optimize_mode='greedy'
+            )
     
     def test_get_all_tier_portfolios_default_params(self, client):
         """기본 파라미터로 포트폴리오 생성"""
-        with patch('us_market.dividend.engine.DividendEngine') as mock_engine_class:
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine:
             mock_engine = Mock()
-            mock_engine.generate_portfolio.return_value = {
-                'theme_id': 'max_monthly_income',
-                'tier_id': 'balanced',
-                'required_capital_krw': 10000000,
-                'allocation': []
+            mock_engine.generate_all_tiers.return_value = {
+                tier: {'theme_id': 'max_monthly_income', 'tier_id': tier, 'allocation': []}
+                for tier in ['defensive', 'balanced', 'aggressive']
             }
-            mock_engine_class.return_value = mock_engine
+            mock_get_engine.return_value = mock_engine
             
             response = client.post(
                 '/api/dividend/all-tiers',
@@ -115,8 +124,10 @@ class TestFlaskAPI:
             assert response.status_code == 200
     
     def test_get_dividend_risk_metrics(self, client):
-        """배당 리스크 메트릭 조회 API 테스트"""
-        with patch('us_market.dividend.risk_analytics.RiskAnalytics') as mock_risk_class:
+        """유니버스 밖 티커는 실시간 계산으로 대체"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine, \
+                patch('us_market.dividend.analysis.risk_analytics.RiskAnalytics') as mock_risk_class:
+            mock_get_engine.return_value.get_analytics.return_value = None
             mock_risk = Mock()
             mock_risk.get_all_risk_metrics.return_value = {
                 'ticker': 'AAPL',
@@ -134,8 +145,9 @@ class TestFlaskAPI:
             assert 'risk_grade' in data
     
     def test_get_dividend_risk_metrics_with_period(self, client):
-        """기간 파라미터 포함 리스크 메트릭 조회"""
-        with patch('us_market.dividend.risk_analytics.RiskAnalytics') as mock_risk_class:
+        """기본 외 기간은 사전 계산 없이 실시간 계산"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine, \
+                patch('us_market.dividend.analysis.risk_analytics.RiskAnalytics') as mock_risk_class:
             mock_risk = Mock()
             mock_risk.get_all_risk_metrics.return_value = {
                 'ticker': 'AAPL',
@@ -147,10 +159,90 @@ class TestFlaskAPI:
             
             response = client.get('/api/dividend/risk-metrics/AAPL?period=2y')
             assert response.status_code == 200
+            mock_get_engine.return_value.get_analytics.assert_not_called()
+            mock_risk.get_all_risk_metrics.assert_called_once_with('AAPL', '2y')
+    
+    def test_get_dividend_risk_metrics_precomputed(self, client):
+        """유니버스 티커는 사전 계산된 값을 조회 (실시간 계산 없음)"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine, \
+                patch('us_market.dividend.analysis.risk_analytics.RiskAnalytics') as mock_risk_class:
+            mock_get_engine.return_value.get_analytics.return_value = {
+                'ticker': 'SCHD',
+                'volatility_annual': 0.12,
+                'max_drawdown': -0.10,
+                'sharpe_ratio': 0.8
+            }
+            
+            response = client.get('/api/dividend/risk-metrics/SCHD')
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert data['volatility_annual'] == 0.12
+            assert data['risk_grade'] == 'A'
+            mock_get_engine.return_value.get_analytics.assert_called_once_with('SCHD', 'risk')
+            mock_risk_class.assert_not_called()
+    
+    def test_get_dividend_risk_metrics_with_benchmark(self, client):
+        """기본 외 벤치마크는 사전 계산 없이 해당 벤치마크로 계산"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine, \
+                patch('us_market.dividend.analysis.risk_analytics.RiskAnalytics') as mock_risk_class:
+            mock_risk_class.return_value.get_all_risk_metrics.return_value = {
+                'ticker': 'SCHD', 'volatility_annual': 0.12, 'max_drawdown': -0.1, 'sharpe_ratio': 0.8, 'beta': 0.7
+            }
+            
+            response = client.get('/api/dividend/risk-metrics/SCHD?benchmark=vti')
+            assert response.status_code == 200
+            assert json.loads(response.data)['beta'] == 0.7
+            mock_get_engine.return_value.get_analytics.assert_not_called()
+            mock_risk_class.assert_called_once_with(benchmark='VTI')
+    
+    def test_bulk_risk_metrics(self, client):
+        """여러 티커 리스크 일괄 조회: 사전 계산 + 나머지는 한 번에 배치 계산"""
+        precomputed = {'SCHD': {'ticker': 'SCHD', 'volatility_annual': 0.12, 'max_drawdown': -0.1, 'sharpe_ratio': 0.8}}
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine, \
+                patch('us_market.dividend.analysis.risk_analytics.RiskAnalytics') as mock_risk_class:
+            mock_get_engine.return_value.get_analytics.side_effect = lambda t, section: precomputed.get(t)
+            mock_risk_class.return_value.get_risk_metrics_batch.return_value = {
+                'AAPL': {'ticker': 'AAPL', 'volatility_annual': 0.3, 'max_drawdown': -0.4, 'sharpe_ratio': 0.5},
+                'MSFT': {'ticker': 'MSFT', 'volatility_annual': None, 'max_drawdown': None, 'sharpe_ratio': None},
+            }
+            
+            response = client.post('/api/dividend/risk-metrics', json={'tickers': ['schd', 'AAPL', 'MSFT', 'AAPL']})
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert set(data['metrics']) == {'SCHD', 'AAPL', 'MSFT'}
+            assert data['metrics']['SCHD']['risk_grade'] == 'A'
+            assert data['metrics']['AAPL']['risk_grade'] == 'C'
+            assert data['metrics']['MSFT']['risk_grade'] == 'N/A'
+            mock_risk_class.return_value.get_risk_metrics_batch.assert_called_once_with(['AAPL', 'MSFT'], '1y')
+    
+    def test_bulk_risk_metrics_get_with_period(self, client):
+        """GET 쿼리 형식, 기본 외 기간은 전부 배치 계산"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine, \
+                patch('us_market.dividend.analysis.risk_analytics.RiskAnalytics') as mock_risk_class:
+            mock_risk_class.return_value.get_risk_metrics_batch.return_value = {
+                t: {'ticker': t, 'volatility_annual': 0.2, 'max_drawdown': -0.3, 'sharpe_ratio': 1.0}
+                for t in ['SCHD', 'JEPI']
+            }
+            
+            response = client.get('/api/dividend/risk-metrics?tickers=SCHD,JEPI&period=2y')
+            assert response.status_code == 200
+            assert json.loads(response.data)['period'] == '2y'
+            mock_get_engine.return_value.get_analytics.assert_not_called()
+            mock_risk_class.return_value.get_risk_metrics_batch.assert_called_once_with(['SCHD', 'JEPI'], '2y')
+    
+    def test_bulk_risk_metrics_invalid(self, client):
+        """티커 누락, 개수 초과 시 400"""
+        assert client.post('/api/dividend/risk-metrics', json={}).status_code == 400
+        assert client.get('/api/dividend/risk-metrics').status_code == 400
+        assert client.post('/api/dividend/risk-metrics', json={'tickers': 'SCHD'}).status_code == 400
+        too_many = [f'T{i}' for i in range(201)]
+        assert client.post('/api/dividend/risk-metrics', json={'tickers': too_many}).status_code == 400
     
     def test_get_dividend_sustainability(self, client):
-        """배당 지속가능성 분석 API 테스트"""
-        with patch('us_market.dividend.dividend_analyzer.DividendAnalyzer') as mock_analyzer_class:
+        """배당 지속가능성 분석 API 테스트 (실시간 계산 대체)"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine, \
+                patch('us_market.dividend.analysis.dividend_analyzer.DividendAnalyzer') as mock_analyzer_class:
+            mock_get_engine.return_value.get_analytics.return_value = None
             mock_analyzer = Mock()
             mock_analyzer.get_all_metrics.return_value = {
                 'payout_ratio': 0.5,
@@ -169,9 +261,25 @@ class TestFlaskAPI:
             assert 'payout_ratio' in data
             assert 'safety' in data
     
+    def test_get_dividend_sustainability_precomputed(self, client):
+        """유니버스 티커의 지속가능성은 사전 계산된 값을 조회"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine, \
+                patch('us_market.dividend.analysis.dividend_analyzer.DividendAnalyzer') as mock_analyzer_class:
+            mock_get_engine.return_value.get_analytics.return_value = {
+                'payout_ratio': 0.6,
+                'dividend_growth_5y': 0.1,
+                'dividend_streak': 12,
+                'safety': {'safety_score': 80, 'safety_grade': 'A'}
+            }
+            
+            response = client.get('/api/dividend/sustainability/SCHD')
+            assert response.status_code == 200
+            assert json.loads(response.data)['dividend_streak'] == 12
+            mock_analyzer_class.assert_not_called()
+    
     def test_optimize_dividend_advanced(self, client):
         """고급 포트폴리오 최적화 API 테스트"""
-        with patch('us_market.dividend.engine.DividendEngine') as mock_engine_class:
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine:
             mock_engine = Mock()
             mock_engine.generate_portfolio.return_value = {
                 'theme_id': 'max_monthly_income',
@@ -180,7 +288,7 @@ class TestFlaskAPI:
                 'allocation': [],
                 'optimize_mode': 'risk_parity'
             }
-            mock_engine_class.return_value = mock_engine
+            mock_get_engine.return_value = mock_engine
             
             response = client.post(
                 '/api/dividend/optimize-advanced',
@@ -196,6 +304,151 @@ class TestFlaskAPI:
             data = json.loads(response.data)
             assert 'optimize_mode' in data
     
+    def test_sweep_dividend_scenarios(self, client):
+        """시나리오 스윕 API 테스트 (범위 파싱 포함)"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine:
+            mock_engine = Mock()
+            mock_engine.sweep.return_value = {'required_capital_krw': [[[1]]]}
+            mock_get_engine.return_value = mock_engine
+            
+            response = client.post(
+                '/api/dividend/sweep',
+                json={
+                    'theme_id': 'max_monthly_income',
+                    'target_monthly_krw': {'start': 500000, 'stop': 1500000, 'num': 3},
+                    'fx_rate': [1300, 1400],
+                    'tax_rate': 15.4
+                },
+                content_type='application/json'
+            )
+            assert response.status_code == 200
+            kwargs = mock_engine.sweep.call_args.kwargs
+            assert kwargs['target_monthly_krw'].tolist() == [500000, 1000000, 1500000]
+            assert kwargs['fx_rate'].tolist() == [1300, 1400]
+            assert kwargs['tax_rate'].tolist() == pytest.approx([0.154])
+    
+    def test_sweep_invalid_range(self, client):
+        """잘못된 범위 형식은 400"""
+        response = client.post(
+            '/api/dividend/sweep',
+            json={'fx_rate': {'stop': 1500}},
+            content_type='application/json'
+        )
+        assert response.status_code == 400
+    
+    @pytest.mark.parametrize('payload', [
+        {'fx_rate': 0},
+        {'fx_rate': [-1, 1420]},
+        {'tax_rate': 100},
+        {'tax_rate': [-5, 15.4]},
+        {'target_monthly_krw': -1},
+        {'target_monthly_krw': [1e6, float('inf')]},
+        {'target_monthly_krw': {'start': 0, 'stop': 1, 'num': 10 ** 9}},
+        {'target_monthly_krw': {'start': 0, 'stop': 1, 'num': 0}},
+        {'target_monthly_krw': {'start': 0, 'stop': 1, 'num': 100},
+         'fx_rate': {'start': 1000, 'stop': 1500, 'num': 101}},
+    ])
+    def test_sweep_rejects_out_of_range(self, client, payload):
+        """환율 <= 0, 세율 [0, 100) 밖, 음수 목표, 셀 상한 초과는 엔진 호출 전에 400"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine:
+            with patch('flask_app.np.linspace', wraps=np.linspace) as mock_linspace:
+                response = client.post('/api/dividend/sweep', json=payload)
+            assert response.status_code == 400
+            assert 'error' in json.loads(response.data)
+            mock_get_engine.assert_not_called()
+            for call in mock_linspace.call_args_list:
+                assert call.args[2] <= 10000
+    
+    def test_get_dividend_rolling_risk(self, client):
+        """티커 롤링 리스크 시계열 조회, 잘못된 창은 400"""
+        with patch('us_market.dividend.analysis.risk_analytics.RiskAnalytics') as mock_risk_class:
+            mock_risk_class.return_value.get_rolling_risk.return_value = {
+                'ticker': 'SCHD', 'period': '1y', 'windows': [20, 60],
+                'dates': ['2024-01-02'], 'drawdown': [0.0],
+                'volatility': {'20': [None], '60': [None]}, 'sharpe': {'20': [None], '60': [None]}
+            }
+            
+            response = client.get('/api/dividend/risk-rolling/schd?windows=60,20')
+            assert response.status_code == 200
+            assert json.loads(response.data)['windows'] == [20, 60]
+            mock_risk_class.return_value.get_rolling_risk.assert_called_once_with('SCHD', '1y', (60, 20))
+            
+            response = client.get('/api/dividend/risk-rolling/SCHD?windows=1')
+            assert response.status_code == 400
+            response = client.get('/api/dividend/risk-rolling/SCHD?windows=abc')
+            assert response.status_code == 400
+    
+    def test_get_portfolio_rolling_risk(self, client):
+        """포트폴리오 롤링 리스크 조회 및 입력 검증"""
+        with patch('us_market.dividend.analysis.risk_analytics.RiskAnalytics') as mock_risk_class:
+            mock_risk_class.return_value.get_portfolio_rolling_risk.return_value = {'dates': []}
+            
+            response = client.post('/api/dividend/risk-rolling', json={
+                'portfolio': [{'ticker': 'schd', 'weight': 0.6}, {'ticker': 'JEPI', 'weight': 0.4}],
+                'period': '2y'
+            })
+            assert response.status_code == 200
+            args = mock_risk_class.return_value.get_portfolio_rolling_risk.call_args.args
+            assert args[0] == [('SCHD', 0.6), ('JEPI', 0.4)]
+            assert args[1] == '2y'
+        
+        assert client.post('/api/dividend/risk-rolling', json={}).status_code == 400
+        assert client.post('/api/dividend/risk-rolling', json={'portfolio': [{'ticker': 'SCHD'}]}).status_code == 400
+    
+    def test_get_dividend_cache_stats(self, client):
+        """공유 분석 캐시 통계 조회"""
+        from us_market.dividend.cache import get_cache
+        cache = get_cache('price_history')
+        cache.get('MISSING')
+
+        response = client.get('/api/dividend/cache-stats')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['price_history']['misses'] == 1
+        assert 'evictions' in data['price_history']
+        assert 'bytes' in data['price_history']
+
+    def test_get_dividend_catalog_report(self, client):
+        """카탈로그 생성 리포트 조회 API 테스트"""
+        with patch('us_market.dividend.engine.get_engine') as mock_get_engine:
+            mock_engine = Mock()
+            mock_engine.catalog_report = {'total_combos': 150, 'failed': 0, 'combos': {}}
+            mock_get_engine.return_value = mock_engine
+            
+            response = client.get('/api/dividend/catalog')
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert data['total_combos'] == 150
+            
+            mock_engine.catalog_report = None
+            response = client.get('/api/dividend/catalog')
+            assert json.loads(response.data) == {'status': 'not_built'}
+    
+    def test_configure_dividend_engine(self, monkeypatch):
+        """앱 설정 시 카탈로그 모드 등록 (WSGI 진입점 포함)"""
+        from flask_app import configure_dividend_engine
+        from us_market.dividend.engine import OPTIMIZE_MODES
+        with patch('us_market.dividend.engine.configure_engine') as mock_configure:
+            monkeypatch.delenv('DIVIDEND_PRECOMPUTE_MODES')
+            configure_dividend_engine()
+            mock_configure.assert_called_with(precompute_modes=OPTIMIZE_MODES)
+            # 첫 요청 전에 백그라운드에서 카탈로그 빌드 시작
+            mock_configure.return_value.prime.assert_called_once()
+
+            monkeypatch.setenv('DIVIDEND_PRECOMPUTE_MODES', 'greedy, min_vol')
+            configure_dividend_engine()
+            mock_configure.assert_called_with(precompute_modes=['greedy', 'min_vol'])
+
+            monkeypatch.setenv('DIVIDEND_PRECOMPUTE_MODES', 'none')
+            mock_configure.return_value.prime.reset_mock()
+            configure_dividend_engine()
+            mock_configure.assert_called_with(precompute_modes=None)
+            mock_configure.return_value.prime.assert_not_called()
+
+            monkeypatch.setenv('DIVIDEND_PRECOMPUTE_MODES', 'bogus')
+            with pytest.raises(ValueError):
+                configure_dividend_engine()
+    
     def test_run_dividend_backtest(self, client):
         """배당 포트폴리오 백테스트 API 테스트"""
         with patch('us_market.dividend.backtest.BacktestEngine') as mock_backtest_class:
@@ -0,0 +1,147 @@
+"""
+공유 HTTP 세션 테스트
+- 로컬 keep-alive 서버로 연결 재사용 통계 검증 (네트워크 불필요)
+- requests / curl_cffi 백엔드
+- yfinance 공급자에 세션 주입
+"""
+import pytest
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend import http_session
+from us_market.dividend.http_session import (
+    ConnectionStats, PooledSession, get_session, new_session, session_stats, set_session
+)
+from us_market.dividend.providers import RecordingProvider, YFinanceProvider
+
+BACKENDS = ['requests'] + (['curl_cffi'] if http_session.curl_requests is not None else [])
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive 응답"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpSession:
+    """연결 풀 및 재사용 통계 테스트"""
+
+    def test_connection_stats(self):
+        """요청 수 - 새 연결 수 = 재사용 수"""
+        stats = ConnectionStats('requests')
+        stats.record(1, tls_handshake=True)
+        stats.record(0)
+        stats.record(0)
+
+        report = stats.as_dict()
+        assert report['requests'] == 3
+        assert report['new_connections'] == 1
+        assert report['reused'] == 2
+        assert report['reuse_ratio'] == pytest.approx(0.667)
+        assert report['tls_handshakes'] == 1
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_sequential_requests_reuse_connection(self, server_url, backend):
+        """연속 요청은 하나의 keep-alive 연결을 재사용"""
+        session = new_session(backend=backend)
+        for _ in range(5):
+            assert session.get(server_url).status_code == 200
+
+        report = session.stats.as_dict()
+        assert report['backend'] == backend
+        assert report['requests'] == 5
+        assert report['new_connections'] == 1
+        assert report['reused'] == 4
+
+    def test_pool_bounds_connections(self, server_url):
+        """풀 크기를 넘는 동시 요청은 연결을 새로 만들지 않고 대기"""
+        session = PooledSession(pool_size=2)
+        threads = [threading.Thread(target=lambda: [session.get(server_url) for _ in range(5)]) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        report = session.stats.as_dict()
+        assert report['requests'] == 30
+        assert report['new_connections'] <= 2
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_pool_size_bounds_in_flight(self, backend):
+        """백엔드와 무관하게 동시 진행 요청 수는 pool_size 이하"""
+        in_flight = []
+        peak = [0]
+        lock = threading.Lock()
+
+        class SlowHandler(KeepAliveHandler):
+            def do_GET(self):
+                with lock:
+                    in_flight.append(1)
+                    peak[0] = max(peak[0], len(in_flight))
+                threading.Event().wait(0.02)
+                with lock:
+                    in_flight.pop()
+                super().do_GET()
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/'
+        try:
+            session = new_session(pool_size=2, backend=backend)
+            threads = [threading.Thread(target=lambda: [session.get(url) for _ in range(3)]) for _ in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert session.stats.as_dict()['requests'] == 18
+        assert peak[0] <= 2
+
+    def test_process_wide_session(self):
+        """get_session은 프로세스 전역 세션 하나를 공유"""
+        try:
+            set_session(None)
+            assert session_stats() is None
+            assert get_session() is get_session()
+            assert session_stats()['requests'] == 0
+        finally:
+            set_session(None)
+
+    def test_provider_injects_session(self):
+        """YFinanceProvider는 모든 yfinance 호출에 같은 세션 전달"""
+        session = PooledSession()
+        provider = YFinanceProvider(session=session)
+        with patch('us_market.dividend.providers.yf') as mock_yf:
+            provider.info('AAA')
+            provider.history('AAA', start='2024-01-01', end='2024-02-01')
+            provider.download(['AAA', 'BBB'], '2024-01-01')
+
+        assert all(c.kwargs['session'] is session for c in mock_yf.Ticker.call_args_list)
+        assert mock_yf.download.call_args.kwargs['session'] is session
+        assert RecordingProvider(provider, '/unused').connection_stats() == session.stats.as_dict()
@@ -0,0 +1,241 @@
+"""
+DividendDataLoader 테스트
+- 전체/증분 갱신
+- 티커 staleness 판정
+- 배치 다운로드(bulk) 경로 (누락 티커 재조회 포함)
+- 저널 기반 재개
+"""
+import pytest
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch, MagicMock
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.loader import DividendDataLoader
+from us_market.dividend.fetch_control import FetchController
+
+
+def make_result(ticker, last_date='2024-03-15', frequency='Quarterly', price=50.0):
+    """fetch_ticker_data 형태의 모의 결과"""
+    return {
+        'ticker': ticker,
+        'name': f'{ticker} Inc',
+        'sector': 'Utilities',
+        'price': price,
+        'yield': 0.04,
+        'ttm_dividend': 2.0,
+        'frequency': frequency,
+        'last_div': 0.5,
+        'payments': [{'date': last_date, 'amount': 0.5}],
+        'currency': 'USD'
+    }
+
+
+def make_download(tickers, **kwargs):
+    """yf.download(group_by='ticker') 형태의 모의 프레임 (분기 배당)"""
+    days = pd.date_range(end=pd.Timestamp.now().normalize(), periods=300, freq='D')
+    frames = {}
+    for ticker in tickers:
+        divs = np.zeros(len(days))
+        divs[[10, 100, 190, 280]] = 0.5
+        frames[ticker] = pd.DataFrame({'Close': np.full(len(days), 40.0), 'Dividends': divs}, index=days)
+    return pd.concat(frames, axis=1)
+
+
+class TestDividendDataLoader:
+    """DividendDataLoader 클래스 테스트"""
+    
+    @pytest.fixture
+    def loader(self, tmp_path):
+        """임시 디렉토리에 시드 파일을 둔 로더"""
+        seed = [{'symbol': s, 'type': 'STOCK', 'tags': []} for s in ['AAA', 'BBB', 'CCC']]
+        with open(tmp_path / 'universe_seed.json', 'w', encoding='utf-8') as f:
+            json.dump(seed, f)
+        return DividendDataLoader(data_dir=str(tmp_path), analytics=False)
+    
+    def test_loader_initialization(self, loader):
+        """시드 파일에서 티커 로드"""
+        assert loader.tickers == ['AAA', 'BBB', 'CCC']
+    
+    def test_full_fetch_writes_universe_and_state(self, loader):
+        """전체 갱신은 모든 티커를 가져오고 상태 파일을 기록"""
+        with patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: make_result(t)) as mock_fetch:
+            data = loader.fetch_data()
+        assert mock_fetch.call_count == 3
+        assert [t for t in data if not t.startswith('_')] == ['AAA', 'BBB', 'CCC']
+        assert os.path.exists(os.path.join(loader.data_dir, 'dividend_universe.json'))
+        assert os.path.exists(os.path.join(loader.data_dir, 'dividend_universe.npz'))
+        
+        state = loader._load_fetch_state()
+        assert state['AAA']['last_ex_date'] == '2024-03-15'
+        assert state['AAA']['frequency'] == 'Quarterly'
+    
+    def test_is_stale(self, loader):
+        """미수집, 최대 보관 기간 초과, 다음 배당락일 도래 시 stale"""
+        now = datetime(2024, 4, 1)
+        state = {
+            'FRESH': {'fetched_at': '2024-03-30T00:00:00', 'last_ex_date': '2024-03-15', 'frequency': 'Quarterly'},
+            'OLD': {'fetched_at': '2024-03-01T00:00:00', 'last_ex_date': '2024-02-15', 'frequency': 'Quarterly'},
+            'DUE': {'fetched_at': '2024-03-20T00:00:00', 'last_ex_date': '2024-02-28', 'frequency': 'Monthly'},
+        }
+        assert loader.is_stale('MISSING', state, now) is True
+        assert loader.is_stale('FRESH', state, now) is False
+        assert loader.is_stale('OLD', state, now) is True
+        assert loader.is_stale('OLD', state, now, max_age_days=60) is False
+        # 월배당: 2/28 이후 다음 배당락 예상일(3/26)이 마지막 수집 이후 도래
+        assert loader.is_stale('DUE', state, now, max_age_days=60) is True
+        assert loader.is_stale('FRESH', state, now, max_age_days=60) is False
+    
+    def test_incremental_fetches_only_stale(self, loader):
+        """증분 갱신은 stale 티커만 가져오고 기존 데이터에 병합"""
+        with patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: make_result(t)):
+            loader.fetch_data()
+        
+        state = loader._load_fetch_state()
+        state['BBB']['fetched_at'] = (datetime.now() - timedelta(days=30)).isoformat(timespec='seconds')
+        loader._save_fetch_state(state)
+        
+        # BBB 재수집은 실패하더라도 기존 항목 유지, CCC만 새 가격으로 갱신되는지 확인
+        state['CCC']['fetched_at'] = state['BBB']['fetched_at']
+        loader._save_fetch_state(state)
+        fresh = {'BBB': None, 'CCC': make_result('CCC', price=99.0)}
+        with patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: fresh[t]) as mock_fetch:
+            data = loader.fetch_data(incremental=True)
+        
+        assert sorted(c.args[0] for c in mock_fetch.call_args_list) == ['BBB', 'CCC']
+        assert data['CCC']['price'] == 99.0
+        assert data['BBB']['price'] == 50.0
+        assert 'AAA' in data
+        assert data['_meta']['refreshed_tickers'] == 1
+
+    def test_bulk_fetch_batches_and_reuses_meta(self, loader):
+        """배치 다운로드: batch_size 단위 요청, 알려진 메타데이터는 .info 재요청 없음"""
+        with patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: make_result(t)):
+            loader.fetch_data()
+        universe = loader._load_universe()
+        del universe['CCC']
+        with open(os.path.join(loader.data_dir, 'dividend_universe.json'), 'w', encoding='utf-8') as f:
+            json.dump(universe, f)
+        
+        with patch('us_market.dividend.providers.yf') as mock_yf:
+            mock_yf.download.side_effect = make_download
+            mock_yf.Ticker.return_value.info = {'shortName': 'CCC Corp', 'sector': 'Energy', 'currency': 'USD'}
+            data = loader.fetch_data(bulk=True, batch_size=2)
+        
+        assert mock_yf.download.call_count == 2
+        assert [c.args[0] for c in mock_yf.download.call_args_list] == [['AAA', 'BBB'], ['CCC']]
+        assert [c.args[0] for c in mock_yf.Ticker.call_args_list] == ['CCC']
+        assert 'connections' in data['_meta']['fetch_stats']
+        
+        assert data['AAA']['name'] == 'AAA Inc'
+        assert data['CCC']['name'] == 'CCC Corp'
+        assert data['CCC']['price'] == 40.0
+        assert data['CCC']['ttm_dividend'] == pytest.approx(2.0)
+        assert data['CCC']['yield'] == pytest.approx(0.05)
+        assert data['CCC']['frequency'] == 'Quarterly'
+        assert len(data['CCC']['payments']) == 4
+    
+    def test_bulk_download_failure_falls_back_per_ticker(self, loader):
+        """배치 다운로드 실패 시 티커별 경로로 대체"""
+        with patch('us_market.dividend.providers.yf') as mock_yf, \
+             patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: make_result(t)) as mock_fetch:
+            mock_yf.download.side_effect = ValueError("malformed response")
+            data = loader.fetch_data(bulk=True)
+        
+        assert mock_fetch.call_count == 3
+        assert data['_meta']['refreshed_tickers'] == 3
+
+    def test_bulk_missing_tickers_fetched_individually(self, loader):
+        """배치 프레임에 없는(스로틀·오류로 빠진) 티커는 티커별 경로로 재조회해 원인 분류"""
+        with patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: make_result(t)):
+            loader.fetch_data()
+        
+        def partial_download(tickers, **kwargs):
+            frame = make_download(['AAA', 'CCC'])
+            frame[('CCC', 'Close')] = np.nan   # yfinance: 실패 티커는 NaN 열
+            return frame
+        
+        def fetch(ticker):
+            if ticker == 'BBB':
+                raise Exception("HTTP Error 429: Too Many Requests")
+            return make_result(ticker, price=70.0)
+        
+        with patch('us_market.dividend.providers.yf') as mock_yf, \
+             patch.object(loader, '_new_controller', return_value=FetchController(rate=None, max_retries=1, base_delay=0)), \
+             patch.object(loader, '_fetch_ticker', side_effect=fetch) as mock_fetch:
+            mock_yf.download.side_effect = partial_download
+            data = loader.fetch_data(bulk=True)
+        
+        assert sorted({c.args[0] for c in mock_fetch.call_args_list}) == ['BBB', 'CCC']
+        assert data['AAA']['price'] == 40.0
+        assert data['CCC']['price'] == 70.0
+        assert data['BBB']['price'] == 50.0   # 스로틀: 기존 항목 유지
+        assert loader.controller.stats.failures == {'BBB': 'rate_limited'}
+    
+    def test_full_refresh_keeps_entries_on_fetch_errors(self, loader):
+        """전체 갱신: 오류 티커는 기존 항목 유지, 무배당 티커는 제거, 실행 통계 기록"""
+        with patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: make_result(t)):
+            loader.fetch_data()
+        
+        attempts = {'AAA': 0}
+        
+        def fetch(ticker):
+            if ticker == 'AAA':
+                attempts['AAA'] += 1
+                if attempts['AAA'] == 1:
+                    raise Exception("HTTP Error 429: Too Many Requests")
+                return make_result('AAA', price=60.0)
+            if ticker == 'BBB':
+                raise ConnectionError("connection reset")
+            return None  # CCC: 무배당
+        
+        with patch.object(loader, '_new_controller', return_value=FetchController(rate=None, max_retries=1, base_delay=0)), \
+             patch.object(loader, '_fetch_ticker', side_effect=fetch):
+            data = loader.fetch_data()
+        
+        assert data['AAA']['price'] == 60.0
+        assert data['BBB']['price'] == 50.0
+        assert 'CCC' not in data
+        
+        stats = data['_meta']['fetch_stats']
+        assert stats == loader.last_run_stats
+        assert stats['throttles'] == 1
+        assert stats['retries'] == 2
+        assert stats['failures_by_cause'] == {'network': 1, 'no_dividends': 1}
+
+    def test_resume_after_interrupted_run(self, loader):
+        """중단된 실행은 저널에서 재개: 이미 끝난 티커는 다시 가져오지 않음"""
+        def crash_on_ccc(ticker):
+            if ticker == 'CCC':
+                raise RuntimeError("process killed")
+            return make_result(ticker)
+        
+        loader.max_workers = 1  # 순차 실행으로 AAA, BBB가 먼저 저널에 기록되도록
+        with patch.object(loader, 'fetch_ticker_data', side_effect=crash_on_ccc):
+            with pytest.raises(RuntimeError):
+                loader.fetch_data()
+        journal_file = os.path.join(loader.data_dir, 'fetch_journal.jsonl')
+        assert os.path.exists(journal_file)
+        assert not os.path.exists(os.path.join(loader.data_dir, 'dividend_universe.json'))
+        
+        with patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: make_result(t)) as mock_fetch:
+            data = loader.fetch_data()
+        
+        assert [c.args[0] for c in mock_fetch.call_args_list] == ['CCC']
+        assert [t for t in data if not t.startswith('_')] == ['AAA', 'BBB', 'CCC']
+        assert data['_meta']['refreshed_tickers'] == 3
+        assert not os.path.exists(journal_file)
+    
+    def test_no_resume_starts_over(self, loader):
+        """resume=False는 저널을 무시하고 전체를 다시 가져옴"""
+        with patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: make_result(t) if t != 'CCC' else 1 / 0):
+            with pytest.raises(ZeroDivisionError):
+                loader.fetch_data()
+        with patch.object(loader, 'fetch_ticker_data', side_effect=lambda t: make_result(t)) as mock_fetch:
+            loader.fetch_data(resume=False)
+        assert mock_fetch.call_count == 3
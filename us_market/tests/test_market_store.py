@@ -0,0 +1,118 @@
+"""
+MarketStore 테스트
+- 기간 문자열 → 시작일 변환
+- 커버리지 내 로컬 범위 읽기 (원격 요청 없음)
+- 꼬리 구간 병합(파일 원자적 교체) 및 이전 구간 재수집
+- 배당 이력 저장/갱신
+"""
+import pytest
+import sys
+import os
+from datetime import date, timedelta
+from unittest.mock import Mock
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.market_store import MarketStore, PRICE_DTYPE, period_start
+
+
+def make_history(start, end):
+    """yfinance history 형태의 모의 데이터 (end 미포함, 타임존 포함)"""
+    dates = pd.date_range(start, pd.Timestamp(end) - pd.Timedelta(days=1), freq='D', tz='America/New_York')
+    close = np.arange(len(dates), dtype=float) + 100
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                         'Volume': np.full(len(dates), 1000.0)}, index=dates)
+
+
+class TestMarketStore:
+    """MarketStore 클래스 테스트"""
+    
+    @pytest.fixture
+    def fetch(self):
+        """요청 범위를 그대로 돌려주는 모의 원격 수집 함수"""
+        return Mock(side_effect=make_history)
+    
+    def test_period_start(self):
+        """yfinance 기간 문자열 해석"""
+        today = date(2024, 3, 31)
+        assert period_start('1y', today) == date(2023, 3, 31)
+        assert period_start('6mo', today) == date(2023, 9, 30)
+        assert period_start('5d', today) == date(2024, 3, 26)
+        assert period_start('ytd', today) == date(2024, 1, 1)
+        with pytest.raises(ValueError):
+            period_start('forever', today)
+    
+    def test_read_within_coverage_is_local(self, market_store, fetch):
+        """커버리지 안의 범위는 원격 요청 없이 로컬에서 읽음 (재시작 후에도)"""
+        first = market_store.get_history('AAA', '2024-01-01', '2024-01-31', fetch=fetch)
+        assert fetch.call_count == 1
+        assert fetch.call_args.args == ('2024-01-01', '2024-02-01')
+        assert len(first) == 31
+        assert first.index.tz is None
+        
+        restarted = MarketStore(market_store.root)
+        sub = restarted.get_history('AAA', '2024-01-10', '2024-01-20', fetch=fetch)
+        assert fetch.call_count == 1
+        assert list(sub.index) == list(pd.date_range('2024-01-10', '2024-01-20'))
+        assert sub['Close'].iloc[0] == 109.0
+    
+    def test_tail_update_appends(self, market_store, fetch):
+        """커버리지 이후 구간만 요청해 파일 끝에 추가 (마지막 봉은 갱신)"""
+        market_store.get_history('AAA', '2024-01-01', '2024-01-31', fetch=fetch)
+        size_before = os.path.getsize(market_store._path('AAA', 'prices.bin'))
+        
+        df = market_store.get_history('AAA', '2024-01-01', '2024-02-10', fetch=fetch)
+        assert fetch.call_args.args == ('2024-01-31', '2024-02-11')
+        assert len(df) == 41
+        assert df.index.is_monotonic_increasing
+        # 1/31 봉은 새로 받은 값으로 교체 (중복 없음)
+        assert df.loc['2024-01-31', 'Close'] == 100.0
+        assert os.path.getsize(market_store._path('AAA', 'prices.bin')) == size_before + 10 * PRICE_DTYPE.itemsize
+        assert market_store.coverage('AAA')['prices']['end'] == '2024-02-10'
+    
+    def test_tail_update_keeps_open_maps_valid(self, market_store, fetch):
+        """잠금 없이 매핑한 독자의 배열은 갱신 후에도 유효 (제자리 truncate 없이 파일 교체)"""
+        market_store.get_history('AAA', '2024-01-01', '2024-01-31', fetch=fetch)
+        path = market_store._path('AAA', 'prices.bin')
+        reader = MarketStore._read(path, PRICE_DTYPE)
+        inode = os.stat(path).st_ino
+        
+        market_store.get_history('AAA', '2024-01-01', '2024-02-10', fetch=fetch)
+        assert os.stat(path).st_ino != inode
+        assert len(reader) == 31
+        assert reader['close'][-1] == 130.0   # 기존 매핑은 이전 내용 그대로
+        assert MarketStore._read(path, PRICE_DTYPE)['close'][30] == 100.0
+    
+    def test_earlier_start_refetches(self, market_store, fetch):
+        """커버리지 이전 시작일은 전체 범위를 다시 수집"""
+        market_store.get_history('AAA', '2024-01-10', '2024-01-31', fetch=fetch)
+        df = market_store.get_history('AAA', '2024-01-01', '2024-01-31', fetch=fetch)
+        assert fetch.call_args.args == ('2024-01-01', '2024-02-01')
+        assert len(df) == 31
+        assert market_store.coverage('AAA')['prices']['start'] == '2024-01-01'
+    
+    def test_empty_fetch(self, market_store):
+        """원격 데이터가 없으면 빈 프레임"""
+        df = market_store.get_history('NONE', '2024-01-01', '2024-01-31', fetch=lambda s, e: pd.DataFrame())
+        assert df.empty
+        assert market_store.coverage('NONE') == {}
+    
+    def test_dividends_cached_until_stale(self, market_store):
+        """배당 이력은 max_age_days 동안 재요청하지 않고 범위 읽기 지원"""
+        divs = pd.Series([0.5, 0.5, 0.6], index=pd.to_datetime(['2023-06-01', '2023-09-01', '2023-12-01']).tz_localize('UTC'))
+        fetch = Mock(return_value=divs)
+        
+        full = market_store.get_dividends('AAA', fetch=fetch)
+        assert list(full.values) == [0.5, 0.5, 0.6]
+        assert full.index.tz is None
+        
+        ranged = market_store.get_dividends('AAA', '2023-08-01', '2023-12-31', fetch=fetch)
+        assert fetch.call_count == 1
+        assert list(ranged.values) == [0.5, 0.6]
+        
+        fetch.return_value = pd.concat([divs, pd.Series([0.6], index=pd.to_datetime(['2024-03-01']).tz_localize('UTC'))])
+        updated = market_store.get_dividends('AAA', fetch=fetch, max_age_days=0)
+        assert fetch.call_count == 2
+        assert len(updated) == 4
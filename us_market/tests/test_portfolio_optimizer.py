@@ -13,7 +13,7 @@ import numpy as np
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
-from us_market.dividend.portfolio_optimizer import PortfolioOptimizer
+from us_market.dividend.analysis.portfolio_optimizer import PortfolioOptimizer
 
 
 class TestPortfolioOptimizer:
@@ -42,7 +42,7 @@ class TestPortfolioOptimizer:
         assert optimizer.risk_free_rate == 0.05
         assert hasattr(optimizer, '_returns_cache')
     
-    @patch('us_market.dividend.portfolio_optimizer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_get_returns(self, mock_ticker, optimizer):
         """수익률 데이터 가져오기"""
         mock_stock = Mock()
@@ -58,7 +58,7 @@ class TestPortfolioOptimizer:
             assert isinstance(returns, pd.Series)
             assert len(returns) > 0
     
-    @patch('us_market.dividend.portfolio_optimizer.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_get_returns_insufficient_data(self, mock_ticker, optimizer):
         """데이터가 부족한 경우"""
         mock_stock = Mock()
@@ -68,6 +68,22 @@ class TestPortfolioOptimizer:
         returns = optimizer._get_returns('INVALID', period='1y')
         assert returns is None
     
+    @patch('us_market.dividend.providers.yf.Ticker')
+    def test_get_returns_reads_market_store(self, mock_ticker, market_store):
+        """로컬 저장소에 있는 기간은 재시작 후에도 원격 요청 없음"""
+        dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=300, freq='D')
+        prices = 100 + np.cumsum(np.random.randn(300) * 0.5)
+        mock_ticker.return_value.history.return_value = pd.DataFrame({'Close': prices}, index=dates)
+        
+        PortfolioOptimizer._returns_cache.clear()
+        first = PortfolioOptimizer(store=market_store)._get_returns('AAPL', period='6mo')
+        PortfolioOptimizer._returns_cache.clear()
+        second = PortfolioOptimizer(store=market_store)._get_returns('AAPL', period='6mo')
+        
+        assert mock_ticker.call_count == 1
+        assert second is not None
+        assert np.allclose(first.loc[second.index], second)
+    
     @patch.object(PortfolioOptimizer, '_get_returns')
     def test_optimize_risk_parity(self, mock_get_returns, optimizer, mock_returns_data):
         """Risk Parity 최적화"""
@@ -0,0 +1,101 @@
+"""
+기간 사다리(price_ladder) 테스트
+- 기간 → 사다리 단계 반올림
+- 티커당 1회 조회, 짧은 기간은 슬라이스 (복사 없음)
+- 더 긴 기간 요청 시 한 단계 위로 재조회 후 교체
+- 리스크 / 최적화 모듈 공유
+"""
+import pytest
+import sys
+import os
+from unittest.mock import Mock
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.analysis.portfolio_optimizer import PortfolioOptimizer
+from us_market.dividend.analysis.risk_analytics import RiskAnalytics
+from us_market.dividend.market_store import period_start
+from us_market.dividend.price_ladder import get_history, history_cache, ladder_rung
+
+
+def make_provider():
+    """요청 구간만큼 영업일 종가를 돌려주는 공급자"""
+    provider = Mock()
+
+    def history(ticker, start=None, end=None):
+        dates = pd.date_range(start, end, freq='B', inclusive='left')
+        return pd.DataFrame({'Close': np.linspace(100, 200, len(dates))}, index=dates)
+
+    provider.history.side_effect = history
+    return provider
+
+
+class TestPriceLadder:
+    """기간 사다리 테스트"""
+
+    def test_ladder_rung(self):
+        """요청 기간을 포함하는 가장 짧은 단계"""
+        assert ladder_rung('1mo') == '1y'
+        assert ladder_rung('ytd') == '1y'
+        assert ladder_rung('1y') == '1y'
+        assert ladder_rung('18mo') == '2y'
+        assert ladder_rung('3y') == '5y'
+        assert ladder_rung('max') == 'max'
+        with pytest.raises(ValueError):
+            ladder_rung('1x')
+
+    def test_shorter_periods_are_slices(self, market_store):
+        """1y 한 번 조회로 1mo~1y 모두 제공, 같은 메모리를 공유"""
+        provider = make_provider()
+        year = get_history('AAA', '1y', market_store, provider)
+        for period in ('1mo', '3mo', '6mo', 'ytd'):
+            part = get_history('AAA', period, market_store, provider)
+            assert part.index[0] >= pd.Timestamp(period_start(period))
+            assert part.index[-1] == year.index[-1]
+            assert np.shares_memory(part['Close'].to_numpy(), year['Close'].to_numpy())
+
+        assert provider.history.call_count == 1
+        assert len(history_cache) == 1
+
+    def test_longer_period_replaces_entry(self, market_store):
+        """더 긴 기간은 다음 단계로 한 번 재조회하고, 이후 그 이하 기간은 슬라이스"""
+        provider = make_provider()
+        get_history('AAA', '1y', market_store, provider)
+        three = get_history('AAA', '3y', market_store, provider)
+        assert three.index[0] >= pd.Timestamp(period_start('3y'))
+        assert history_cache['AAA'].start == period_start('5y')
+
+        for period in ('5y', '2y', '1y', '6mo'):
+            get_history('AAA', period, market_store, provider)
+        assert provider.history.call_count == 2
+        assert len(history_cache) == 1
+
+    def test_period_past_top_rung(self, market_store):
+        """최상위 단계 시작보다 이전까지 요청해도 'max' 항목으로 제공"""
+        provider = make_provider()
+        assert not get_history('AAA', '100y', market_store, provider).empty
+        assert history_cache['AAA'].start == period_start('max')
+
+    def test_empty_history_not_cached(self, market_store):
+        """데이터가 없으면 빈 DataFrame, 캐시하지 않음"""
+        provider = Mock()
+        provider.history.return_value = pd.DataFrame()
+        assert get_history('NONE', '1y', market_store, provider).empty
+        assert 'NONE' not in history_cache
+
+    def test_shared_by_risk_and_optimizer(self, market_store):
+        """리스크와 최적화기가 같은 티커 이력을 공유"""
+        provider = make_provider()
+        risk = RiskAnalytics(store=market_store, provider=provider)
+        optimizer = PortfolioOptimizer(store=market_store, provider=provider)
+
+        assert risk.get_all_risk_metrics('AAA', '1y')['volatility_annual'] is not None
+        returns = optimizer._get_returns('AAA', '6mo')
+        assert risk.get_all_risk_metrics('AAA', '3mo')['volatility_annual'] is not None
+
+        assert returns.index[0] > pd.Timestamp(period_start('6mo'))
+        fetched = [c.args[0] for c in provider.history.call_args_list]
+        assert fetched.count('AAA') == 1
+        assert risk._get_price_data('AAA', '1x') is None
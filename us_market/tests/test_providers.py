@@ -0,0 +1,134 @@
+"""
+MarketDataProvider 테스트
+- 녹화(Recording) → 재생(Replay) 왕복
+- 녹화된 오류 재생 및 지연 주입
+- 재생 모드 로더 실행 (오프라인)
+"""
+import pytest
+import sys
+import os
+import json
+import time
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.fetch_control import classify_error, RATE_LIMITED
+from us_market.dividend.loader import DividendDataLoader
+from us_market.dividend.providers import (
+    MarketDataProvider, RecordingProvider, ReplayProvider, YFinanceProvider, get_provider, set_provider
+)
+
+
+class YFRateLimitError(Exception):
+    """yfinance 속도 제한 예외와 같은 이름의 모의 예외"""
+
+
+class StaticProvider(MarketDataProvider):
+    """고정 응답을 돌려주는 테스트용 공급자"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def info(self, ticker):
+        self.calls += 1
+        if ticker == 'LIMIT':
+            raise YFRateLimitError("Too Many Requests")
+        return {'shortName': f'{ticker} Inc', 'sector': 'Utilities', 'currency': 'USD', 'currentPrice': 50.0}
+    
+    def dividends(self, ticker):
+        self.calls += 1
+        dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=4, freq='90D', tz='America/New_York')
+        return pd.Series([0.5, 0.5, 0.5, 0.6], index=dates, name='Dividends')
+    
+    def history(self, ticker, start=None, end=None, period=None):
+        self.calls += 1
+        dates = pd.date_range(start, end, freq='B', inclusive='left', tz='America/New_York')
+        close = np.linspace(100, 110, len(dates))
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                             'Volume': np.full(len(dates), 1e6)}, index=dates)
+    
+    def download(self, tickers, start):
+        self.calls += 1
+        dates = pd.date_range(start, periods=5, freq='B')
+        return pd.concat({t: pd.DataFrame({'Close': [1.0, 2.0, np.nan, 4.0, 5.0],
+                                           'Dividends': [0, 0, 0.1, 0, 0]}, index=dates) for t in tickers}, axis=1)
+
+
+class TestProviders:
+    """녹화/재생 공급자 테스트"""
+    
+    def test_record_then_replay_round_trip(self, tmp_path):
+        """녹화된 응답을 그대로 재생 (타임존, MultiIndex, NaN 보존)"""
+        inner = StaticProvider()
+        recorder = RecordingProvider(inner, str(tmp_path))
+        info = recorder.info('AAA')
+        divs = recorder.dividends('AAA')
+        hist = recorder.history('AAA', start='2024-01-01', end='2024-02-01')
+        batch = recorder.download(['AAA', 'BBB'], '2024-01-01')
+        
+        replay = ReplayProvider(str(tmp_path))
+        assert replay.info('AAA') == info
+        pd.testing.assert_series_equal(replay.dividends('AAA'), divs, check_freq=False)
+        pd.testing.assert_frame_equal(replay.history('AAA', start='2024-01-01', end='2024-02-01'), hist, check_freq=False)
+        pd.testing.assert_frame_equal(replay.download(['AAA', 'BBB'], '2024-01-01'), batch, check_freq=False)
+        assert replay.calls == 4
+    
+    def test_replay_errors_and_missing(self, tmp_path):
+        """녹화된 오류는 같은 클래스 이름으로 재발생, 녹화 없는 호출은 LookupError"""
+        recorder = RecordingProvider(StaticProvider(), str(tmp_path))
+        with pytest.raises(YFRateLimitError):
+            recorder.info('LIMIT')
+        
+        replay = ReplayProvider(str(tmp_path))
+        with pytest.raises(Exception) as exc_info:
+            replay.info('LIMIT')
+        assert type(exc_info.value).__name__ == 'YFRateLimitError'
+        assert classify_error(exc_info.value) == RATE_LIMITED
+        with pytest.raises(LookupError):
+            replay.info('NEVER')
+    
+    def test_replay_latency(self, tmp_path):
+        """호출마다 지정한 지연 주입"""
+        RecordingProvider(StaticProvider(), str(tmp_path)).info('AAA')
+        replay = ReplayProvider(str(tmp_path), latency=0.05)
+        start = time.monotonic()
+        for _ in range(3):
+            replay.info('AAA')
+        assert time.monotonic() - start >= 0.15
+    
+    def test_get_and_set_provider(self, tmp_path, monkeypatch):
+        """기본은 yfinance, 환경 변수로 재생 모드 선택"""
+        try:
+            set_provider(None)
+            monkeypatch.delenv('MARKET_DATA_REPLAY_DIR', raising=False)
+            monkeypatch.delenv('MARKET_DATA_RECORD_DIR', raising=False)
+            assert isinstance(get_provider(), YFinanceProvider)
+            
+            set_provider(None)
+            monkeypatch.setenv('MARKET_DATA_REPLAY_DIR', str(tmp_path))
+            assert isinstance(get_provider(), ReplayProvider)
+        finally:
+            set_provider(None)
+    
+    def test_loader_replays_offline(self, tmp_path):
+        """녹화한 로더 실행을 네트워크 없이 재생하면 같은 유니버스"""
+        seed = [{'symbol': s} for s in ['AAA', 'BBB']]
+        recordings = tmp_path / 'recordings'
+        outputs = []
+        for mode in ('record', 'replay'):
+            data_dir = tmp_path / mode
+            data_dir.mkdir()
+            with open(data_dir / 'universe_seed.json', 'w', encoding='utf-8') as f:
+                json.dump(seed, f)
+            if mode == 'record':
+                provider = RecordingProvider(StaticProvider(), str(recordings))
+            else:
+                provider = ReplayProvider(str(recordings))
+            loader = DividendDataLoader(data_dir=str(data_dir), rate_limit=None, provider=provider)
+            data = loader.fetch_data()
+            outputs.append({t: v for t, v in data.items() if t != '_meta'})
+        
+        assert outputs[0] == outputs[1]
+        assert outputs[1]['AAA']['ttm_dividend'] > 0
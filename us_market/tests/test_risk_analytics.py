@@ -4,6 +4,9 @@ RiskAnalytics 테스트
 - 최대 낙폭 계산
 - Sharpe Ratio 계산
 - 통합 리스크 메트릭
+- 벡터화 배치 계산 (날짜 × 티커 가격 행렬)
+- 롤링 변동성 / Sharpe / 낙폭 곡선 (온라인, 증분 추가)
+- 꼬리 위험 (VaR / CVaR), Sortino, Calmar, 베타, 낙폭 기간 / 회복 기간
 """
 import pytest
 import sys
@@ -14,7 +17,9 @@ import numpy as np
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
-from us_market.dividend.risk_analytics import RiskAnalytics
+from us_market.dividend.analysis.risk_analytics import RiskAnalytics, RollingRisk, risk_metrics_matrix
+from us_market.dividend.market_store import period_start
+from us_market.dividend.price_ladder import LadderEntry
 
 
 class TestRiskAnalytics:
@@ -28,7 +33,7 @@ class TestRiskAnalytics:
     @pytest.fixture
     def mock_price_data(self):
         """모의 가격 데이터"""
-        dates = pd.date_range('2023-01-01', periods=252, freq='D')
+        dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=252, freq='D')
         np.random.seed(42)
         prices = 100 + np.cumsum(np.random.randn(252) * 0.5)
         return pd.DataFrame({
@@ -45,7 +50,7 @@ class TestRiskAnalytics:
         assert risk_analytics.risk_free_rate == 0.05
         assert hasattr(risk_analytics, '_price_cache')
     
-    @patch('us_market.dividend.risk_analytics.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_volatility(self, mock_ticker, risk_analytics, mock_price_data):
         """변동성 계산"""
         mock_stock = Mock()
@@ -58,7 +63,7 @@ class TestRiskAnalytics:
             assert isinstance(volatility, float)
             assert volatility > 0
     
-    @patch('us_market.dividend.risk_analytics.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_volatility_insufficient_data(self, mock_ticker, risk_analytics):
         """데이터가 부족한 경우"""
         mock_stock = Mock()
@@ -68,7 +73,7 @@ class TestRiskAnalytics:
         volatility = risk_analytics.calculate_volatility('INVALID')
         assert volatility is None
     
-    @patch('us_market.dividend.risk_analytics.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_max_drawdown(self, mock_ticker, risk_analytics, mock_price_data):
         """최대 낙폭 계산"""
         mock_stock = Mock()
@@ -81,7 +86,7 @@ class TestRiskAnalytics:
             assert isinstance(drawdown, float)
             assert drawdown <= 0  # 낙폭은 음수 또는 0
     
-    @patch('us_market.dividend.risk_analytics.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_sharpe_ratio(self, mock_ticker, risk_analytics, mock_price_data):
         """Sharpe Ratio 계산"""
         mock_stock = Mock()
@@ -94,7 +99,7 @@ class TestRiskAnalytics:
             assert isinstance(sharpe, float)
             # Sharpe ratio는 음수일 수도 있음
     
-    @patch('us_market.dividend.risk_analytics.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_calculate_sharpe_zero_volatility(self, mock_ticker, risk_analytics):
         """변동성이 0인 경우"""
         dates = pd.date_range('2023-01-01', periods=100, freq='D')
@@ -107,7 +112,7 @@ class TestRiskAnalytics:
         sharpe = risk_analytics.calculate_sharpe_ratio('CONSTANT')
         assert sharpe is None
     
-    @patch('us_market.dividend.risk_analytics.yf.Ticker')
+    @patch('us_market.dividend.providers.yf.Ticker')
     def test_get_all_risk_metrics(self, mock_ticker, risk_analytics, mock_price_data):
         """모든 리스크 메트릭 조회"""
         mock_stock = Mock()
@@ -125,9 +130,236 @@ class TestRiskAnalytics:
     
     def test_price_cache(self, risk_analytics):
         """가격 데이터 캐싱 테스트"""
-        mock_data = pd.DataFrame({'Close': [100, 101, 102]})
-        risk_analytics._price_cache['AAPL_1y'] = mock_data
+        dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=3, freq='D')
+        mock_data = pd.DataFrame({'Close': [100, 101, 102]}, index=dates)
+        risk_analytics._price_cache['AAPL'] = LadderEntry(period_start('1y'), mock_data)
         
         cached = risk_analytics._get_price_data('AAPL', '1y')
         assert cached is not None
         assert len(cached) == 3
+    
+    def test_risk_metrics_matrix_matches_per_column(self):
+        """가격 행렬 한 번의 계산 = 열마다 dropna 후 개별 계산"""
+        rng = np.random.default_rng(7)
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (260, 3)), axis=0))
+        prices[:40, 1] = np.nan       # 늦게 상장
+        prices[100:105, 2] = np.nan   # 거래일 불일치
+        
+        metrics = risk_metrics_matrix(prices, risk_free_rate=0.05)
+        
+        for j in range(3):
+            series = pd.Series(prices[:, j]).dropna()
+            returns = np.log(series / series.shift(1)).dropna()
+            vol = returns.std() * np.sqrt(252)
+            running_max = series.expanding().max()
+            assert metrics['volatility_annual'][j] == pytest.approx(vol)
+            assert metrics['max_drawdown'][j] == pytest.approx(((series - running_max) / running_max).min())
+            assert metrics['sharpe_ratio'][j] == pytest.approx((returns.mean() * 252 - 0.05) / vol)
+    
+    def test_tail_metrics_match_per_column(self):
+        """VaR / CVaR / Sortino / Calmar / 베타 = 열마다 pandas로 개별 계산"""
+        rng = np.random.default_rng(11)
+        benchmark = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, 300)))
+        prices = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.012, (300, 2)), axis=0))
+        prices[:, 0] = benchmark * np.exp(rng.normal(0, 0.004, 300))
+        prices[:50, 1] = np.nan
+        
+        metrics = risk_metrics_matrix(prices, risk_free_rate=0.05, benchmark=benchmark)
+        
+        benchmark_returns = np.log(pd.Series(benchmark)).diff()
+        for j in range(2):
+            series = pd.Series(prices[:, j]).dropna()
+            returns = np.log(series / series.shift(1)).dropna()
+            q = returns.quantile(0.05)
+            downside = np.sqrt((np.minimum(returns - 0.05 / 252, 0) ** 2).mean() * 252)
+            drawdown = series / series.cummax() - 1
+            paired = pd.concat([returns, benchmark_returns], axis=1).dropna()
+            
+            assert metrics['var_historical'][j] == pytest.approx(q)
+            assert metrics['cvar_historical'][j] == pytest.approx(returns[returns <= q].mean())
+            assert metrics['var_parametric'][j] == pytest.approx(returns.mean() - 1.6448536 * returns.std())
+            assert metrics['cvar_parametric'][j] == pytest.approx(returns.mean() - 2.0627128 * returns.std())
+            assert metrics['sortino_ratio'][j] == pytest.approx((returns.mean() * 252 - 0.05) / downside)
+            assert metrics['calmar_ratio'][j] == pytest.approx(np.expm1(returns.mean() * 252) / -drawdown.min())
+            assert metrics['beta'][j] == pytest.approx(paired.cov().iloc[0, 1] / paired.iloc[:, 1].var())
+        assert metrics['beta'][0] == pytest.approx(1.0, abs=0.1)
+    
+    def test_drawdown_duration_and_recovery(self):
+        """가장 긴 고점 아래 구간, 최저점에서 이전 고점 회복까지 거래일 수"""
+        up = np.linspace(100, 110, 10)
+        prices = np.column_stack([
+            np.concatenate([up, [99, 95, 90, 97, 105, 111], np.full(10, 112.0)]),   # 5일 하락, 3일 만에 회복
+            np.concatenate([up, [100, 90, 80], np.full(13, 85.0)]),                  # 미회복
+            np.concatenate([up, np.linspace(111, 130, 16)]),                         # 낙폭 없음
+        ])
+        prices[3, 0] = np.nan  # 결측일은 세지 않음
+        
+        metrics = risk_metrics_matrix(prices)
+        assert list(metrics['max_drawdown_duration']) == [5, 16, 0]
+        assert metrics['time_to_recovery'][0] == 3
+        assert np.isnan(metrics['time_to_recovery'][1])
+        assert metrics['time_to_recovery'][2] == 0
+        assert np.isnan(metrics['calmar_ratio'][2])
+        assert np.isnan(metrics['beta']).all()   # 벤치마크 없음
+    
+    def test_risk_metrics_matrix_short_and_flat_columns(self):
+        """데이터 부족 열은 NaN, 변동성 0 열의 Sharpe는 NaN"""
+        prices = np.full((30, 2), 100.0)
+        prices[:15, 0] = np.nan
+        
+        metrics = risk_metrics_matrix(prices)
+        assert np.isnan(metrics['volatility_annual'][0])
+        assert metrics['volatility_annual'][1] == 0
+        assert np.isnan(metrics['sharpe_ratio'][1])
+        assert metrics['max_drawdown'][1] == 0
+    
+    @patch('us_market.dividend.providers.yf.Ticker')
+    def test_get_risk_metrics_batch(self, mock_ticker, risk_analytics, mock_price_data):
+        """배치 결과가 티커별 get_all_risk_metrics와 동일"""
+        other = mock_price_data.copy()
+        other['Close'] = other['Close'][::-1].to_numpy()
+        histories = {'BATCH_A': mock_price_data, 'BATCH_B': other, 'BATCH_EMPTY': pd.DataFrame()}
+        mock_ticker.side_effect = lambda t, **kwargs: Mock(history=Mock(return_value=histories[t]))
+        
+        batch = risk_analytics.get_risk_metrics_batch(['BATCH_A', 'BATCH_B', 'BATCH_EMPTY'])
+        
+        assert list(batch) == ['BATCH_A', 'BATCH_B', 'BATCH_EMPTY']
+        for ticker in ('BATCH_A', 'BATCH_B'):
+            assert batch[ticker] == risk_analytics.get_all_risk_metrics(ticker)
+        assert batch['BATCH_EMPTY']['volatility_annual'] is None
+        assert batch['BATCH_EMPTY']['sharpe_ratio'] is None
+    
+    @patch('us_market.dividend.providers.yf.Ticker')
+    def test_batch_beta_against_benchmark(self, mock_ticker, mock_price_data):
+        """벤치마크는 한 번만 조회, 설정한 벤치마크 대비 베타, 기간은 정수 거래일"""
+        double = mock_price_data.copy()
+        double['Close'] = 100 * (double['Close'] / 100) ** 2
+        histories = {'BENCH': mock_price_data, 'LEVERED': double}
+        mock_ticker.side_effect = lambda t, **kwargs: Mock(history=Mock(return_value=histories[t]))
+        
+        batch = RiskAnalytics(benchmark='BENCH').get_risk_metrics_batch(['LEVERED', 'BENCH'])
+        
+        assert list(batch) == ['LEVERED', 'BENCH']
+        assert batch['BENCH']['beta'] == 1.0
+        assert batch['LEVERED']['beta'] == pytest.approx(2.0, abs=0.05)
+        assert isinstance(batch['LEVERED']['max_drawdown_duration'], int)
+        assert sorted(c.args[0] for c in mock_ticker.call_args_list) == ['BENCH', 'LEVERED']
+    
+    @patch('us_market.dividend.providers.yf.Ticker')
+    def test_benchmark_fetched_only_for_beta(self, mock_ticker, mock_price_data):
+        """단일 지표 계산은 벤치마크를 조회하지 않고, 베타가 필요한 경로만 조회"""
+        mock_ticker.side_effect = lambda t, **kwargs: Mock(history=Mock(return_value=mock_price_data))
+        risk = RiskAnalytics(benchmark='BENCH')
+        
+        assert risk.calculate_volatility('SOLO') > 0
+        assert risk.calculate_max_drawdown('SOLO') <= 0
+        assert risk.calculate_sharpe_ratio('SOLO') is not None
+        assert risk.get_risk_metrics_batch(['SOLO'], with_benchmark=False)['SOLO']['beta'] is None
+        assert [c.args[0] for c in mock_ticker.call_args_list] == ['SOLO']
+        
+        assert risk.get_all_risk_metrics('SOLO')['beta'] == 1.0
+        assert [c.args[0] for c in mock_ticker.call_args_list] == ['SOLO', 'BENCH']
+    
+    def test_rolling_risk_matches_pandas(self):
+        """온라인 계산 = pandas rolling 전체 재계산"""
+        rng = np.random.default_rng(3)
+        dates = pd.bdate_range('2015-01-01', periods=1500)
+        prices = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, 1500))), index=dates)
+        
+        state = RollingRisk(windows=(20, 252), risk_free_rate=0.05)
+        state.extend(prices)
+        
+        log_returns = np.log(prices).diff()
+        for w in (20, 252):
+            vol = log_returns.rolling(w).std() * np.sqrt(252)
+            sharpe = (log_returns.rolling(w).mean() * 252 - 0.05) / vol
+            assert np.allclose(state.volatility[w], vol, equal_nan=True, rtol=1e-9)
+            assert np.allclose(state.sharpe[w], sharpe, equal_nan=True, rtol=1e-9)
+        assert np.allclose(state.underwater(), prices / prices.cummax() - 1)
+        recent = prices.loc['2018-01-01':]
+        assert np.allclose(state.underwater('2018-01-01'), recent / recent.cummax() - 1)
+        # 마지막 252일 창 = 같은 구간 점 추정치
+        assert state.volatility[252][-1] == pytest.approx(risk_metrics_matrix(prices.to_numpy()[-253:])['volatility_annual'][0])
+    
+    def test_rolling_risk_incremental_append(self):
+        """새 거래일만 추가해도 전체 재계산과 동일, 수정된 마지막 봉은 거부"""
+        rng = np.random.default_rng(5)
+        dates = pd.bdate_range('2020-01-01', periods=400)
+        prices = pd.Series(50 * np.exp(np.cumsum(rng.normal(0, 0.01, 400))), index=dates)
+        full = RollingRisk(windows=(20, 60))
+        full.extend(prices)
+        
+        state = RollingRisk(windows=(20, 60))
+        assert state.sync(prices.iloc[:300])
+        assert state.sync(prices.iloc[50:])          # 시작일이 뒤로 밀린 새 조회
+        assert state.series() == full.series()
+        
+        revised = prices.copy()
+        revised.iloc[-1] *= 1.01
+        assert not state.sync(revised)
+        assert state.last_price == prices.iloc[-1]
+    
+    def test_get_rolling_risk_appends_new_days(self, market_store):
+        """같은 키의 다음 요청은 캐시된 상태에 새 거래일만 추가"""
+        rng = np.random.default_rng(9)
+        dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=300)
+        history = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))}, index=dates)
+        provider = Mock()
+        provider.history.side_effect = lambda t, start=None, end=None: history.loc[start:end]
+        ra = RiskAnalytics(store=market_store, provider=provider)
+        
+        result = ra.get_rolling_risk('ROLL', '6mo', windows=(20,))
+        assert result['dates'][0] >= (pd.Timestamp.now() - pd.DateOffset(months=6)).strftime('%Y-%m-%d')
+        assert result['dates'][-1] == dates[-1].strftime('%Y-%m-%d')
+        assert result['volatility']['20'][-1] is not None
+        
+        closes = history['Close']
+        with patch.object(RollingRisk, 'reset', autospec=True, side_effect=RollingRisk.reset) as mock_reset, \
+                patch.object(RollingRisk, 'update', autospec=True, side_effect=RollingRisk.update) as mock_update:
+            ra._rolling('KEY', closes.iloc[:-1], '1y', (20,))
+            appended = ra._rolling('KEY', closes, '1y', (20,))
+            assert mock_reset.call_count == 1          # 최초 생성 시 한 번
+            assert mock_update.call_count == 300       # 299 + 새 거래일 1
+        assert len(appended['dates']) == len(closes.loc[str(period_start('1y')):])
+        
+        with pytest.raises(ValueError):
+            ra.get_rolling_risk('ROLL', '1x')
+    
+    def test_rolling_risk_independent_of_cached_rung(self, market_store):
+        """'max' 조회로 긴 이력이 캐시된 뒤에도 같은 '1y' 요청은 같은 결과 (낙폭은 기간 시작부터)"""
+        rng = np.random.default_rng(11)
+        dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=3000)
+        # 초반 급등 후 하락: 긴 이력의 고점이 1y 낙폭에 섞이면 결과가 달라짐
+        drift = np.where(np.arange(3000) < 1000, 0.002, -0.0002)
+        history = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(drift, 0.01)))}, index=dates)
+        provider = Mock()
+        provider.history.side_effect = lambda t, start=None, end=None: history.loc[start:end]
+        
+        fresh = RiskAnalytics(store=market_store, provider=provider).get_rolling_risk('DD', '1y', windows=(20, 60))
+        assert fresh['drawdown'][0] == 0
+        
+        RiskAnalytics._price_cache.clear()
+        RiskAnalytics._rolling_cache.clear()
+        ra = RiskAnalytics(store=market_store, provider=provider)
+        ra.get_rolling_risk('DD', 'max', windows=(20, 60))
+        assert ra.get_rolling_risk('DD', '1y', windows=(20, 60)) == fresh
+        
+        six = ra.get_rolling_risk('DD', '6mo', windows=(20, 60))
+        assert six['drawdown'][0] == 0
+        assert six['volatility']['60'][0] is not None
+    
+    def test_get_portfolio_rolling_risk(self, market_store):
+        """포트폴리오 가치 곡선의 롤링 지표, 데이터 없는 종목은 에러"""
+        dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=260)
+        closes = {'PA': np.linspace(100, 130, 260), 'PB': np.linspace(50, 40, 260)}
+        provider = Mock()
+        provider.history.side_effect = lambda t, start=None, end=None: (
+            pd.DataFrame({'Close': closes[t]}, index=dates) if t in closes else pd.DataFrame())
+        ra = RiskAnalytics(store=market_store, provider=provider)
+        
+        result = ra.get_portfolio_rolling_risk([('PA', 3), ('PB', 1)], windows=(20,))
+        assert result['holdings'] == [{'ticker': 'PA', 'weight': 0.75}, {'ticker': 'PB', 'weight': 0.25}]
+        assert result['drawdown'][0] == 0
+        assert result['volatility']['20'][-1] > 0
+        
+        assert 'error' in ra.get_portfolio_rolling_risk([('PA', 1), ('NONE', 1)])
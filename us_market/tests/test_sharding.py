@@ -0,0 +1,162 @@
+"""
+샤딩 유니버스 갱신 테스트
+- 해시 파티션 안정성
+- 샤드별 부분 결과 병합 및 검증
+- 재생 공급자로 다중 프로세스 실행 (오프라인)
+"""
+import pytest
+import sys
+import os
+import json
+import subprocess
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.loader import DividendDataLoader
+from us_market.dividend.providers import MarketDataProvider, RecordingProvider
+from us_market.dividend.sharding import (
+    MANIFEST_FILE, ShardMergeError, merge_shards, run_local, run_shard, shard_dir, shard_of, shard_tickers
+)
+from us_market.dividend.ticker_analytics import ANALYTICS_FILE, load_analytics
+
+SEED = [f'SH{i:02d}' for i in range(12)]
+
+
+class SeedProvider(MarketDataProvider):
+    """티커마다 다른 고정 응답 공급자"""
+
+    def info(self, ticker):
+        n = int(ticker[2:])
+        return {'shortName': f'{ticker} Inc', 'sector': 'Utilities', 'currency': 'USD',
+                'currentPrice': 40.0 + n, 'dividendRate': 1.0, 'trailingEps': 2.0}
+
+    def dividends(self, ticker):
+        dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=8, freq='91D')
+        return pd.Series(np.full(8, 0.25 + int(ticker[2:]) / 100), index=dates, name='Dividends')
+
+    def history(self, ticker, start=None, end=None, period=None):
+        dates = pd.date_range(start, end, freq='B', inclusive='left')
+        close = np.linspace(100, 120, len(dates))
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                             'Volume': np.full(len(dates), 1e6)}, index=dates)
+
+    def download(self, tickers, start):
+        raise NotImplementedError
+
+
+class NoNetworkProvider(SeedProvider):
+    """호출되면 실패하는 공급자 (병합 시 재계산 없음 확인용)"""
+
+    def info(self, ticker):
+        raise AssertionError(f"unexpected fetch for {ticker}")
+
+    dividends = history = info
+
+
+def write_seed(data_dir, tickers=SEED):
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, 'universe_seed.json'), 'w', encoding='utf-8') as f:
+        json.dump([{'symbol': t} for t in tickers], f)
+
+
+class TestSharding:
+    """샤딩 갱신 테스트"""
+
+    def test_partition_is_stable_and_complete(self):
+        """모든 티커가 정확히 한 샤드에 속하고, 결과는 실행마다 동일"""
+        shards = [shard_tickers(SEED, i, 3) for i in range(3)]
+        assert sorted(t for s in shards for t in s) == sorted(SEED)
+        assert shards[0] == [t for t in SEED if t in shards[0]]  # 시드 순서 유지
+        
+        # 다른 프로세스(다른 해시 시드)에서도 같은 파티션
+        code = "from us_market.dividend.sharding import shard_of; print([shard_of(t, 3) for t in %r])" % SEED
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                             env={**os.environ, 'PYTHONHASHSEED': '123'}).stdout
+        assert json.loads(out) == [shard_of(t, 3) for t in SEED]
+
+    def test_merge_matches_unsharded_run(self, tmp_path):
+        """샤드 병합 결과가 단일 로더 실행과 같은 유니버스"""
+        write_seed(tmp_path / 'single')
+        single = DividendDataLoader(data_dir=str(tmp_path / 'single'), rate_limit=None,
+                                    provider=SeedProvider(), analytics=False).fetch_data()
+
+        data_dir = str(tmp_path / 'sharded')
+        write_seed(data_dir)
+        for i in range(3):
+            run_shard(i, 3, data_dir, provider=SeedProvider(), analytics=False)
+        merged = merge_shards(3, data_dir, analytics=False)
+
+        assert list(merged) == list(single)
+        assert {t: v for t, v in merged.items() if t != '_meta'} == \
+            {t: v for t, v in single.items() if t != '_meta'}
+        assert merged['_meta']['shards']['num_shards'] == 3
+        assert os.path.exists(os.path.join(data_dir, 'dividend_universe.npz'))
+        with open(os.path.join(data_dir, 'fetch_state.json'), encoding='utf-8') as f:
+            assert sorted(json.load(f)) == sorted(SEED)
+
+    def test_merge_reuses_shard_analytics(self, tmp_path):
+        """샤드에서 계산한 분석을 병합 스냅샷 버전으로 재사용"""
+        data_dir = str(tmp_path)
+        write_seed(data_dir, SEED[:4])
+        for i in range(2):
+            run_shard(i, 2, data_dir, provider=SeedProvider())
+        merged = merge_shards(2, data_dir, provider=NoNetworkProvider())
+
+        analytics = load_analytics(os.path.join(data_dir, ANALYTICS_FILE), merged['_meta']['snapshot_id'])
+        assert sorted(t for t in analytics if t != '_meta') == SEED[:4]
+        assert analytics['SH01']['sustainability']['payout_ratio'] == 0.5
+
+    def test_merge_rejects_missing_shard(self, tmp_path):
+        """완료되지 않은 샤드가 있으면 병합 거부"""
+        data_dir = str(tmp_path)
+        write_seed(data_dir)
+        run_shard(0, 2, data_dir, provider=SeedProvider(), analytics=False)
+
+        with pytest.raises(ShardMergeError) as exc:
+            merge_shards(2, data_dir, analytics=False)
+        assert any('shard 1' in p for p in exc.value.problems)
+        assert not os.path.exists(os.path.join(data_dir, 'dividend_universe.json'))
+
+    def test_merge_rejects_invalid_partials(self, tmp_path):
+        """시드 변경, 파티션 밖 티커, 매니페스트 불일치 검출"""
+        data_dir = str(tmp_path)
+        write_seed(data_dir)
+        for i in range(2):
+            run_shard(i, 2, data_dir, provider=SeedProvider(), analytics=False)
+
+        # 샤드 0에 다른 샤드의 티커 삽입 → 부분 결과가 매니페스트와 불일치
+        work_dir = shard_dir(os.path.join(data_dir, 'shards'), 0, 2)
+        path = os.path.join(work_dir, 'dividend_universe.json')
+        with open(path, encoding='utf-8') as f:
+            universe = json.load(f)
+        stray = shard_tickers(SEED, 1, 2)[0]
+        universe[stray] = {'ticker': stray}
+        universe['_meta']['snapshot_id'] = 'edited'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(universe, f)
+        write_seed(data_dir, SEED + ['SH99'])
+
+        with pytest.raises(ShardMergeError) as exc:
+            merge_shards(2, data_dir, analytics=False)
+        problems = ' | '.join(exc.value.problems)
+        assert 'different universe_seed.json' in problems
+        assert 'outside its partition' in problems
+        assert 'does not match its manifest' in problems
+
+    def test_run_local_with_replay(self, tmp_path):
+        """녹화 → 다중 프로세스 재생 실행 → 병합 (네트워크 없음)"""
+        recordings = str(tmp_path / 'recordings')
+        write_seed(tmp_path / 'record')
+        recorded = DividendDataLoader(data_dir=str(tmp_path / 'record'), rate_limit=None, analytics=False,
+                                      provider=RecordingProvider(SeedProvider(), recordings)).fetch_data()
+
+        data_dir = str(tmp_path / 'replay')
+        write_seed(data_dir)
+        merged = run_local(3, data_dir, replay=recordings, analytics=False, resume=False)
+
+        assert {t: v for t, v in merged.items() if t != '_meta'} == \
+            {t: v for t, v in recorded.items() if t != '_meta'}
+        for i in range(3):
+            assert os.path.exists(os.path.join(shard_dir(os.path.join(data_dir, 'shards'), i, 3), MANIFEST_FILE))
@@ -0,0 +1,63 @@
+"""
+storage 모듈 테스트
+- 원자적 파일 교체
+- 추가 전용 JSONL 저널
+"""
+import pytest
+import sys
+import os
+import json
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.storage import FetchJournal, atomic_write, atomic_write_json
+
+
+class TestStorage:
+    """atomic_write / FetchJournal 테스트"""
+    
+    def test_atomic_write_replaces_file(self, tmp_path):
+        """정상 종료 시 새 내용으로 교체되고 임시 파일이 남지 않음"""
+        path = tmp_path / 'data.json'
+        path.write_text('{"old": true}')
+        atomic_write_json(str(path), {'new': True})
+        assert json.loads(path.read_text()) == {'new': True}
+        assert os.listdir(tmp_path) == ['data.json']
+    
+    def test_atomic_write_keeps_old_file_on_error(self, tmp_path):
+        """쓰기 도중 예외가 나면 기존 파일 유지"""
+        path = tmp_path / 'data.json'
+        path.write_text('{"old": true}')
+        with pytest.raises(RuntimeError):
+            with atomic_write(str(path)) as f:
+                f.write('{"half": ')
+                raise RuntimeError("crash")
+        assert json.loads(path.read_text()) == {'old': True}
+        assert os.listdir(tmp_path) == ['data.json']
+    
+    def test_journal_resume_and_torn_line(self, tmp_path):
+        """재개 시 기존 기록 유지, 잘린 마지막 줄은 무시"""
+        path = str(tmp_path / 'journal.jsonl')
+        started = datetime(2024, 4, 1, 9, 0, 0)
+        journal = FetchJournal(path)
+        journal.start(started, resume=True)
+        journal.append('AAA', started, record={'ticker': 'AAA'})
+        journal.append('BBB', started, cause='network')
+        journal.close()
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"ticker": "CC')
+        
+        journal = FetchJournal(path)
+        assert journal.started_at() == started
+        journal.start(datetime(2024, 4, 1, 10, 0, 0), resume=True)
+        journal.append('BBB', started, record={'ticker': 'BBB'})
+        journal.close()
+        
+        results = list(journal.results())
+        assert [e['ticker'] for e in results] == ['AAA', 'BBB', 'BBB']
+        assert results[1]['cause'] == 'network'
+        assert journal.started_at() == started
+        
+        journal.discard()
+        assert not os.path.exists(path)
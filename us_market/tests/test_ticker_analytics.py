@@ -0,0 +1,209 @@
+"""
+사전 계산 티커 분석 테스트
+- 로더 분석 단계: 유니버스 전체 리스크/지속가능성 지표 계산
+- snapshot_id 버전 일치 시에만 조회
+- 엔진 조회 API
+"""
+import pytest
+import sys
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.engine import DividendEngine
+from us_market.dividend.fetch_control import FetchController
+from us_market.dividend.loader import DividendDataLoader
+from us_market.dividend.providers import MarketDataProvider
+from us_market.dividend.ticker_analytics import (
+    ANALYTICS_FILE, ANALYTICS_VERSION, build_analytics, load_analytics, snapshot_id_of, write_analytics
+)
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'dividend'))
+
+
+class AnalyticsProvider(MarketDataProvider):
+    """분석 단계용 고정 응답 공급자 (FAIL 티커는 info 오류)"""
+
+    def info(self, ticker):
+        if ticker.startswith('FAIL'):
+            raise ValueError("malformed response")
+        return {'shortName': ticker, 'sector': 'Utilities', 'currency': 'USD', 'currentPrice': 50.0,
+                'dividendRate': 2.0, 'trailingEps': 4.0}
+
+    def dividends(self, ticker):
+        dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=24, freq='91D')
+        amounts = np.repeat(np.linspace(0.4, 0.6, 6), 4)
+        return pd.Series(amounts, index=dates, name='Dividends')
+
+    def history(self, ticker, start=None, end=None, period=None):
+        dates = pd.date_range(start, end, freq='B', inclusive='left')
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0.0003, 0.01, len(dates))))
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                             'Volume': np.full(len(dates), 1e6)}, index=dates)
+
+    def download(self, tickers, start):
+        raise NotImplementedError
+
+
+class TestTickerAnalytics:
+    """분석 단계 및 버전 관리 테스트"""
+
+    def test_build_analytics(self):
+        """티커마다 리스크·지속가능성 지표, _meta에 snapshot_id"""
+        analytics = build_analytics(['ANA_A', 'ANA_B'], 'snap-1', provider=AnalyticsProvider(), max_workers=2)
+
+        assert analytics['_meta']['snapshot_id'] == 'snap-1'
+        assert analytics['_meta']['benchmark'] == 'SPY'
+        assert analytics['_meta']['version'] == ANALYTICS_VERSION
+        assert analytics['_meta']['tickers'] == 2
+        for ticker in ('ANA_A', 'ANA_B'):
+            risk = analytics[ticker]['risk']
+            assert risk['ticker'] == ticker
+            assert risk['volatility_annual'] > 0
+            assert risk['max_drawdown'] <= 0
+            assert risk['var_historical'] < 0
+            assert risk['beta'] == 1.0   # 벤치마크(SPY)와 같은 가격 경로
+            assert isinstance(risk['max_drawdown_duration'], int)
+            sustainability = analytics[ticker]['sustainability']
+            assert sustainability['payout_ratio'] == 0.5
+            assert 'safety' in sustainability
+
+    def test_failed_ticker_left_out(self):
+        """계산이 실패한 티커는 빠지고 나머지는 유지"""
+        def call(fn, ticker):
+            if ticker == 'ANA_BAD':
+                raise RuntimeError("boom")
+            return fn(ticker)
+
+        analytics = build_analytics(['ANA_OK', 'ANA_BAD'], 'snap-1', provider=AnalyticsProvider(), call=call)
+        assert 'ANA_OK' in analytics
+        assert 'ANA_BAD' not in analytics
+        assert analytics['_meta']['tickers'] == 1
+
+    def test_fetch_errors_retried_or_left_out(self, tmp_path):
+        """분석 단계의 조회 오류는 삼키지 않고 컨트롤러가 재시도, 끝내 실패하면 파일에서 제외"""
+        class FlakyProvider(AnalyticsProvider):
+            def __init__(self):
+                self.throttled = set()
+
+            def info(self, ticker):
+                if ticker not in self.throttled:
+                    self.throttled.add(ticker)
+                    raise Exception("Too Many Requests. Rate limited. Try after a while.")
+                return super().info(ticker)
+
+            def dividends(self, ticker):
+                if ticker == 'ANA_DOWN':
+                    raise ConnectionError("connection reset")
+                return super().dividends(ticker)
+
+        with open(tmp_path / 'universe_seed.json', 'w', encoding='utf-8') as f:
+            json.dump([{'symbol': 'ANA_R'}], f)
+        loader = DividendDataLoader(data_dir=str(tmp_path), rate_limit=None, provider=AnalyticsProvider(),
+                                    analytics=False)
+        data = loader.fetch_data()
+        data['ANA_DOWN'] = data['ANA_R']
+
+        loader.provider = FlakyProvider()
+        loader.controller = FetchController(rate=None, max_retries=2, base_delay=0)
+        analytics = loader.write_analytics(data)
+
+        stats = loader.controller.report()
+        assert stats['throttles'] >= 1
+        assert stats['retries'] >= 1
+        assert analytics['ANA_R']['sustainability']['payout_ratio'] == 0.5
+        assert 'ANA_DOWN' not in analytics
+        assert 'ANA_DOWN' not in load_analytics(str(tmp_path / ANALYTICS_FILE), data['_meta']['snapshot_id'])
+
+    def test_load_requires_matching_snapshot(self, tmp_path):
+        """다른 스냅샷으로 만든 분석 파일은 무시"""
+        path = str(tmp_path / ANALYTICS_FILE)
+        write_analytics(path, {'AAA': {'risk': {'sharpe_ratio': np.float64(1.2)}},
+                               '_meta': {'snapshot_id': 'snap-1', 'version': ANALYTICS_VERSION}})
+
+        assert load_analytics(path, 'snap-1')['AAA']['risk']['sharpe_ratio'] == 1.2
+        assert load_analytics(path, 'snap-2') == {}
+
+        # 지표 구성이 다른 이전 버전 파일도 무시
+        write_analytics(path, {'AAA': {'risk': {}}, '_meta': {'snapshot_id': 'snap-1'}})
+        assert load_analytics(path, 'snap-1') == {}
+        assert load_analytics(str(tmp_path / 'missing.json'), 'snap-1') == {}
+
+    def test_snapshot_id_falls_back_to_last_updated(self):
+        """snapshot_id가 없는 예전 유니버스는 last_updated로 버전 식별"""
+        assert snapshot_id_of({'snapshot_id': 'x', 'last_updated': 'y'}) == 'x'
+        assert snapshot_id_of({'last_updated': 'y'}) == 'y'
+
+    def test_loader_writes_versioned_analytics(self, tmp_path):
+        """수집 직후 분석 단계가 같은 snapshot_id로 파일 저장"""
+        with open(tmp_path / 'universe_seed.json', 'w', encoding='utf-8') as f:
+            json.dump([{'symbol': 'ANA_L1'}, {'symbol': 'ANA_L2'}], f)
+        loader = DividendDataLoader(data_dir=str(tmp_path), rate_limit=None, provider=AnalyticsProvider())
+        data = loader.fetch_data()
+
+        snapshot_id = data['_meta']['snapshot_id']
+        analytics = load_analytics(str(tmp_path / ANALYTICS_FILE), snapshot_id)
+        assert set(analytics) == {'ANA_L1', 'ANA_L2', '_meta'}
+
+        # 새 수집은 새 snapshot_id → 이전 분석은 무효
+        loader.analytics = False
+        data = loader.fetch_data()
+        assert data['_meta']['snapshot_id'] != snapshot_id
+        assert load_analytics(str(tmp_path / ANALYTICS_FILE), data['_meta']['snapshot_id']) == {}
+
+    def test_incremental_reuses_analytics(self, tmp_path, monkeypatch):
+        """증분 갱신: 재수집하지 않은 티커는 이전 분석을 새 snapshot_id로 재사용"""
+        with open(tmp_path / 'universe_seed.json', 'w', encoding='utf-8') as f:
+            json.dump([{'symbol': 'ANA_I1'}, {'symbol': 'ANA_I2'}], f)
+        loader = DividendDataLoader(data_dir=str(tmp_path), rate_limit=None, provider=AnalyticsProvider())
+        loader.fetch_data()
+
+        state = loader._load_fetch_state()
+        state['ANA_I2']['fetched_at'] = '2000-01-01T00:00:00'
+        loader._save_fetch_state(state)
+        computed = []
+        original = build_analytics
+
+        def spy(tickers, *args, **kwargs):
+            computed.extend(tickers)
+            return original(tickers, *args, **kwargs)
+
+        monkeypatch.setattr('us_market.dividend.loader.build_analytics', spy)
+        data = loader.fetch_data(incremental=True)
+
+        assert computed == ['ANA_I2']
+        analytics = load_analytics(str(tmp_path / ANALYTICS_FILE), data['_meta']['snapshot_id'])
+        assert set(analytics) == {'ANA_I1', 'ANA_I2', '_meta'}
+        assert analytics['_meta']['reused'] == 1
+        assert analytics['ANA_I1']['risk']['volatility_annual'] > 0
+
+    def test_engine_serves_matching_analytics(self, tmp_path):
+        """엔진은 현재 유니버스와 버전이 맞는 분석만 조회"""
+        shutil.copytree(os.path.join(PROJECT_DIR, 'config'), tmp_path / 'config')
+        (tmp_path / 'data').mkdir()
+        universe = {
+            'SCHD': {'ticker': 'SCHD', 'name': 'SCHD', 'price': 75.0, 'yield': 0.035, 'payments': []},
+            '_meta': {'snapshot_id': 'snap-1', 'last_updated': '2026-01-01 00:00:00'},
+        }
+        with open(tmp_path / 'data' / 'dividend_universe.json', 'w', encoding='utf-8') as f:
+            json.dump(universe, f)
+        analytics_path = str(tmp_path / 'data' / ANALYTICS_FILE)
+        write_analytics(analytics_path, {
+            'SCHD': {'risk': {'ticker': 'SCHD', 'volatility_annual': 0.12}, 'sustainability': {'payout_ratio': 0.6}},
+            '_meta': {'snapshot_id': 'snap-1', 'version': ANALYTICS_VERSION},
+        })
+
+        engine = DividendEngine(data_dir=str(tmp_path))
+        risk = engine.get_analytics('schd', 'risk')
+        assert risk == {'ticker': 'SCHD', 'volatility_annual': 0.12}
+        risk['risk_grade'] = 'A'
+        assert 'risk_grade' not in engine.get_analytics('SCHD', 'risk')
+        assert engine.get_analytics('SCHD', 'sustainability') == {'payout_ratio': 0.6}
+        assert engine.get_analytics('AAPL', 'risk') is None
+
+        write_analytics(analytics_path, {'SCHD': {'risk': {}}, '_meta': {'snapshot_id': 'snap-0'}})
+        assert DividendEngine(data_dir=str(tmp_path)).get_analytics('SCHD', 'risk') is None
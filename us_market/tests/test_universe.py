@@ -0,0 +1,148 @@
+"""
+UniverseColumns 테스트
+- 컬럼 정렬 및 타입
+- 수익률 기반 정렬
+- 태그 역색인 마스크
+- 티커 × 월 배당 캘린더 행렬
+- 바이너리 스냅샷(.npz) 저장/로드
+"""
+import pytest
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from us_market.dividend.universe import (
+    UniverseColumns, TagIndex, FREQUENCY_CODES,
+    write_universe_snapshot, load_universe_snapshot, records_from_snapshot
+)
+
+
+class TestUniverseColumns:
+    """UniverseColumns 클래스 테스트"""
+    
+    @pytest.fixture
+    def dividend_data(self):
+        """모의 배당 데이터"""
+        return {
+            'SCHD': {'name': 'Schwab', 'sector': 'ETF', 'price': 75.0, 'yield': 0.035,
+                     'ttm_dividend': 2.6, 'frequency': 'Quarterly'},
+            'JEPI': {'name': 'JPMorgan', 'sector': 'ETF', 'price': 55.0, 'yield': 0.08,
+                     'ttm_dividend': 4.4, 'frequency': 'Monthly'},
+            'O': {'name': 'Realty Income', 'sector': 'Real Estate', 'price': 60.0, 'yield': 0.055,
+                  'ttm_dividend': 3.3, 'frequency': 'Monthly'},
+            'ZERO': {'name': 'No Yield', 'sector': None, 'price': None, 'yield': None},
+            '_meta': {'last_updated': '2024-01-01'}
+        }
+    
+    @pytest.fixture
+    def symbol_tags(self):
+        return {
+            'SCHD': ['core', 'etf'],
+            'JEPI': ['covered_call', 'etf'],
+            'O': ['reit', 'stock'],
+        }
+    
+    def test_columns_are_aligned(self, dividend_data, symbol_tags):
+        """모든 컬럼이 같은 행 순서를 공유"""
+        cols = UniverseColumns.from_records(dividend_data, symbol_tags)
+        assert len(cols) == 4
+        assert cols.tickers.tolist() == ['SCHD', 'JEPI', 'O', 'ZERO']
+        assert cols.price.tolist() == [75.0, 55.0, 60.0, 0.0]
+        assert cols.dividend_yield[cols.index['O']] == 0.055
+        assert cols.frequency[cols.index['JEPI']] == FREQUENCY_CODES['Monthly']
+        assert cols.is_etf.tolist() == [True, True, False, False]
+        assert cols.sector_names[cols.sector[cols.index['O']]] == 'Real Estate'
+        assert cols.sector_names[cols.sector[cols.index['ZERO']]] == 'Unknown'
+    
+    def test_by_yield(self, dividend_data, symbol_tags):
+        """양의 수익률만 남기고 내림차순 정렬"""
+        cols = UniverseColumns.from_records(dividend_data, symbol_tags)
+        rows = cols.rows(['SCHD', 'ZERO', 'O', 'JEPI', 'MISSING'])
+        ranked = cols.by_yield(rows)
+        assert cols.tickers[ranked].tolist() == ['JEPI', 'O', 'SCHD']
+    
+    def test_tag_index_eligible(self, dividend_data, symbol_tags):
+        """허용 태그 OR, 금지 태그 AND NOT"""
+        cols = UniverseColumns.from_records(dividend_data, symbol_tags)
+        index = TagIndex(cols, symbol_tags, ['core', 'reit', 'mreits'])
+        assert index.masks['mreits'].sum() == 0
+        
+        mask = index.eligible(['core', 'covered_call', 'reit'], ['stock'])
+        assert cols.tickers[mask].tolist() == ['SCHD', 'JEPI']
+        
+        mask = index.eligible(['etf', 'reit'], ['unknown_tag'])
+        assert cols.tickers[mask].tolist() == ['SCHD', 'JEPI', 'O']
+        
+        assert not index.eligible([], []).any()
+    
+    def test_monthly_dividend_calendar(self, symbol_tags):
+        """지급 내역을 월별 열로 합산하고 잘못된 항목은 무시"""
+        data = {
+            'O': {'price': 60.0, 'yield': 0.055, 'payments': [
+                {'date': '2024-01-15', 'amount': 0.25},
+                {'date': '2024-01-31', 'amount': 0.05},
+                {'date': '2024-12-15', 'amount': 0.3},
+                {'date': 'bad', 'amount': 1.0},
+                {'amount': 1.0},
+            ]},
+            'JEPI': {'price': 55.0, 'yield': 0.08, 'payments': None},
+        }
+        cols = UniverseColumns.from_records(data, symbol_tags)
+        assert cols.monthly_dividends.shape == (2, 12)
+        assert cols.monthly_dividends[0, 0] == pytest.approx(0.30)
+        assert cols.monthly_dividends[0, 11] == pytest.approx(0.3)
+        assert cols.monthly_dividends[0].sum() == pytest.approx(0.6)
+        assert not cols.monthly_dividends[1].any()
+        
+        flow = np.array([10.0, 5.0]) @ cols.monthly_dividends
+        assert flow[0] == pytest.approx(3.0)
+
+
+
+class TestUniverseSnapshot:
+    """바이너리 유니버스 스냅샷 테스트"""
+    
+    @pytest.fixture
+    def data_map(self):
+        return {
+            'JEPI': {'ticker': 'JEPI', 'name': 'JPMorgan', 'sector': 'ETF', 'price': 55.0,
+                     'yield': 8.0, 'ttm_dividend': 4.4, 'frequency': 'Monthly', 'last_div': 0.36,
+                     'payments': [{'date': '2024-01-31', 'amount': 0.36},
+                                  {'date': '2024-02-29', 'amount': 0.38}],
+                     'currency': 'USD'},
+            'O': {'ticker': 'O', 'name': 'Realty Income', 'sector': 'Real Estate', 'price': 60.0,
+                  'yield': 0.055, 'ttm_dividend': 3.3, 'frequency': 'Monthly', 'last_div': 0.275,
+                  'payments': [], 'currency': 'USD'},
+            '_meta': {'last_updated': '2024-03-01 00:00:00', 'total_tickers': 2}
+        }
+    
+    def test_round_trip(self, tmp_path, data_map):
+        """저장 후 로드하면 원본 레코드가 복원되고 수익률은 소수로 정규화"""
+        path = str(tmp_path / 'universe.npz')
+        write_universe_snapshot(path, data_map)
+        arrays = load_universe_snapshot(path)
+        assert isinstance(arrays['price'], np.memmap)
+        
+        records = records_from_snapshot(arrays)
+        assert records['_meta'] == data_map['_meta']
+        assert records['JEPI']['yield'] == pytest.approx(0.08)
+        assert records['JEPI']['payments'] == data_map['JEPI']['payments']
+        assert records['O'] == data_map['O']
+    
+    def test_columns_from_snapshot_match_records(self, tmp_path, data_map):
+        """스냅샷 컬럼과 JSON 레코드 컬럼이 동일"""
+        path = str(tmp_path / 'universe.npz')
+        write_universe_snapshot(path, data_map)
+        tags = {'JEPI': ['covered_call', 'etf'], 'O': ['reit', 'stock']}
+        from_snapshot = UniverseColumns.from_snapshot(load_universe_snapshot(path), tags)
+        data_map['JEPI']['yield'] = 0.08
+        from_records = UniverseColumns.from_records(data_map, tags)
+        for name in ('tickers', 'names', 'price', 'dividend_yield', 'ttm_dividend',
+                     'frequency', 'is_etf', 'sector', 'monthly_dividends'):
+            assert np.array_equal(getattr(from_snapshot, name), getattr(from_records, name))
+        assert from_snapshot.sector_names == from_records.sector_names
+    
+    def test_missing_snapshot(self, tmp_path):
+        assert load_universe_snapshot(str(tmp_path / 'missing.npz')) is None